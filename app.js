@@ -3,6 +3,18 @@ const API_BASE_URL = window.location.hostname === 'localhost'
     ? 'http://localhost:8000'
     : 'https://ai-podcast-summarizer.onrender.com';
 
+// Live transcription streams recordings over a WebSocket while recording
+const LIVE_STREAMING = true;
+const LIVE_TIMESLICE_MS = 1000;
+
+// Transcripts and summaries are rendered token by token from server-sent events
+const STREAMING_RESPONSES = true;
+
+// Uploads are downmixed to mono, resampled to 16 kHz and encoded as Opus in the browser when supported
+const COMPACT_UPLOADS = true;
+const COMPACT_SAMPLE_RATE = 16000;
+const COMPACT_BITRATE = 24000;
+
 // Maintenance Mode Configuration
 const MAINTENANCE_MODE = true; // Set to false to re-enable the app
 
@@ -186,6 +198,10 @@ let currentUILanguage = 'az'; // Store current UI language
 // Add variable for recorded file
 let currentRecordedFile = null;
 
+// Live streaming state
+let liveSocket = null;
+let liveSegments = [];
+
 // DOM Elements
 const tabButtons = document.querySelectorAll('.tab-button');
 const tabContents = document.querySelectorAll('.tab-content');
@@ -355,14 +371,28 @@ startRecord.addEventListener('click', async () => {
             }
         });
         
-        mediaRecorder = new MediaRecorder(stream);
+        // Speech needs far less than the default bitrate; this also shrinks the live stream
+        mediaRecorder = new MediaRecorder(stream, COMPACT_UPLOADS ? { audioBitsPerSecond: COMPACT_BITRATE } : undefined);
         audioChunks = [];
         
+        if (LIVE_STREAMING) {
+            liveSocket = openLiveSocket(languageSelect.value);
+        }
+        
         mediaRecorder.addEventListener('dataavailable', event => {
             audioChunks.push(event.data);
+            if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+                liveSocket.send(event.data);
+            }
         });
 
         mediaRecorder.addEventListener('stop', () => {
+            // Tell the server the recording is complete so it can finish the transcript
+            if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+                liveSocket.send(JSON.stringify({ type: 'stop' }));
+                loadingContainer.classList.remove('hidden');
+            }
+            
             const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
             currentRecordedFile = new File([audioBlob], 'recording.wav', { 
                 type: 'audio/wav',
@@ -378,7 +408,8 @@ startRecord.addEventListener('click', async () => {
             stream.getTracks().forEach(track => track.stop());
         });
 
-        mediaRecorder.start();
+        // Timeslices let chunks be streamed to the server while recording
+        mediaRecorder.start(LIVE_STREAMING ? LIVE_TIMESLICE_MS : undefined);
         
         startRecord.disabled = true;
         stopRecord.disabled = false;
@@ -403,6 +434,62 @@ stopRecord.addEventListener('click', () => {
     recordTime.textContent = '00:00';
 });
 
+// Live Streaming Transcription
+function openLiveSocket(language) {
+    const wsUrl = `${API_BASE_URL.replace(/^http/, 'ws')}/ws/transcribe-live?language=${encodeURIComponent(language)}`;
+    const socket = new WebSocket(wsUrl);
+    liveSegments = [];
+    
+    socket.addEventListener('open', () => {
+        // Send anything recorded before the connection was ready
+        audioChunks.forEach(chunk => socket.send(chunk));
+    });
+    
+    socket.addEventListener('message', event => {
+        const message = JSON.parse(event.data);
+        
+        if (message.type === 'partial' || message.type === 'corrected') {
+            liveSegments[message.index] = message.text;
+            renderLiveTranscript();
+        } else if (message.type === 'final') {
+            console.log('Live transcription finished:', {
+                segments: message.segments.length,
+                timeToFirstText: message.time_to_first_text,
+                totalSeconds: message.total_seconds
+            });
+            transcriptContent.textContent = message.transcript || '';
+            loadingContainer.classList.add('hidden');
+            resultContainer.classList.remove('hidden');
+            // The recording is transcribed already, so it must not be uploaded again
+            currentRecordedFile = null;
+            recordPreview.classList.add('hidden');
+        } else if (message.type === 'error') {
+            console.error('Live transcription error:', message.detail);
+            loadingContainer.classList.add('hidden');
+        }
+    });
+    
+    socket.addEventListener('close', () => {
+        if (liveSocket === socket) {
+            liveSocket = null;
+            loadingContainer.classList.add('hidden');
+        }
+    });
+    
+    socket.addEventListener('error', error => {
+        // Recording continues; the file can still be processed with the regular upload
+        console.error('Live transcription connection error:', error);
+        loadingContainer.classList.add('hidden');
+    });
+    
+    return socket;
+}
+
+function renderLiveTranscript() {
+    transcriptContent.textContent = liveSegments.filter(Boolean).join(' ');
+    resultContainer.classList.remove('hidden');
+}
+
 // File Selection Handler
 function handleFileSelection(file) {
     if (!file) return;
@@ -623,6 +710,178 @@ languageSelect.addEventListener('change', (e) => {
     });
 });
 
+// Upload Compaction
+const OGG_CRC_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let i = 0; i < 256; i++) {
+        let crc = i << 24;
+        for (let bit = 0; bit < 8; bit++) {
+            crc = crc & 0x80000000 ? (crc << 1) ^ 0x04c11db7 : crc << 1;
+        }
+        table[i] = crc >>> 0;
+    }
+    return table;
+})();
+const OGG_SERIAL = 0x617a7370;
+const OPUS_DEFAULT_PRE_SKIP = 312;
+
+function compactionSupported() {
+    return typeof OfflineAudioContext !== 'undefined'
+        && typeof AudioEncoder !== 'undefined'
+        && typeof AudioData !== 'undefined';
+}
+
+async function decodeToMono(file) {
+    const decoder = new OfflineAudioContext(1, 1, COMPACT_SAMPLE_RATE);
+    const decoded = await decoder.decodeAudioData(await file.arrayBuffer());
+    // Rendering through a one-channel context downmixes and resamples in one pass
+    const context = new OfflineAudioContext(1, Math.ceil(decoded.duration * COMPACT_SAMPLE_RATE), COMPACT_SAMPLE_RATE);
+    const source = context.createBufferSource();
+    source.buffer = decoded;
+    source.connect(context.destination);
+    source.start();
+    return (await context.startRendering()).getChannelData(0);
+}
+
+async function encodeOpus(samples, config) {
+    const packets = [];
+    let preSkip = OPUS_DEFAULT_PRE_SKIP;
+    let failure = null;
+    const encoder = new AudioEncoder({
+        output: (chunk, metadata) => {
+            const data = new Uint8Array(chunk.byteLength);
+            chunk.copyTo(data);
+            // Opus granule positions count samples at 48 kHz whatever the input rate
+            packets.push({ data, samples: Math.round((chunk.duration || 20000) * 48000 / 1e6) });
+            const description = metadata?.decoderConfig?.description;
+            if (description && description.byteLength >= 12) {
+                const header = description instanceof ArrayBuffer ? description : description.buffer;
+                preSkip = new DataView(header, description.byteOffset || 0).getUint16(10, true);
+            }
+        },
+        error: error => { failure = error; }
+    });
+    encoder.configure(config);
+    for (let offset = 0; offset < samples.length; offset += config.sampleRate) {
+        const frame = samples.subarray(offset, offset + config.sampleRate);
+        const data = new AudioData({
+            format: 'f32-planar',
+            sampleRate: config.sampleRate,
+            numberOfChannels: 1,
+            numberOfFrames: frame.length,
+            timestamp: Math.round(offset * 1e6 / config.sampleRate),
+            data: frame
+        });
+        encoder.encode(data);
+        data.close();
+    }
+    await encoder.flush();
+    encoder.close();
+    if (failure) throw failure;
+    return { packets, preSkip };
+}
+
+function oggPage(packets, granule, sequence, flags) {
+    const segments = [];
+    let bodyLength = 0;
+    packets.forEach(packet => {
+        for (let left = packet.length; ; left -= 255) {
+            segments.push(Math.min(left, 255));
+            if (left < 255) break;
+        }
+        bodyLength += packet.length;
+    });
+
+    const page = new Uint8Array(27 + segments.length + bodyLength);
+    const view = new DataView(page.buffer);
+    page.set([0x4f, 0x67, 0x67, 0x53, 0, flags]); // "OggS", version 0
+    view.setBigInt64(6, BigInt(granule), true);
+    view.setUint32(14, OGG_SERIAL, true);
+    view.setUint32(18, sequence, true);
+    page[26] = segments.length;
+    page.set(segments, 27);
+    let offset = 27 + segments.length;
+    packets.forEach(packet => {
+        page.set(packet, offset);
+        offset += packet.length;
+    });
+
+    let crc = 0;
+    for (const byte of page) {
+        crc = ((crc << 8) ^ OGG_CRC_TABLE[((crc >>> 24) ^ byte) & 0xff]) >>> 0;
+    }
+    view.setUint32(22, crc, true);
+    return page;
+}
+
+function oggOpus(packets, preSkip, sampleRate, totalSamples) {
+    const head = new Uint8Array(19);
+    const headView = new DataView(head.buffer);
+    head.set(new TextEncoder().encode('OpusHead'));
+    head[8] = 1; // version
+    head[9] = 1; // channels
+    headView.setUint16(10, preSkip, true);
+    headView.setUint32(12, sampleRate, true);
+    const vendor = new TextEncoder().encode('web');
+    const tags = new Uint8Array(8 + 4 + vendor.length + 4);
+    tags.set(new TextEncoder().encode('OpusTags'));
+    new DataView(tags.buffer).setUint32(8, vendor.length, true);
+    tags.set(vendor, 12);
+
+    const pages = [oggPage([head], 0, 0, 0x02), oggPage([tags], 0, 1, 0)];
+    // The last granule position trims the encoder's padding, so the duration is exact
+    const endGranule = preSkip + Math.round(totalSamples * 48000 / sampleRate);
+    let granule = preSkip;
+    let pending = [];
+    let segmentCount = 0;
+    packets.forEach(packet => {
+        const needed = Math.floor(packet.data.length / 255) + 1;
+        if (segmentCount + needed > 255) {
+            pages.push(oggPage(pending, granule, pages.length, 0));
+            pending = [];
+            segmentCount = 0;
+        }
+        pending.push(packet.data);
+        segmentCount += needed;
+        granule += packet.samples;
+    });
+    pages.push(oggPage(pending, Math.min(granule, endGranule), pages.length, 0x04));
+    return pages;
+}
+
+async function compactAudioFile(file) {
+    // The server sends mono 16 kHz Opus upstream as it is, so it only has to be produced once, here
+    if (!COMPACT_UPLOADS || !compactionSupported()) return file;
+
+    const config = { codec: 'opus', sampleRate: COMPACT_SAMPLE_RATE, numberOfChannels: 1, bitrate: COMPACT_BITRATE };
+    try {
+        if (!(await AudioEncoder.isConfigSupported(config)).supported) return file;
+
+        const started = performance.now();
+        const samples = await decodeToMono(file);
+        const { packets, preSkip } = await encodeOpus(samples, config);
+        const pages = oggOpus(packets, preSkip, COMPACT_SAMPLE_RATE, samples.length);
+        const compacted = new File(pages, file.name.replace(/\.[^.]*$/, '') + '.ogg', {
+            type: 'audio/ogg',
+            lastModified: Date.now()
+        });
+
+        console.log('Upload compaction:', {
+            originalBytes: file.size,
+            uploadBytes: compacted.size,
+            savedBytes: Math.max(0, file.size - compacted.size),
+            savedPercent: Math.round(100 * (1 - compacted.size / file.size)),
+            audioSeconds: +(samples.length / COMPACT_SAMPLE_RATE).toFixed(1),
+            compactionMs: Math.round(performance.now() - started)
+        });
+        // Never upload more than the original
+        return compacted.size < file.size ? compacted : file;
+    } catch (error) {
+        console.warn('Upload compaction failed, sending the original file:', error);
+        return file;
+    }
+}
+
 // Process Audio File
 async function processAudioFile() {
     // Check if in maintenance mode
@@ -656,6 +915,9 @@ async function processAudioFile() {
     resultContainer.classList.add('hidden');
 
     try {
+        const isLiveRecording = file.name.startsWith('recording.wav');
+        file = await compactAudioFile(file);
+        
         const formData = new FormData();
         
         // Add file to FormData
@@ -668,7 +930,7 @@ async function processAudioFile() {
         formData.append('language', selectedLanguage);
         
         // Add live_recording parameter
-        formData.append('live_recording', file.name.startsWith('recording.wav'));
+        formData.append('live_recording', isLiveRecording);
         
         // Enhanced logging for form submission
         console.log('Submitting transcription request:', {
@@ -676,7 +938,7 @@ async function processAudioFile() {
             currentLanguage,
             selectValue: languageSelect.value,
             storedLanguage: localStorage.getItem('selectedTranscriptionLanguage'),
-            isLiveRecording: file.name.startsWith('recording.wav')
+            isLiveRecording
         });
 
         // Log the actual FormData entries
@@ -686,7 +948,8 @@ async function processAudioFile() {
         }
 
         // Use the main transcribe endpoint
-        const response = await fetch(`${API_BASE_URL}/transcribe/`, {
+        const requestStarted = performance.now();
+        const response = await fetch(`${API_BASE_URL}/transcribe/${STREAMING_RESPONSES ? 'stream/' : ''}`, {
             method: 'POST',
             body: formData
         });
@@ -696,7 +959,9 @@ async function processAudioFile() {
             throw new Error(data.detail || 'Failed to process audio file');
         }
 
-        const data = await response.json();
+        const data = STREAMING_RESPONSES
+            ? await renderTranscriptStream(response, requestStarted)
+            : await response.json();
         
         // Log the response
         console.log('Transcription response:', {
@@ -745,6 +1010,102 @@ async function processAudioFile() {
     }
 }
 
+// Streamed Responses
+async function readEventStream(response, onEvent) {
+    // EventSource only supports GET, so server-sent events are parsed from the fetch body
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
+async function renderTranscriptStream(response, requestStarted) {
+    let result = null;
+    let firstByte = null;
+    let corrected = '';
+    
+    await readEventStream(response, (event, data) => {
+        if (firstByte === null) {
+            firstByte = performance.now() - requestStarted;
+            loadingContainer.classList.add('hidden');
+            resultContainer.classList.remove('hidden');
+        }
+        
+        if (event === 'raw_transcript') {
+            // Shown until the corrected text starts arriving
+            transcriptContent.textContent = data.text;
+        } else if (event === 'token' && data.field === 'transcript') {
+            corrected += data.text;
+            transcriptContent.textContent = corrected;
+        } else if (event === 'done') {
+            result = data;
+        } else if (event === 'error') {
+            throw new Error(data.detail);
+        }
+    });
+    
+    if (!result) {
+        throw new Error('Failed to process audio file');
+    }
+    console.log('Streamed transcription timings:', {
+        timeToFirstByteMs: Math.round(firstByte),
+        totalMs: Math.round(performance.now() - requestStarted),
+        server: result.timings
+    });
+    return result;
+}
+
+async function renderSummaryStream(response, requestStarted) {
+    let result = null;
+    let firstByte = null;
+    let summary = '';
+    
+    await readEventStream(response, (event, data) => {
+        if (firstByte === null) {
+            firstByte = performance.now() - requestStarted;
+            summarySection.classList.remove('hidden');
+            summarySection.classList.add('visible');
+        }
+        
+        if (event === 'token' && data.field === 'summary') {
+            summary += data.text;
+            summaryContent.textContent = summary;
+        } else if (event === 'done') {
+            result = data;
+        } else if (event === 'error') {
+            throw new Error(data.detail);
+        }
+    });
+    
+    if (!result) {
+        throw new Error('Failed to generate summary');
+    }
+    console.log('Streamed summary timings:', {
+        timeToFirstByteMs: Math.round(firstByte),
+        totalMs: Math.round(performance.now() - requestStarted),
+        server: result.timings
+    });
+    return result;
+}
+
 // Recording Functions
 function startRecording(stream) {
     audioChunks = [];
@@ -866,11 +1227,12 @@ generateSummaryButton.addEventListener('click', async () => {
         summarySection.classList.remove('visible');
         summaryContent.innerHTML = ''; // Clear previous content
 
-        const response = await fetch(`${API_BASE_URL}/summarize/`, {
+        const requestStarted = performance.now();
+        const response = await fetch(`${API_BASE_URL}/summarize/${STREAMING_RESPONSES ? 'stream/' : ''}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-                'Accept': 'application/json'
+                'Accept': STREAMING_RESPONSES ? 'text/event-stream' : 'application/json'
             },
             body: JSON.stringify({ 
                 text: transcript,
@@ -878,12 +1240,15 @@ generateSummaryButton.addEventListener('click', async () => {
             })
         });
 
-        const data = await response.json();
-
         if (!response.ok) {
+            const data = await response.json();
             throw new Error(data.detail || data.message || 'Failed to generate summary');
         }
 
+        const data = STREAMING_RESPONSES
+            ? await renderSummaryStream(response, requestStarted)
+            : await response.json();
+
         if (!data.summary) {
             throw new Error('No summary data received from server');
         }
@@ -933,6 +1298,11 @@ function resetUI() {
     if (mediaRecorder && mediaRecorder.state !== 'inactive') {
         stopRecording();
     }
+    if (liveSocket) {
+        liveSocket.close();
+        liveSocket = null;
+    }
+    liveSegments = [];
     startRecord.disabled = false;
     stopRecord.disabled = true;
     recordIndicator.classList.add('hidden');
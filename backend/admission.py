@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ingest import MAX_UPLOAD_BYTES
+from metrics import Counter, Gauge, register
+
+logger = logging.getLogger(__name__)
+
+# Admission control configuration (limits are per server process)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+ADMISSION_MAX_PER_CLIENT = int(os.getenv("ADMISSION_MAX_PER_CLIENT", "4"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_MEMORY_BUDGET = int(os.getenv("ADMISSION_MEMORY_BUDGET", str(256 * 1024 * 1024)))
+# Header identifying the client (e.g. x-forwarded-for behind a proxy); the peer address otherwise
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "").lower()
+
+ADMISSION_REQUESTS = register(Counter(
+    "admission_requests_total", "Requests by admission outcome.", ("outcome",)))
+ADMISSION_WAIT_SECONDS = register(Counter(
+    "admission_wait_seconds_total", "Time admitted requests spent queued."))
+
+
+class Rejected(Exception):
+    """The request cannot be admitted; answer with status and Retry-After."""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the requests being processed by count, per client and by the
+    upload bytes they may buffer. Requests that cannot start right away wait
+    in a bounded FIFO queue for up to queue_timeout seconds. A client already
+    at its limit is rejected with 429; a full queue or a timed-out wait is
+    rejected with 503. Retry-After is estimated from recent request durations.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_per_client: int = ADMISSION_MAX_PER_CLIENT,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        memory_budget: int = ADMISSION_MEMORY_BUDGET
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_per_client = max_per_client
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.memory_budget = memory_budget
+        self.in_flight = 0
+        self.reserved_bytes = 0
+        self._clients: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        # Moving average of how long admitted requests run
+        self._average_seconds = 1.0
+
+    def reservation(self, content_length: Optional[int]) -> int:
+        """Bytes to reserve for a request: its body size, or one full upload when unknown."""
+        size = content_length if content_length is not None else MAX_UPLOAD_BYTES
+        # A single request larger than the budget may still run, alone
+        return min(size, self.memory_budget)
+
+    def _fits(self, size: int) -> bool:
+        return self.in_flight < self.max_in_flight and self.reserved_bytes + size <= self.memory_budget
+
+    def retry_after(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self._average_seconds * backlog / max(1, self.max_in_flight)))
+
+    async def acquire(self, client: str, size: int):
+        """Wait for a slot, or raise Rejected."""
+        if self._clients.get(client, 0) >= self.max_per_client:
+            ADMISSION_REQUESTS.inc(outcome="client_limit")
+            raise Rejected(429, "Too many concurrent requests from this client", self.retry_after())
+
+        if not self._waiters and self._fits(size):
+            self._admit(client, size)
+            ADMISSION_REQUESTS.inc(outcome="admitted")
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            ADMISSION_REQUESTS.inc(outcome="queue_full")
+            raise Rejected(503, "Server is busy, please retry later", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (size, waiter)
+        self._waiters.append(entry)
+        # Waiting requests count against the client's limit too
+        self._clients[client] = self._clients.get(client, 0) + 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the wait ended: give the slot back
+                self._release_slot(size)
+            else:
+                waiter.cancel()
+                self._waiters.remove(entry)
+            self._leave(client)
+            self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REQUESTS.inc(outcome="timeout")
+                raise Rejected(503, "Server is busy, please retry later", self.retry_after())
+            raise
+        ADMISSION_WAIT_SECONDS.inc(time.monotonic() - started)
+        ADMISSION_REQUESTS.inc(outcome="admitted")
+
+    def release(self, client: str, size: int, seconds: float):
+        self._average_seconds = 0.8 * self._average_seconds + 0.2 * seconds
+        self._release_slot(size)
+        self._leave(client)
+        self._wake()
+
+    def _admit(self, client: str, size: int):
+        self.in_flight += 1
+        self.reserved_bytes += size
+        self._clients[client] = self._clients.get(client, 0) + 1
+
+    def _release_slot(self, size: int):
+        self.in_flight -= 1
+        self.reserved_bytes -= size
+
+    def _leave(self, client: str):
+        remaining = self._clients.get(client, 0) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    def _wake(self):
+        """Admit queued requests in arrival order while the one at the head fits."""
+        while self._waiters and self._fits(self._waiters[0][0]):
+            size, waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            # The client was already counted when it started waiting
+            self.in_flight += 1
+            self.reserved_bytes += size
+            waiter.set_result(True)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "clients": len(self._clients),
+            "reserved_bytes": self.reserved_bytes,
+            "max_in_flight": self.max_in_flight,
+            "max_per_client": self.max_per_client,
+            "queue_size": self.queue_size,
+            "memory_budget": self.memory_budget
+        }
+
+
+def client_key(scope: dict, header: str = ADMISSION_CLIENT_HEADER) -> str:
+    if header:
+        for name, value in scope.get("headers") or []:
+            if name == header.encode("latin-1"):
+                # The first address of a forwarded-for chain is the original client
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def content_length(scope: dict) -> Optional[int]:
+    for name, value in scope.get("headers") or []:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting POST requests (uploads and model calls) through
+    an AdmissionController before their body is read. Requests hold their slot
+    until the response, including a streamed one, has been sent. WebSocket
+    sessions (live transcription) are admitted before the handshake completes
+    and hold their slot until they end.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controlled = scope["type"] == "websocket" or (scope["type"] == "http" and scope["method"] == "POST")
+        if not controlled or not ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_key(scope)
+        # A live session may buffer up to one full upload, like a request without Content-Length
+        size = self.controller.reservation(content_length(scope) if scope["type"] == "http" else None)
+        try:
+            await self.controller.acquire(client, size)
+        except Rejected as e:
+            logger.warning(f"Rejected {scope['path']} from {client}: {e.reason} ({e.status})")
+            if scope["type"] == "websocket":
+                await reject_websocket(receive, send, e)
+            else:
+                await reject(send, e)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(client, size, time.monotonic() - started)
+
+
+async def reject(send, rejection: Rejected):
+    body = json.dumps({"detail": rejection.reason}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": rejection.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejection.retry_after).encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def reject_websocket(receive, send, rejection: Rejected):
+    """
+    Complete the handshake and close right away with 1013 (try again later):
+    a handshake refused outright only shows the browser a failed connection.
+    """
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    await send({"type": "websocket.accept"})
+    await send({
+        "type": "websocket.close",
+        "code": 1013,
+        "reason": f"{rejection.reason} (retry after {rejection.retry_after}s)"
+    })
+
+
+# Room for multipart boundaries and the other form fields around an upload
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BodyLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies over a per-path byte limit with
+    413 before the body is read: from Content-Length when the client sent one,
+    otherwise as soon as the streamed body crosses the limit (the rest of the
+    body is then not read and the app's response is replaced by the 413).
+    """
+
+    def __init__(self, app, default: int, limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.default = default
+        self.limits = limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope["path"], self.default) + MULTIPART_OVERHEAD
+        declared = content_length(scope)
+        if declared is not None and declared > limit:
+            await too_large(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        responded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message):
+            nonlocal responded
+            if exceeded:
+                # Whatever the app makes of the cut-off body, the client gets a 413
+                if message["type"] == "http.response.start" and not responded:
+                    responded = True
+                    await too_large(send, limit)
+                return
+            if message["type"] == "http.response.start":
+                responded = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not responded:
+            await too_large(send, limit)
+
+
+async def too_large(send, limit: int):
+    megabytes = (limit - MULTIPART_OVERHEAD) // (1024 * 1024)
+    body = json.dumps({"detail": f"Audio faylın həcmi {megabytes}MB-dan çox ola bilməz"}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close")
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_admission_controller() -> AdmissionController:
+    controller = AdmissionController()
+    register(Gauge("admission_in_flight", "Requests being processed.", lambda: controller.in_flight))
+    register(Gauge("admission_waiting", "Requests waiting for admission.", lambda: len(controller._waiters)))
+    register(Gauge("admission_reserved_bytes", "Upload bytes reserved by admitted requests.",
+                   lambda: controller.reserved_bytes))
+    return controller
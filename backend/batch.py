@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from ingest import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE, UploadTooLarge
+from scratch import ScratchFile, ScratchSpace
+
+logger = logging.getLogger(__name__)
+
+# Batch transcription configuration
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(500 * 1024 * 1024)))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_DECODE_CONCURRENCY = int(os.getenv("BATCH_DECODE_CONCURRENCY", str(os.cpu_count() or 4)))
+
+_ZIP_MAGIC = b"PK\x03\x04"
+
+
+class BatchError(Exception):
+    pass
+
+
+class TooManyFiles(BatchError):
+    pass
+
+
+class BatchTooLarge(BatchError):
+    pass
+
+
+@dataclass
+class BatchItem:
+    index: int
+    filename: str
+    file: ScratchFile
+
+
+def is_zip(filename: Optional[str], data: bytes) -> bool:
+    return data[:4] == _ZIP_MAGIC or (filename or "").lower().endswith(".zip")
+
+
+def _file_header(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(len(_ZIP_MAGIC))
+
+
+def _copy_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, path: str, max_bytes: int):
+    written = 0
+    with archive.open(info) as member, open(path, "wb") as out:
+        while True:
+            chunk = member.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLarge(f"{info.filename} exceeds {max_bytes} bytes")
+            out.write(chunk)
+
+
+async def extract_zip(path: str, space: ScratchSpace, max_file_bytes: int, max_total_bytes: int) -> List[tuple]:
+    """
+    (name, ScratchFile) for every file in a zip archive, skipping directories
+    and hidden or macOS metadata entries. Sizes are checked against the
+    declared sizes before anything is inflated, and again while copying.
+    """
+    members = []
+    total = 0
+    try:
+        with await asyncio.to_thread(zipfile.ZipFile, path) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                base = os.path.basename(name)
+                if info.is_dir() or not base or base.startswith(".") or name.startswith("__MACOSX/"):
+                    continue
+                if info.file_size > max_file_bytes:
+                    raise UploadTooLarge(f"{name} exceeds {max_file_bytes} bytes")
+                total += info.file_size
+                if total > max_total_bytes:
+                    raise BatchTooLarge(f"Archive exceeds {max_total_bytes} bytes uncompressed")
+                member = space.create(info.file_size, os.path.splitext(base)[1])
+                members.append((name, member))
+                await asyncio.to_thread(_copy_member, archive, info, member.path, info.file_size)
+    except BaseException:
+        for _, member in members:
+            member.close()
+        raise
+    return members
+
+
+async def read_batch(
+    files,
+    space: ScratchSpace,
+    max_files: int = BATCH_MAX_FILES,
+    max_file_bytes: int = MAX_UPLOAD_BYTES,
+    max_total_bytes: int = BATCH_MAX_BYTES
+) -> List[BatchItem]:
+    """
+    Spool the uploads of a batch request to scratch space, expanding zip
+    archives, so a batch is never held in memory. The caller owns the items'
+    files (run_batch closes them as it goes).
+    Raises UploadTooLarge for an oversized file, BatchTooLarge when the batch
+    exceeds max_total_bytes, TooManyFiles past max_files and ScratchFull when
+    the scratch quota is exhausted.
+    """
+    entries = []
+    total = 0
+    try:
+        for upload in files:
+            try:
+                spooled = await space.write_upload(
+                    upload, max_total_bytes - total, suffix=os.path.splitext(upload.filename or "")[1]
+                )
+            except UploadTooLarge:
+                raise BatchTooLarge(f"Batch exceeds {max_total_bytes} bytes")
+            if is_zip(upload.filename, await asyncio.to_thread(_file_header, spooled.path)):
+                with spooled:
+                    members = await extract_zip(spooled.path, space, max_file_bytes, max_total_bytes - total)
+                entries.extend(members)
+                total += sum(member.reserved for _, member in members)
+            else:
+                entries.append((upload.filename, spooled))
+                if spooled.reserved > max_file_bytes:
+                    raise UploadTooLarge(f"{upload.filename} exceeds {max_file_bytes} bytes")
+                total += spooled.reserved
+            if total > max_total_bytes:
+                raise BatchTooLarge(f"Batch exceeds {max_total_bytes} bytes")
+            if len(entries) > max_files:
+                raise TooManyFiles(f"Batch exceeds {max_files} files")
+    except BaseException:
+        for _, spooled in entries:
+            spooled.close()
+        raise
+    return [BatchItem(index, name, spooled) for index, (name, spooled) in enumerate(entries)]
+
+
+def close_items(items: List[BatchItem]):
+    """Release the scratch files of a batch; closing is idempotent."""
+    for item in items:
+        item.file.close()
+
+
+async def run_batch(
+    items: List[BatchItem],
+    decode: Callable[[BatchItem], Awaitable[Any]],
+    transcribe: Callable[[BatchItem, Any], Awaitable[dict]],
+    concurrency: int = None,
+    decode_concurrency: int = None
+) -> AsyncIterator[dict]:
+    """
+    Process batch items concurrently and yield one result per item as soon as it finishes.
+    At most `concurrency` files are in progress, of which at most
+    `decode_concurrency` are being decoded (each decode is a CPU-bound ffmpeg
+    process). Upstream calls are additionally bounded by the shared per-model
+    limiter. A failing file produces an error result and does not stop the batch.
+    """
+    file_slots = asyncio.Semaphore(concurrency or BATCH_CONCURRENCY)
+    decode_slots = asyncio.Semaphore(decode_concurrency or BATCH_DECODE_CONCURRENCY)
+
+    async def process(item: BatchItem) -> dict:
+        result = {"index": item.index, "filename": item.filename}
+        async with file_slots:
+            started = time.perf_counter()
+            try:
+                async with decode_slots:
+                    audio = await decode(item)
+                # The encoded audio is all that is needed from here on
+                item.file.close()
+                decoded = time.perf_counter()
+                result.update(await transcribe(item, audio))
+                result["success"] = True
+                result["timings"] = {
+                    "decode_seconds": round(decoded - started, 3),
+                    "transcribe_seconds": round(time.perf_counter() - decoded, 3)
+                }
+            except Exception as e:
+                item.file.close()
+                logger.warning(f"Batch item {item.index} ({item.filename}) failed: {str(e)}")
+                result["success"] = False
+                result["error"] = getattr(e, "detail", None) or str(e)
+            result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    tasks = [asyncio.create_task(process(item)) for item in items]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The client went away or the stream was closed early
+        for task in tasks:
+            task.cancel()
+        close_items(items)
@@ -0,0 +1,88 @@
+"""
+Batch transcription throughput in files per minute.
+
+Sends a folder's worth of short synthetic voice notes to the API twice: as one
+/transcribe/ request per file (one after another, like the current client
+scripts) and as a single /transcribe-batch/ request (optionally zipped). Runs
+against a fake upstream with fixed per-call latency. Requires ffmpeg on PATH.
+
+Usage (from the backend directory):
+    python benchmarks/bench_batch.py --files 40 --seconds 20 --latency 0.5 --zip
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from common import FakeUpstream, make_speech_like, wav_bytes  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def make_notes(count: int, seconds: float):
+    return [(f"note_{i:03d}.wav", wav_bytes(make_speech_like(seconds, seed=i), 16000)) for i in range(count)]
+
+
+def zip_notes(notes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in notes:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+async def run(count: int, seconds: float, latency: float, use_zip: bool):
+    notes = make_notes(count, seconds)
+    print(f"input: {count} files x {seconds:.0f}s, {sum(len(data) for _, data in notes)} bytes\n")
+    main.result_cache.enabled = False
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        main.client = FakeUpstream(latency)
+        started = time.perf_counter()
+        for name, data in notes:
+            response = await http.post("/transcribe/", files={"file": (name, data, "audio/wav")})
+            response.raise_for_status()
+        sequential = time.perf_counter() - started
+
+        main.client = fake = FakeUpstream(latency)
+        if use_zip:
+            files = [("files", ("notes.zip", zip_notes(notes), "application/zip"))]
+        else:
+            files = [("files", (name, data, "audio/wav")) for name, data in notes]
+        started = time.perf_counter()
+        summary = None
+        async with http.stream("POST", "/transcribe-batch/", files=files) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                record = json.loads(line)
+                if record["type"] == "summary":
+                    summary = record
+        batch = time.perf_counter() - started
+
+    print(f"{'mode':<22}{'wall':>9}{'files/min':>11}")
+    print(f"{'per-file requests':<22}{sequential:>8.2f}s{count / sequential * 60:>11.1f}")
+    print(f"{'batch' + (' (zip)' if use_zip else ''):<22}{batch:>8.2f}s{count / batch * 60:>11.1f}")
+    print(f"\nbatch failed files:   {summary['failed']}")
+    print(f"max upstream overlap: {fake.max_in_flight} calls in flight")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=20.0, help="length of each voice note")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake upstream seconds per call")
+    parser.add_argument("--zip", action="store_true", help="send the batch as one zip archive")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.seconds, args.latency, args.zip))
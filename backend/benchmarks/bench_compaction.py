@@ -0,0 +1,67 @@
+"""
+Upload size and server-side preparation time with client-side compaction.
+
+Compares what a browser would upload without compaction (the stereo 48 kHz
+WAV the file picker hands over, or a 128 kbps recording) with the mono
+16 kHz Opus the web client produces when compaction is enabled (made here
+with ffmpeg, which writes the same Ogg Opus stream). For each it reports
+the bytes uploaded, the upload time at the given client bandwidth and the
+time the server needs to prepare the upstream payload; compacted uploads
+take the fast path and are not decoded or re-encoded.
+Requires ffmpeg on PATH (with libopus).
+
+Usage (from the backend directory):
+    python benchmarks/bench_compaction.py --seconds 120 --bandwidth 125000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SILENCE_TRIM", "false")
+
+import main  # noqa: E402
+from common import make_wav  # noqa: E402
+from ingest import FFMPEG_BINARY, BytesReader  # noqa: E402
+
+
+def transcode(wav: bytes, *args: str) -> bytes:
+    return subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", *args, "pipe:1"],
+        input=wav, capture_output=True, check=True
+    ).stdout
+
+
+async def prepare_seconds(data: bytes, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        await main.prepare_upload(BytesReader(data), "bench", trim_silence=False, max_bytes=len(data))
+    return (time.perf_counter() - started) / runs
+
+
+async def run(args):
+    wav = make_wav(args.seconds, rate=48000, channels=2, noise=0.05)
+    uploads = [
+        ("stereo 48 kHz wav", wav),
+        ("opus 128 kbps recording", transcode(wav, "-c:a", "libopus", "-b:a", "128k", "-f", "ogg")),
+        ("compacted 16 kHz opus", transcode(wav, "-ac", "1", "-ar", "16000", "-c:a", "libopus",
+                                            "-b:a", "24k", "-f", "ogg")),
+    ]
+    print(f"{args.seconds:.0f}s recording, client upload bandwidth {args.bandwidth / 1000:.0f} kB/s\n")
+    print(f"{'upload':<26}{'bytes':>11}{'saved':>8}{'upload':>9}{'prepare':>10}")
+    for label, data in uploads:
+        saved = 1 - len(data) / len(wav)
+        prepare = await prepare_seconds(data, args.runs)
+        print(f"{label:<26}{len(data):>11}{saved:>8.0%}{len(data) / args.bandwidth:>8.1f}s{prepare * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--bandwidth", type=float, default=125000, help="client upload bytes per second")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Transcript correction wall time versus transcript length.
+
+Runs correct_transcript() on synthetic transcripts of increasing length
+against a fake upstream whose completion time grows with the number of output
+tokens. Three modes are compared:
+  legacy     one call capped at 2000 output tokens (the previous behaviour)
+  single     one call with max_tokens sized from the input
+  segmented  token-budgeted segments corrected concurrently
+"kept" is the share of the input that came back; below 100% the output was
+truncated by max_tokens.
+
+Usage (from the backend directory):
+    python benchmarks/bench_correction.py --lengths 2000 10000 40000 --token-latency 0.01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import correction  # noqa: E402
+import main  # noqa: E402
+from common import FakeUpstream  # noqa: E402
+
+# correct_transcript() logs every transcript in full
+logging.getLogger().setLevel(logging.WARNING)
+
+WORDS = (
+    "salam dünya bu gün hava çox gözəldir biz parkda gəzirik və söhbət edirik "
+    "sabah iclas olacaq layihə haqqında danışacağıq müəllim tələbələrə dərs keçir"
+).split()
+
+
+def make_transcript(chars: int, seed: int = 0) -> str:
+    """Sentences of random words, grouped into paragraphs, about chars long."""
+    rng = random.Random(seed)
+    paragraphs, length = [], 0
+    while length < chars:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            sentence = " ".join(rng.choices(WORDS, k=rng.randint(6, 18)))
+            sentences.append(sentence.capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+async def run(lengths, latency: float, token_latency: float):
+    print(f"{'chars':>8}{'mode':>11}{'calls':>7}{'wall':>9}{'kept':>7}")
+    main.result_cache.enabled = False
+    for chars in lengths:
+        transcript = make_transcript(chars)
+        for mode in ("legacy", "single", "segmented"):
+            fake = FakeUpstream(latency, token_latency=token_latency)
+            calls = 0
+            complete = fake.chat.completions.create
+
+            async def counting(**kwargs):
+                nonlocal calls
+                calls += 1
+                return await complete(**kwargs)
+
+            fake.chat.completions.create = counting
+            main.client = fake
+            correction.MAX_OUTPUT_TOKENS = 2000 if mode == "legacy" else 16384
+            correction.CORRECTION_MODE = "segmented" if mode == "segmented" else "single"
+
+            started = time.perf_counter()
+            corrected = await main.correct_transcript(transcript, main.Language.AZERBAIJANI)
+            wall = time.perf_counter() - started
+            kept = min(len(corrected) / len(transcript), 1.0)
+            print(f"{len(transcript):>8}{mode:>11}{calls:>7}{wall:>8.2f}s{kept:>6.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[2000, 10000, 40000])
+    parser.add_argument("--latency", type=float, default=0.3, help="fixed seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds per output token")
+    args = parser.parse_args()
+    asyncio.run(run(args.lengths, args.latency, args.token_latency))
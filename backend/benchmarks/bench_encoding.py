@@ -0,0 +1,73 @@
+"""
+Payload size and /transcribe/ latency for each upstream audio format.
+
+Uploads a synthetic stereo 48 kHz recording and compares native-rate WAV
+(the old behaviour) with 16 kHz WAV, FLAC and Opus. The fake upstream charges
+upload time at the given bandwidth, so smaller payloads finish sooner.
+Requires ffmpeg on PATH (with libopus for the opus row).
+
+Usage (from the backend directory):
+    python benchmarks/bench_encoding.py --seconds 120 --bandwidth 2000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+import encoding  # noqa: E402
+import main  # noqa: E402
+from common import FakeUpstream, make_wav  # noqa: E402
+
+CONFIGURATIONS = [
+    ("wav @ native rate", "wav", 48000),
+    ("wav @ 16 kHz", "wav", 16000),
+    ("flac @ 16 kHz", "flac", 16000),
+    ("opus @ 16 kHz", "opus", 16000),
+]
+
+
+async def run(seconds: float, runs: int, latency: float, bandwidth: float):
+    audio = make_wav(seconds, rate=48000, channels=2, noise=0.05)
+    print(f"input: {len(audio)} bytes, {seconds:.0f}s stereo 48 kHz WAV, "
+          f"upload bandwidth {bandwidth / 1e6:.1f} MB/s\n")
+    print(f"{'format':<20}{'payload bytes':>15}{'ratio':>8}{'latency':>10}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        baseline = None
+        for label, audio_format, sample_rate in CONFIGURATIONS:
+            encoding.UPSTREAM_AUDIO_FORMAT = audio_format
+            encoding.UPSTREAM_SAMPLE_RATE = sample_rate
+            fake = FakeUpstream(latency, upload_bandwidth=bandwidth)
+            main.client = fake
+            main.result_cache.enabled = False
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                response = await http.post(
+                    "/transcribe/",
+                    files={"file": ("bench.wav", audio, "audio/wav")},
+                    data={"language": "az"}
+                )
+                response.raise_for_status()
+            mean_latency = (time.perf_counter() - start) / runs
+
+            payload = fake.uploaded_bytes / runs
+            baseline = baseline or payload
+            print(f"{label:<20}{payload:>15.0f}{baseline / payload:>7.1f}x{mean_latency:>9.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--bandwidth", type=float, default=2_000_000, help="upload bytes per second")
+    args = parser.parse_args()
+    asyncio.run(run(args.seconds, args.runs, args.latency, args.bandwidth))
@@ -0,0 +1,40 @@
+"""
+Per-stage wall time and peak RSS of the in-memory ingest pipeline.
+
+Feeds a synthetic stereo 48 kHz WAV through ingest_upload and prints the
+stage breakdown reported in IngestStats. Requires ffmpeg on PATH.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ingest.py --seconds 240 --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import MemoryUpload, make_wav  # noqa: E402
+from ingest import ingest_upload  # noqa: E402
+
+
+async def run(seconds: float, runs: int):
+    data = make_wav(seconds, rate=48000, channels=2)
+    print(f"input: {len(data)} bytes, {seconds:.0f}s stereo 48 kHz WAV")
+
+    for i in range(runs):
+        start = time.perf_counter()
+        payload = await ingest_upload(MemoryUpload(data), f"bench-{i}", max_duration=seconds + 1)
+        wall = time.perf_counter() - start
+        print(f"run {i + 1}: {wall:.3f}s total, {payload.size} bytes out")
+        print(json.dumps(payload.stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=240)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.seconds, args.runs))
@@ -0,0 +1,126 @@
+"""
+Per-request logging overhead on the request path.
+
+Replays the log calls of one /transcribe/ request - the previous set (about
+20 lines, full Whisper response and full raw and corrected transcripts, all
+written synchronously) and the current one (three summary lines plus
+truncated transcript payloads) - and measures the time spent in the calling
+thread, which in the server is the event loop. Output goes to a real file,
+like stdout redirected to a log collector; --write-latency adds a blocking
+delay to every write, as when the collector or a container log driver falls
+behind. For the queued handlers the time the background thread needs to drain
+the queue is reported separately.
+
+Usage (from the backend directory):
+    python benchmarks/bench_logging.py --requests 2000 --chars 20000
+    python benchmarks/bench_logging.py --requests 500 --write-latency 0.0002
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logsetup  # noqa: E402
+from logsetup import payload, setup_logging  # noqa: E402
+
+logger = logging.getLogger("bench")
+LANGUAGES = ["az", "en", "tr", "ru"]
+CONFIG = {"name": "Azərbaycan dili", "whisper_code": "az", "prompt": "Bu Azərbaycan dilində nitqdir."}
+
+
+def legacy_request(transcript: str, corrected: str):
+    """The log calls /transcribe/ used to make."""
+    logger.info("=== Transcription Request Details ===")
+    logger.info(f"Raw language parameter from form: '{'az'}'")
+    logger.info(f"Parameter type: {type('az')}")
+    logger.info(f"Default language: '{'az'}'")
+    logger.info(f"Available languages: {LANGUAGES}")
+    logger.info(f"Cleaned language parameter: '{'az'}'")
+    logger.info(f"Successfully validated language: '{'az'}'")
+    logger.info(f"Language details: {CONFIG}")
+    logger.info("=== Whisper API Call Preparation ===")
+    logger.info(f"Selected language: '{'az'}'")
+    logger.info(f"Whisper language code: '{CONFIG['whisper_code']}'")
+    logger.info(f"Using prompt: '{CONFIG['prompt']}'")
+    logger.info(f"=== Raw Whisper Transcript (Language: {'az'}) ===")
+    logger.info(transcript)
+    logger.info("=== Raw Transcript ===")
+    logger.info(f"Length: {len(transcript)} characters")
+    logger.info(f"First 100 chars: {transcript[:100]}...")
+    logger.info("Raw transcript: " + transcript)
+    logger.info("Corrected transcript: " + corrected)
+    logger.info("=== Preparing Response ===")
+    logger.info(f"Final language: '{'az'}'")
+    logger.info(f"Transcript length: {len(corrected)} characters")
+
+
+def current_request(transcript: str, corrected: str):
+    """The log calls /transcribe/ makes now."""
+    logger.info("Transcription request: file=%s language=%r", "note.webm", "az")
+    logger.info("Raw Whisper transcript (%s): %s", "az", payload(transcript))
+    logger.info("Raw transcript: %s", payload(transcript))
+    logger.info("Corrected transcript: %s", payload(corrected))
+    logger.info(
+        "Transcription done: language=%s raw=%d chars corrected=%d chars",
+        "az", len(transcript), len(corrected)
+    )
+
+
+class SlowStream:
+    """A file whose writes block for a fixed time, releasing the GIL like real I/O."""
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text: str):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def measure(name: str, emit, use_queue: bool, fmt: str, requests: int, transcript: str, corrected: str,
+            write_latency: float):
+    with tempfile.TemporaryFile("w", encoding="utf-8") as sink:
+        state = setup_logging(level="INFO", fmt=fmt, use_queue=use_queue,
+                              stream=SlowStream(sink, write_latency), queue_size=requests * 25)
+        started = time.perf_counter()
+        for index in range(requests):
+            logsetup.bind_request_id(f"req{index:08d}")
+            emit(transcript, corrected)
+        caller = time.perf_counter() - started
+        state.stop()
+        total = time.perf_counter() - started
+        sink.flush()
+        written = sink.tell()
+
+    drain = f"{(total - caller) * 1000:>9.0f}ms" if use_queue else f"{'-':>11}"
+    print(f"{name:<32}{caller / requests * 1e6:>10.1f}us{drain}{written / requests / 1024:>10.1f}KiB")
+
+
+def run(requests: int, chars: int, write_latency: float):
+    transcript = ("salam dünya bu gün hava çox gözəldir " * (chars // 37 + 1))[:chars]
+    corrected = transcript.capitalize()
+    print(f"{requests} requests, {chars}-char transcripts, "
+          f"LOG_PAYLOAD_CHARS={logsetup.LOG_PAYLOAD_CHARS}, write latency {write_latency * 1000:.2f}ms\n")
+    print(f"{'variant':<32}{'per request':>12}{'drain':>11}{'written':>13}")
+    measure("legacy, sync text", legacy_request, False, "text", requests, transcript, corrected, write_latency)
+    measure("current, sync text", current_request, False, "text", requests, transcript, corrected, write_latency)
+    measure("current, queued text", current_request, True, "text", requests, transcript, corrected, write_latency)
+    measure("current, queued json", current_request, True, "json", requests, transcript, corrected, write_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--chars", type=int, default=20000, help="length of the synthetic transcripts")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="seconds each write blocks")
+    args = parser.parse_args()
+    run(args.requests, args.chars, args.write_latency)
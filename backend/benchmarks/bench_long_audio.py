@@ -0,0 +1,60 @@
+"""
+/transcribe-long/ latency versus chunk concurrency.
+
+Uploads a synthetic recording with speech-like bursts and pauses and runs the
+long-audio path at several concurrency levels against a fake upstream with a
+per-second transcription cost. Wall time should fall roughly in proportion to
+concurrency until the Whisper limiter becomes the bottleneck.
+Requires ffmpeg on PATH.
+
+Usage (from the backend directory):
+    python benchmarks/bench_long_audio.py --minutes 60 --levels 1 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+import chunking  # noqa: E402
+import main  # noqa: E402
+from common import FakeUpstream, make_speech_like, wav_bytes  # noqa: E402
+
+
+async def run(minutes: float, levels, latency: float):
+    audio = wav_bytes(make_speech_like(minutes * 60), 16000)
+    print(f"input: {minutes:.0f} min, {len(audio)} bytes\n")
+    print(f"{'concurrency':>12}{'chunks':>8}{'wall':>10}{'transcribe':>12}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        for level in levels:
+            chunking.CHUNK_CONCURRENCY = level
+            main.client = FakeUpstream(latency)
+            main.result_cache.enabled = False
+
+            start = time.perf_counter()
+            response = await http.post(
+                "/transcribe-long/",
+                files={"file": ("long.wav", audio, "audio/wav")},
+                data={"language": "az"}
+            )
+            response.raise_for_status()
+            wall = time.perf_counter() - start
+            data = response.json()
+            print(f"{level:>12}{len(data['chunks']):>8}{wall:>9.2f}s"
+                  f"{data['timings']['transcribe_seconds']:>11.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=1.0, help="fake upstream seconds per call")
+    args = parser.parse_args()
+    asyncio.run(run(args.minutes, args.levels, args.latency))
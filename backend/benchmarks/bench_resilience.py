@@ -0,0 +1,100 @@
+"""
+Success rate and tail latency of /transcribe/ against a flaky upstream.
+
+A fake upstream fails a share of calls with 500 errors and makes another
+share several times slower. The same load is run with retries disabled, with
+budgeted retries, and with retries plus hedging of short calls, then during a
+full outage to show the circuit breaker failing requests fast. Transcripts
+whose correction failed (and fell back to the raw text) are counted as
+uncorrected.
+
+Usage (from the backend directory):
+    python benchmarks/bench_resilience.py --requests 200 --concurrency 8 --error-rate 0.05 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+# All requests come from one client
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+# Failed corrections are counted as uncorrected transcripts rather than failed requests
+os.environ.setdefault("CORRECTION_FALLBACK", "true")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from common import FakeUpstream, make_speech_like, wav_bytes  # noqa: E402
+from resilience import ResilientCaller  # noqa: E402
+
+logging.getLogger().setLevel(logging.CRITICAL)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else float("nan")
+
+
+async def run_config(name, caller, fake, audio, requests, concurrency):
+    main.client = fake
+    main.resilience = caller
+    latencies, statuses, uncorrected = [], {}, 0
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench",
+                                 timeout=None) as http:
+        async def worker():
+            nonlocal uncorrected
+            for _ in counter:
+                started = time.perf_counter()
+                response = await http.post("/transcribe/", files={"file": ("note.wav", audio, "audio/wav")})
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200 and response.json()["transcript"] == "salam dünya":
+                    uncorrected += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    ok = statuses.get(200, 0)
+    failed = " ".join(f"{status}x{count}" for status, count in sorted(statuses.items()) if status != 200) or "-"
+    print(f"{name:<24}{ok / requests:>8.1%}{uncorrected:>7}{percentile(latencies, 50):>8.2f}s"
+          f"{percentile(latencies, 99):>8.2f}s{fake.calls:>7}  {failed}")
+
+
+async def run(args):
+    main.result_cache.enabled = False
+    audio = wav_bytes(make_speech_like(args.seconds), 16000)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency}s, "
+          f"{args.error_rate:.0%} errors, {args.slow_rate:.0%} calls {args.slow_factor:.0f}x slower\n")
+    print(f"{'config':<24}{'success':>8}{'uncorr':>7}{'p50':>9}{'p99':>9}{'calls':>7}  failures")
+
+    def flaky():
+        return FakeUpstream(args.latency, error_rate=args.error_rate, slow_rate=args.slow_rate,
+                            slow_factor=args.slow_factor)
+
+    def caller(**kwargs):
+        return ResilientCaller(base_delay=args.latency, max_delay=args.latency * 8, **kwargs)
+
+    await run_config("no retries", caller(max_attempts=1), flaky(), audio, args.requests, args.concurrency)
+    await run_config("retries", caller(), flaky(), audio, args.requests, args.concurrency)
+    await run_config("retries + hedging", caller(hedging=True, hedge_delay=args.hedge_delay),
+                     flaky(), audio, args.requests, args.concurrency)
+    await run_config("outage, breaker", caller(), FakeUpstream(args.latency, error_rate=1.0),
+                     audio, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of the test recording")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake upstream seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-factor", type=float, default=10.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.0, help="seconds before hedging (0: adaptive)")
+    asyncio.run(run(parser.parse_args()))
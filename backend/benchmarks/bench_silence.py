@@ -0,0 +1,60 @@
+"""
+Speed of the silence detector and how much audio compaction removes.
+
+Runs frame-energy detection and compact_silence over synthetic recordings
+with speech-like bursts, long pauses and silent edges, and reports the
+processing time per hour of audio and the resulting Whisper speed-up.
+
+Usage (from the backend directory):
+    python benchmarks/bench_silence.py --minutes 60 --runs 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import make_speech_like  # noqa: E402
+from vad import compact_silence, frame_energy_db, silence_mask  # noqa: E402
+
+
+def run(minutes: float, runs: int, rate: int):
+    rng = np.random.default_rng(1)
+    edge = np.zeros(rate * 5, dtype="<i2")
+    # Speech with occasional long dead-air gaps, as in live recordings
+    parts = [edge]
+    for _ in range(int(minutes)):
+        parts.append(make_speech_like(50, rate, seed=int(rng.integers(1 << 31))))
+        parts.append((rng.normal(0, 20, rate * 10)).astype("<i2"))
+    parts.append(edge)
+    samples = np.concatenate(parts)
+    hours = samples.size / rate / 3600
+    print(f"input: {samples.size / rate / 60:.1f} min at {rate} Hz\n")
+
+    detect, compact = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        silence_mask(frame_energy_db(samples, rate))
+        detect.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        compacted = compact_silence(samples, rate)
+        compact.append(time.perf_counter() - start)
+
+    removed = (samples.size - compacted.size) / rate
+    print(f"detection:          {min(detect) / hours:.3f}s per audio-hour")
+    print(f"detect + compact:   {min(compact) / hours:.3f}s per audio-hour")
+    print(f"removed:            {removed:.1f}s of {samples.size / rate:.1f}s")
+    print(f"whisper speed-up:   {samples.size / compacted.size:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--rate", type=int, default=16000)
+    args = parser.parse_args()
+    run(args.minutes, args.runs, args.rate)
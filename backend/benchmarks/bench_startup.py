@@ -0,0 +1,110 @@
+"""
+Import time and cold start of the API server.
+
+Measures how long `import main` takes in a fresh interpreter, then starts
+uvicorn with N workers against the mock upstream and reports how long it
+takes until /health answers and how long the first /transcribe/ request of a
+cold worker takes, sent right away or --settle seconds later (e.g. after
+the pre-warmed upstream connections are open). Run it from another
+checkout with --backend-dir (and --no-factory for trees without create_app)
+to compare two versions.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py --workers 4
+    python benchmarks/bench_startup.py --backend-dir /tmp/old/backend --no-factory
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from common import make_speech_like, wav_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def import_seconds(backend_dir: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], cwd=backend_dir, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_ready(base_url: str, timeout: float = 60) -> float:
+    started = time.perf_counter()
+    deadline = started + timeout
+    with httpx.Client(base_url=base_url) as http:
+        while time.perf_counter() < deadline:
+            try:
+                if http.get("/health").status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def cold_start(args, env: dict, audio: bytes):
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "mock_openai.py"), "--port", str(args.mock_port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    target = ["main:app"] if args.no_factory else ["main:create_app", "--factory"]
+    started = time.perf_counter()
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *target, "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=args.backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        wait_ready(base_url)
+        ready = time.perf_counter() - started
+        time.sleep(args.settle)
+        with httpx.Client(base_url=base_url, timeout=None) as http:
+            first = time.perf_counter()
+            response = http.post("/transcribe/", files={"file": ("note.wav", audio, "audio/wav")})
+            first = time.perf_counter() - first
+        return ready, first, response.status_code
+    finally:
+        api.terminate()
+        mock.terminate()
+        api.wait()
+        mock.wait()
+
+
+def run(args):
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "benchmark"),
+        MOCK_UPSTREAM="true",
+        MOCK_UPSTREAM_URL=f"http://127.0.0.1:{args.mock_port}/v1",
+        CACHE_ENABLED="false",
+        LOG_LEVEL="WARNING"
+    )
+    imports = [import_seconds(args.backend_dir, env) for _ in range(args.repeat)]
+    print(f"import main: median {statistics.median(imports):.3f}s, min {min(imports):.3f}s ({args.repeat} runs)")
+
+    audio = wav_bytes(make_speech_like(args.seconds), 44100)
+    for _ in range(args.repeat):
+        ready, first, status = cold_start(args, env, audio)
+        print(f"{args.workers} workers: ready after {ready:.2f}s, first /transcribe/ {first * 1000:.0f}ms ({status})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help="backend directory of the tree to measure")
+    parser.add_argument("--no-factory", action="store_true", help="serve main:app instead of main:create_app")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=0.0, help="seconds between ready and the first request")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of the test recording")
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--mock-port", type=int, default=8021)
+    run(parser.parse_args())
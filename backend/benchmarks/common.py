@@ -0,0 +1,152 @@
+"""Shared helpers for the benchmark scripts."""
+import asyncio
+import io
+import random
+import wave
+from types import SimpleNamespace
+from typing import Optional
+
+import httpx
+import numpy as np
+import openai
+
+
+def make_wav(
+    seconds: float = 2.0,
+    rate: int = 16000,
+    freq: float = 440.0,
+    channels: int = 1,
+    noise: float = 0.0
+) -> bytes:
+    """Generate a 16-bit sine wave (optionally with white noise) as WAV bytes."""
+    t = np.arange(int(seconds * rate)) / rate
+    wave_form = 12000 * np.sin(2 * np.pi * freq * t)
+    if noise:
+        wave_form += np.random.default_rng(0).normal(0, noise * 12000, t.size)
+    samples = np.clip(wave_form, -32768, 32767).astype("<i2")
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class FakeUpstream:
+    """
+    Async stand-in for the OpenAI client that records call overlap.
+    When upload_bandwidth (bytes per second) is set, transcription calls also
+    wait for the time it would take to upload the audio payload. When
+    token_latency (seconds per output token) is set, chat completions echo the
+    text that follows the last "...:" line and blank line of the prompt, cut to
+    max_tokens, and take time proportional to its length like a real generation.
+    A share of calls (error_rate) fails with a 500 error after the latency, and
+    another (slow_rate) takes slow_factor times as long.
+    """
+
+    def __init__(
+        self,
+        latency: float,
+        upload_bandwidth: Optional[float] = None,
+        token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_factor: float = 10.0,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.upload_bandwidth = upload_bandwidth
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.uploaded_bytes = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.api_key = "benchmark"
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    async def _call(self, extra: float = 0.0):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        roll = self.rng.random()
+        duration = self.latency + extra
+        if roll < self.slow_rate:
+            duration *= self.slow_factor
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.in_flight -= 1
+        if self.slow_rate <= roll < self.slow_rate + self.error_rate:
+            self.failures += 1
+            response = httpx.Response(500, request=httpx.Request("POST", "http://fake-upstream"))
+            raise openai.InternalServerError("The server had an error (fake)", response=response, body=None)
+
+    async def _transcribe(self, **kwargs):
+        _, buffer, _ = kwargs["file"]
+        size = buffer.getbuffer().nbytes
+        self.uploaded_bytes += size
+        await self._call(size / self.upload_bandwidth if self.upload_bandwidth else 0.0)
+        return "salam dünya"
+
+    async def _complete(self, **kwargs):
+        if not self.token_latency:
+            await self._call()
+            message = SimpleNamespace(content="Salam dünya.")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        text = kwargs["messages"][-1]["content"].rsplit(":\n\n", 1)[-1]
+        # Roughly four characters per generated token
+        tokens = min(len(text) // 4 + 1, kwargs.get("max_tokens") or len(text))
+        await self._call(tokens * self.token_latency)
+        message = SimpleNamespace(content=text[:tokens * 4])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_speech_like(seconds: float, rate: int = 16000, seed: int = 0) -> np.ndarray:
+    """
+    Synthetic "speech": bursts of modulated noise separated by short pauses,
+    so silence detection and chunking have realistic structure to work with.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * rate)
+    out = np.zeros(total, dtype=np.float32)
+    position = 0
+    while position < total:
+        burst = int(rng.uniform(2, 12) * rate)
+        end = min(position + burst, total)
+        t = np.arange(end - position) / rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)
+        out[position:end] = rng.normal(0, 4000, end - position) * envelope
+        position = end + int(rng.uniform(0.2, 1.5) * rate)
+    return np.clip(out, -32768, 32767).astype("<i2")
+
+
+def wav_bytes(samples: np.ndarray, rate: int) -> bytes:
+    """Wrap mono int16 samples in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class MemoryUpload:
+    """Minimal async file object with the read() interface of UploadFile."""
+
+    def __init__(self, data: bytes, filename: str = "bench.wav"):
+        self.filename = filename
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
@@ -0,0 +1,218 @@
+"""
+End-to-end load test of a running API server.
+
+Drives /transcribe/, /transcribe-live/, /summarize-audio/ and /summarize/ over
+real HTTP at each concurrency level and reports p50/p95/p99 latency,
+throughput, errors and the resident memory of every server process. Point it
+at a server that uses the mock upstream (benchmarks/mock_openai.py) or let it
+start both itself with --spawn. Keep the result cache disabled
+(CACHE_ENABLED=false), or repeated requests are answered from the cache,
+and raise ADMISSION_MAX_PER_CLIENT, since all load comes from one client;
+--spawn does both for you. Requests shed by admission control (429/503) are
+counted as errors.
+
+Usage (from the backend directory):
+    python benchmarks/load_suite.py --spawn --workers 2 --concurrency 1 8 32 --requests 64
+    python benchmarks/load_suite.py --base-url http://127.0.0.1:8000 --server-pid 12345
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from common import make_speech_like, wav_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("transcribe", "transcribe-live", "summarize-audio", "summarize")
+SUMMARY_TEXT = ("Bu gün iclasda yeni layihə haqqında danışdıq. Komanda növbəti mərhələnin planını "
+                "hazırladı və tapşırıqlar bölüşdürüldü. ") * 8
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def process_tree(root: int) -> List[int]:
+    """root and all of its descendants, from /proc (Linux only)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; the fields after it are fixed
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def memory_kb(pid: int) -> Optional[Dict[str, int]]:
+    """Current (VmRSS) and peak (VmHWM) resident memory of a process."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return {"rss_kb": int(fields["VmRSS"].split()[0]), "peak_kb": int(fields["VmHWM"].split()[0])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def server_memory(root: Optional[int]) -> str:
+    if not root or not os.path.isdir("/proc"):
+        return "n/a"
+    parts = []
+    for pid in process_tree(root):
+        usage = memory_kb(pid)
+        if usage:
+            parts.append(f"{pid}:{usage['rss_kb'] // 1024}MB(peak {usage['peak_kb'] // 1024}MB)")
+    return " ".join(parts) or "n/a"
+
+
+def build_request(endpoint: str, audio: bytes, index: int) -> dict:
+    if endpoint == "summarize":
+        # Distinct text per request so identical inputs cannot be coalesced
+        return {"url": "/summarize/", "json": {"text": f"{SUMMARY_TEXT} ({index})", "language": "az"}}
+    return {
+        "url": f"/{endpoint}/",
+        "files": {"file": (f"load_{index}.wav", audio, "audio/wav")},
+        "data": {"language": "az"}
+    }
+
+
+async def run_level(http: httpx.AsyncClient, endpoint: str, audio: bytes, concurrency: int, requests: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for index in counter:
+            request = build_request(endpoint, audio, index)
+            url = request.pop("url")
+            started = time.perf_counter()
+            try:
+                response = await http.post(url, **request)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if status == "200":
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {"latencies": latencies, "errors": errors, "wall": wall}
+
+
+async def wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while time.monotonic() < deadline:
+            try:
+                if (await http.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """Start the mock upstream and the API (with the mock selected) as child processes."""
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "mock_openai.py"),
+         "--port", str(args.mock_port), "--distribution", args.distribution,
+         "--error-rate", str(args.error_rate)],
+        cwd=BACKEND_DIR
+    )
+    env = dict(
+        os.environ,
+        MOCK_UPSTREAM="true",
+        MOCK_UPSTREAM_URL=f"http://127.0.0.1:{args.mock_port}/v1",
+        CACHE_ENABLED="false",
+        # Every request comes from this one client; leave only the global limits in effect
+        ADMISSION_MAX_PER_CLIENT=os.getenv("ADMISSION_MAX_PER_CLIENT", "100000")
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    return [mock, api]
+
+
+async def run(args):
+    processes = spawn(args) if args.spawn else []
+    base_url = f"http://127.0.0.1:{args.port}" if args.spawn else args.base_url
+    server_pid = processes[1].pid if processes else args.server_pid
+    try:
+        await wait_ready(base_url)
+        audio = wav_bytes(make_speech_like(args.seconds), 16000)
+        print(f"server: {base_url}, audio: {args.seconds:.0f}s ({len(audio)} bytes)\n")
+        print(f"{'endpoint':<17}{'conc':>5}{'ok':>6}{'err':>5}{'p50':>8}{'p95':>8}{'p99':>8}{'req/s':>8}  memory")
+
+        results = []
+        limits = httpx.Limits(max_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as http:
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    level = await run_level(http, endpoint, audio, concurrency, args.requests)
+                    latencies = level["latencies"]
+                    row = {
+                        "endpoint": endpoint,
+                        "concurrency": concurrency,
+                        "ok": len(latencies),
+                        "errors": level["errors"],
+                        "p50": percentile(latencies, 50) if latencies else None,
+                        "p95": percentile(latencies, 95) if latencies else None,
+                        "p99": percentile(latencies, 99) if latencies else None,
+                        "throughput": len(latencies) / level["wall"],
+                        "memory": server_memory(server_pid)
+                    }
+                    results.append(row)
+                    fmt = lambda value: f"{value:>7.3f}s" if value is not None else f"{'-':>8}"
+                    print(f"{endpoint:<17}{concurrency:>5}{row['ok']:>6}{sum(row['errors'].values()):>5}"
+                          f"{fmt(row['p50'])}{fmt(row['p95'])}{fmt(row['p99'])}{row['throughput']:>8.1f}  {row['memory']}")
+
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(results, output, indent=2)
+            print(f"\nresults written to {args.output}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--server-pid", type=int, help="uvicorn process to report memory for (and its workers)")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per endpoint and concurrency level")
+    parser.add_argument("--seconds", type=float, default=20.0, help="length of the test recording")
+    parser.add_argument("--output", help="also write the results as JSON, e.g. as a regression baseline")
+    parser.add_argument("--spawn", action="store_true", help="start the mock upstream and the API server")
+    parser.add_argument("--port", type=int, default=8010, help="API port with --spawn")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--mock-port", type=int, default=8011, help="mock upstream port with --spawn")
+    parser.add_argument("--distribution", default="lognormal", help="mock latency distribution with --spawn")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock 500 rate with --spawn")
+    asyncio.run(run(parser.parse_args()))
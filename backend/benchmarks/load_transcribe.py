@@ -0,0 +1,70 @@
+"""
+Load test for /transcribe/ showing that concurrent requests overlap.
+
+The OpenAI client is replaced with a fake that sleeps for a fixed upstream
+latency, so the run costs nothing. With a non-blocking client the wall time
+for N concurrent requests stays close to a single request; with a blocking
+client it grows to roughly N times the single-request latency.
+
+Usage (from the backend directory):
+    python benchmarks/load_transcribe.py --requests 20 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+# All requests come from one client; measure overlap, not the per-client limit
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from common import FakeUpstream, make_wav  # noqa: E402
+
+
+async def run(requests: int, latency: float):
+    fake = FakeUpstream(latency)
+    main.client = fake
+    main.result_cache.enabled = False
+    audio = make_wav()
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        async def one():
+            start = time.perf_counter()
+            response = await http.post(
+                "/transcribe/",
+                files={"file": ("bench.wav", audio, "audio/wav")},
+                data={"language": "az"}
+            )
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        # Single request baseline
+        single = await one()
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(requests)))
+        wall = time.perf_counter() - start
+
+    serial_estimate = single * requests
+    print(f"requests:             {requests}")
+    print(f"upstream latency:     {latency:.3f}s per call (2 calls per request)")
+    print(f"single request:       {single:.3f}s")
+    print(f"concurrent wall time: {wall:.3f}s")
+    print(f"serialized estimate:  {serial_estimate:.3f}s")
+    print(f"overlap factor:       {serial_estimate / wall:.1f}x")
+    print(f"max upstream overlap: {fake.max_in_flight} calls in flight")
+    print(f"mean latency:         {sum(latencies) / len(latencies):.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency))
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the OpenAI audio transcription and chat completion APIs.
+
+Responses are synthetic but shaped like the real ones, including streamed chat
+completions, so the backend can be load-tested without an API key or cost.
+Latency is drawn from a configurable distribution, and a share of requests
+can be failed with 500 or rate-limited with 429.
+
+Run it, then start the backend with MOCK_UPSTREAM=true (or
+UPSTREAM_BASE_URL=http://127.0.0.1:8001/v1):
+    python benchmarks/mock_openai.py --port 8001 --distribution lognormal --error-rate 0.01
+
+Every option can also be set through the environment variable in its help text.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+WORDS = "salam dünya bu gün hava çox gözəldir biz parkda gəzirik və söhbət edirik".split()
+
+
+@dataclass
+class MockConfig:
+    distribution: str = os.getenv("MOCK_DISTRIBUTION", "lognormal")
+    whisper_latency: float = float(os.getenv("MOCK_WHISPER_LATENCY", "0.8"))
+    chat_latency: float = float(os.getenv("MOCK_CHAT_LATENCY", "0.4"))
+    token_latency: float = float(os.getenv("MOCK_TOKEN_LATENCY", "0.005"))
+    spread: float = float(os.getenv("MOCK_LATENCY_SPREAD", "0.5"))
+    error_rate: float = float(os.getenv("MOCK_ERROR_RATE", "0"))
+    rate_limit_rate: float = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))
+    seed: int = int(os.getenv("MOCK_SEED", "0"))
+
+
+config = MockConfig()
+rng = random.Random(config.seed)
+counters = {"transcriptions": 0, "chat_completions": 0, "streamed": 0, "errors": 0, "rate_limited": 0}
+
+app = FastAPI(title="Mock OpenAI API")
+
+
+def sample_latency(median: float) -> float:
+    """Draw a latency around median from the configured distribution."""
+    if median <= 0:
+        return 0.0
+    if config.distribution == "fixed":
+        return median
+    if config.distribution == "uniform":
+        return rng.uniform(median * (1 - config.spread), median * (1 + config.spread))
+    if config.distribution == "exponential":
+        return rng.expovariate(1 / median)
+    # lognormal: median is exp(mu); spread is sigma, giving a long right tail
+    return rng.lognormvariate(0, config.spread) * median
+
+
+def injected_failure():
+    """An error response for a random share of requests, or None."""
+    roll = rng.random()
+    if roll < config.rate_limit_rate:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after": "1"}
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        counters["errors"] += 1
+        return JSONResponse(
+            {"error": {"message": "The server had an error (mock)", "type": "server_error", "code": None}},
+            status_code=500
+        )
+    return None
+
+
+def completion_text(body: dict) -> str:
+    """Echo the text after the prompt's last "...:" line, cut to max_tokens (about 4 chars per token)."""
+    text = body["messages"][-1]["content"].rsplit(":\n\n", 1)[-1]
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+    if max_tokens:
+        text = text[:max_tokens * 4]
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"transcript": text, "summary": text[:400]}, ensure_ascii=False)
+    return text
+
+
+@app.post("/v1/audio/transcriptions")
+async def transcriptions(
+    file: UploadFile = File(...),
+    model: str = Form(...),
+    response_format: str = Form(default="json"),
+    language: str = Form(default=None),
+    prompt: str = Form(default=None)
+):
+    counters["transcriptions"] += 1
+    size = len(await file.read())
+    await asyncio.sleep(sample_latency(config.whisper_latency))
+    failure = injected_failure()
+    if failure is not None:
+        return failure
+
+    # About 2.5 words per second of 16 kHz FLAC speech
+    text = " ".join(rng.choice(WORDS) for _ in range(max(1, size // 12000)))
+    if response_format == "text":
+        return PlainTextResponse(text + "\n")
+    return JSONResponse({"text": text})
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    counters["chat_completions"] += 1
+    body = await request.json()
+    await asyncio.sleep(sample_latency(config.chat_latency))
+    failure = injected_failure()
+    if failure is not None:
+        return failure
+
+    text = completion_text(body)
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    # Delta-sized pieces of about one token each
+    pieces = [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    if not body.get("stream"):
+        await asyncio.sleep(config.token_latency * len(pieces))
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(pieces), "total_tokens": len(pieces)}
+        })
+
+    counters["streamed"] += 1
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": body["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def events():
+        yield chunk({"role": "assistant", "content": ""})
+        for piece in pieces:
+            await asyncio.sleep(config.token_latency)
+            yield chunk({"content": piece})
+        yield chunk({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {"prompt_tokens": 0, "completion_tokens": len(pieces), "total_tokens": len(pieces)}
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": body["model"], "choices": [], "usage": usage}
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/v1/mock/stats")
+async def stats():
+    return {"config": config.__dict__, "counters": counters}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default=config.distribution,
+                        help="latency distribution (MOCK_DISTRIBUTION)")
+    parser.add_argument("--whisper-latency", type=float, default=config.whisper_latency,
+                        help="median seconds per transcription (MOCK_WHISPER_LATENCY)")
+    parser.add_argument("--chat-latency", type=float, default=config.chat_latency,
+                        help="median seconds to the first completion token (MOCK_CHAT_LATENCY)")
+    parser.add_argument("--token-latency", type=float, default=config.token_latency,
+                        help="seconds per generated token (MOCK_TOKEN_LATENCY)")
+    parser.add_argument("--spread", type=float, default=config.spread,
+                        help="lognormal sigma or uniform +/- fraction (MOCK_LATENCY_SPREAD)")
+    parser.add_argument("--error-rate", type=float, default=config.error_rate,
+                        help="share of requests failed with 500 (MOCK_ERROR_RATE)")
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate,
+                        help="share of requests rejected with 429 (MOCK_RATE_LIMIT_RATE)")
+    parser.add_argument("--seed", type=int, default=config.seed, help="random seed (MOCK_SEED)")
+    args = parser.parse_args()
+
+    for name in config.__dataclass_fields__:
+        setattr(config, name, getattr(args, name))
+    rng.seed(config.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
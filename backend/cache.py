@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, Optional
+
+from state import shared_sqlite_path
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")
+
+
+def content_hash(data) -> str:
+    """SHA-256 of bytes-like data or text."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key(stage: str, *parts) -> str:
+    """
+    Build a cache key from a pipeline stage and the inputs that determine its result.
+    Parts are serialized canonically, so dicts and lists (e.g. chat messages) can be used.
+    """
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return f"{stage}:{content_hash(canonical)}"
+
+
+class MemoryTier:
+    """LRU cache bounded by entry count and total value size, with per-entry TTL."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, size = entry
+        if expires_at < time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.time() + self.ttl, value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """
+    Persistent cache tier backed by SQLite, survives restarts.
+    Calls are blocking and are run in a worker thread by ResultCache.
+    """
+
+    def __init__(self, path: str, ttl: float = CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl)
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    Two-tier cache for pipeline stage results (transcripts, corrections, summaries).
+    Identical concurrent requests are coalesced into a single upstream call.
+    """
+
+    def __init__(self, memory: Optional[MemoryTier] = None, disk: Optional[SQLiteTier] = None, enabled: bool = True):
+        self.memory = memory or MemoryTier()
+        self.disk = disk
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        )
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached result for key, or run compute() once and cache its result."""
+        if not self.enabled:
+            return await compute()
+
+        counters = self._counters[key.split(":", 1)[0]]
+        value = self.memory.get(key)
+        if value is not None:
+            counters["memory_hits"] += 1
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            counters["coalesced"] += 1
+            # wait() neither cancels the leader's future nor raises when it was cancelled
+            await asyncio.wait((pending,))
+            if not pending.cancelled():
+                return pending.result()
+            # The leader was cancelled; its cancellation is not ours, so start over (and maybe lead)
+            return await self.get_or_compute(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._disk_get(key)
+            if value is not None:
+                counters["disk_hits"] += 1
+            else:
+                counters["misses"] += 1
+                value = await compute()
+                await self._disk_set(key, value)
+            self.memory.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """
+        Return the cached result for key without computing it.
+        Used by streamed completions, which produce their result incrementally.
+        """
+        if not self.enabled:
+            return None
+
+        counters = self._counters[key.split(":", 1)[0]]
+        value = self.memory.get(key)
+        if value is not None:
+            counters["memory_hits"] += 1
+            return value
+        value = await self._disk_get(key)
+        if value is not None:
+            counters["disk_hits"] += 1
+            self.memory.set(key, value)
+            return value
+        counters["misses"] += 1
+        return None
+
+    async def store(self, key: str, value: str):
+        """Cache a result that was computed outside get_or_compute()."""
+        if not self.enabled:
+            return
+        self.memory.set(key, value)
+        await self._disk_set(key, value)
+
+    async def _disk_get(self, key: str) -> Optional[str]:
+        if self.disk is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.disk.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache read failed: {str(e)}")
+            return None
+
+    async def _disk_set(self, key: str, value: str):
+        if self.disk is None:
+            return
+        try:
+            await asyncio.to_thread(self.disk.set, key, value)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "evictions": self.memory.evictions,
+            "disk": self.disk.path if self.disk else None,
+            "stages": dict(self._counters)
+        }
+
+
+def build_result_cache() -> ResultCache:
+    """Create the result cache from environment configuration."""
+    disk = None
+    # An explicit CACHE_SQLITE_PATH, or the database shared by all workers with STATE_BACKEND=sqlite
+    path = shared_sqlite_path(CACHE_SQLITE_PATH)
+    if path:
+        try:
+            disk = SQLiteTier(path)
+            logger.info(f"Persistent result cache at {path}")
+        except sqlite3.Error as e:
+            logger.error(f"Could not open result cache at {path}: {str(e)}")
+    return ResultCache(MemoryTier(), disk, enabled=CACHE_ENABLED)
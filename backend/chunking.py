@@ -0,0 +1,169 @@
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from encoding import encode_samples
+from ingest import AudioPayload
+from vad import frame_energy_db, frame_length, silence_mask
+
+# Long-audio configuration
+LONG_AUDIO_MAX_SECONDS = float(os.getenv("LONG_AUDIO_MAX_SECONDS", str(4 * 3600)))
+LONG_AUDIO_MAX_BYTES = int(os.getenv("LONG_AUDIO_MAX_BYTES", str(500 * 1024 * 1024)))
+CHUNK_TARGET_SECONDS = float(os.getenv("CHUNK_TARGET_SECONDS", "60"))
+CHUNK_MAX_SECONDS = float(os.getenv("CHUNK_MAX_SECONDS", "90"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("CHUNK_OVERLAP_SECONDS", "1.5"))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "8"))
+MAX_OVERLAP_WORDS = 12
+
+
+@dataclass
+class Chunk:
+    """A span of the recording sent to Whisper as one request."""
+    index: int
+    start: int
+    end: int
+    sample_rate: int
+    overlap: bool = False
+    silent: bool = False
+    text: str = ""
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start / self.sample_rate
+
+    @property
+    def end_seconds(self) -> float:
+        return self.end / self.sample_rate
+
+    def as_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "start": round(self.start_seconds, 3),
+            "end": round(self.end_seconds, 3),
+            "cut_at_silence": not self.overlap,
+            "silent": self.silent,
+            "characters": len(self.text),
+            "timings": self.timings
+        }
+
+
+def plan_chunks(
+    samples: np.ndarray,
+    sample_rate: int,
+    target_seconds: float = CHUNK_TARGET_SECONDS,
+    max_seconds: float = CHUNK_MAX_SECONDS,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS
+) -> List[Chunk]:
+    """
+    Split a recording into chunks cut at silences.
+    Each cut is placed at the silent frame closest to the target length, searched
+    between 75% of the target and the maximum length. If there is no silence in
+    that window the cut falls on the quietest frame and the next chunk starts
+    overlap_seconds earlier, so a word split by the cut is heard in full once.
+    """
+    frame = frame_length(sample_rate)
+    energy = frame_energy_db(samples, sample_rate)
+    silent = silence_mask(energy)
+    total_frames = energy.size
+
+    target = int(target_seconds * sample_rate / frame)
+    longest = int(max_seconds * sample_rate / frame)
+    earliest = int(target * 0.75)
+    overlap = int(overlap_seconds * sample_rate / frame)
+
+    cuts = []  # (end_frame, next_start_frame, overlapped)
+    start = 0
+    while total_frames - start > longest:
+        window = slice(start + earliest, start + longest)
+        candidates = np.flatnonzero(silent[window]) + window.start
+        if candidates.size:
+            cut = int(candidates[np.argmin(np.abs(candidates - (start + target)))])
+            cuts.append((cut, cut, False))
+        else:
+            cut = int(np.argmin(energy[window])) + window.start
+            cuts.append((cut, max(cut - overlap, start + 1), True))
+        start = cuts[-1][1]
+
+    chunks = []
+    start, overlapped = 0, False
+    for index, (end, next_start, next_overlapped) in enumerate(cuts + [(total_frames, None, False)]):
+        end_sample = samples.size if next_start is None else end * frame
+        chunks.append(Chunk(
+            index=index,
+            start=start * frame,
+            end=end_sample,
+            sample_rate=sample_rate,
+            overlap=overlapped,
+            silent=bool(silent[start:end].all()) if end > start else True
+        ))
+        start, overlapped = next_start, next_overlapped
+    return chunks
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def dedupe_overlaps(chunks: List[Chunk]) -> List[str]:
+    """
+    Return the chunk texts in order with text repeated across overlapping cuts removed.
+    The longest run of words ending the previous chunk that also starts the next one
+    (ignoring case and punctuation) is dropped from the next chunk.
+    """
+    texts = []
+    previous: List[str] = []
+    for chunk in chunks:
+        words = chunk.text.split()
+        if chunk.overlap and previous:
+            limit = min(MAX_OVERLAP_WORDS, len(previous), len(words))
+            tail = [_normalize_word(w) for w in previous[-limit:]]
+            head = [_normalize_word(w) for w in words[:limit]]
+            for k in range(limit, 0, -1):
+                if tail[-k:] == head[:k]:
+                    words = words[k:]
+                    break
+        texts.append(" ".join(words))
+        if words:
+            previous = words
+    return texts
+
+
+async def transcribe_chunks(
+    samples: np.ndarray,
+    chunks: List[Chunk],
+    name: str,
+    transcribe: Callable[[AudioPayload], Awaitable[str]],
+    concurrency: Optional[int] = None
+) -> List[Chunk]:
+    """
+    Encode and transcribe chunks concurrently under a bounded pool.
+    Silent chunks are skipped. Per-chunk encode and transcription times are
+    recorded on each chunk; results keep their original order.
+    """
+    semaphore = asyncio.Semaphore(concurrency or CHUNK_CONCURRENCY)
+
+    async def run(chunk: Chunk):
+        if chunk.silent:
+            return
+        async with semaphore:
+            started = time.perf_counter()
+            payload = await encode_samples(
+                samples[chunk.start:chunk.end], chunk.sample_rate, f"{name}_{chunk.index:04d}"
+            )
+            encoded = time.perf_counter()
+            chunk.text = (await transcribe(payload)).strip()
+            chunk.timings = {
+                "encode_seconds": round(encoded - started, 3),
+                "transcribe_seconds": round(time.perf_counter() - encoded, 3),
+                "payload_bytes": payload.size
+            }
+
+    await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return chunks
+
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Transcript correction configuration
+CORRECTION_MODE = os.getenv("CORRECTION_MODE", "segmented").lower()
+CORRECTION_SEGMENT_TOKENS = int(os.getenv("CORRECTION_SEGMENT_TOKENS", "800"))
+CORRECTION_CONTEXT_CHARS = int(os.getenv("CORRECTION_CONTEXT_CHARS", "200"))
+CORRECTION_CONCURRENCY = int(os.getenv("CORRECTION_CONCURRENCY", "8"))
+CORRECTION_OUTPUT_RATIO = float(os.getenv("CORRECTION_OUTPUT_RATIO", "1.3"))
+# Return the raw transcript when correction fails instead of failing the request
+CORRECTION_FALLBACK = os.getenv("CORRECTION_FALLBACK", "false").lower() in ("1", "true", "yes")
+CORRECTION_OUTPUT_MARGIN = 64
+MAX_OUTPUT_TOKENS = 16384
+
+# Without tiktoken, tokens are estimated conservatively from the character count
+CHARS_PER_TOKEN = 3
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？؟])\s+")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for GPT-4o, exact when tiktoken is installed."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model("gpt-4o")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def correction_max_tokens(text: str) -> int:
+    """Output budget for correcting text: its own length plus room for punctuation and formatting."""
+    tokens = math.ceil(count_tokens(text) * CORRECTION_OUTPUT_RATIO) + CORRECTION_OUTPUT_MARGIN
+    return min(tokens, MAX_OUTPUT_TOKENS)
+
+
+@dataclass
+class TextSegment:
+    """A span of a transcript corrected in its own call."""
+    index: int
+    text: str
+    # Joins the segment to the previous one when the transcript is reassembled
+    separator: str
+    # Preceding source text shown to the model for continuity, not corrected
+    context: str
+    tokens: int
+
+    @property
+    def max_tokens(self) -> int:
+        return correction_max_tokens(self.text)
+
+
+def split_units(text: str, max_tokens: int) -> List[tuple]:
+    """
+    Split text into (separator, unit) pairs at paragraph and sentence boundaries.
+    Sentences longer than max_tokens (e.g. unpunctuated Whisper output) are
+    split further between words.
+    """
+    units = []
+    for p_index, paragraph in enumerate(_PARAGRAPH_BREAK.split(text.strip())):
+        for s_index, sentence in enumerate(_SENTENCE_END.split(paragraph.strip())):
+            separator = "" if not units else ("\n\n" if s_index == 0 and p_index > 0 else " ")
+            if count_tokens(sentence) <= max_tokens:
+                units.append((separator, sentence))
+                continue
+            piece: List[str] = []
+            piece_tokens = 0
+            for word in sentence.split():
+                word_tokens = count_tokens(" " + word)
+                if piece and piece_tokens + word_tokens > max_tokens:
+                    units.append((separator, " ".join(piece)))
+                    separator = " "
+                    piece, piece_tokens = [], 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                units.append((separator, " ".join(piece)))
+    return units
+
+
+def plan_segments(
+    text: str,
+    segment_tokens: int = None,
+    context_chars: int = None
+) -> List[TextSegment]:
+    """
+    Pack sentences into segments of at most segment_tokens tokens.
+    Each segment carries the tail of the preceding text as context.
+    """
+    if segment_tokens is None:
+        segment_tokens = CORRECTION_SEGMENT_TOKENS
+    if context_chars is None:
+        context_chars = CORRECTION_CONTEXT_CHARS
+
+    segments: List[TextSegment] = []
+    separator, parts, tokens = "", [], 0
+    consumed = ""
+
+    def close():
+        nonlocal consumed
+        body = "".join(parts).strip()
+        context = consumed[-context_chars:] if context_chars else ""
+        if context and " " in context and len(consumed) > context_chars:
+            # Start the context on a word boundary
+            context = context.split(" ", 1)[1]
+        segments.append(TextSegment(len(segments), body, separator, context, tokens))
+        consumed += separator + body
+
+    for unit_separator, unit in split_units(text, segment_tokens):
+        unit_tokens = count_tokens(unit)
+        if parts and tokens + unit_tokens > segment_tokens:
+            close()
+            separator, parts, tokens = unit_separator, [], 0
+            unit_separator = ""
+        parts.append(unit_separator + unit)
+        tokens += unit_tokens
+    if parts:
+        close()
+    return segments
+
+
+async def correct_segmented(
+    transcript: str,
+    correct: Callable[[str, str, int], Awaitable[str]],
+    mode: Optional[str] = None,
+    segment_tokens: int = None,
+    concurrency: int = None
+) -> str:
+    """
+    Correct a transcript with correct(text, context, max_tokens).
+    In segmented mode the transcript is split into token-budgeted segments that
+    are corrected concurrently and joined back in their original order; in
+    single mode it is sent as one call. Either way max_tokens is sized from
+    the input instead of being fixed.
+    """
+    mode = (mode or CORRECTION_MODE).lower()
+    if mode == "single":
+        return await correct(transcript, "", correction_max_tokens(transcript))
+
+    if not transcript.strip():
+        return transcript
+    segments = plan_segments(transcript, segment_tokens)
+    if len(segments) > 1:
+        logger.info(f"Correcting transcript in {len(segments)} segments "
+                    f"({sum(segment.tokens for segment in segments)} tokens)")
+
+    semaphore = asyncio.Semaphore(concurrency or CORRECTION_CONCURRENCY)
+
+    async def run(segment: TextSegment) -> str:
+        async with semaphore:
+            corrected = await correct(segment.text, segment.context, segment.max_tokens)
+        # An empty answer would silently drop speech; keep the raw text instead
+        return corrected.strip() or segment.text
+
+    corrected = await asyncio.gather(*(run(segment) for segment in segments))
+    return "".join(segment.separator + text for segment, text in zip(segments, corrected))
@@ -0,0 +1,193 @@
+import asyncio
+import importlib
+import io
+import logging
+import os
+import struct
+import time
+from math import gcd
+from typing import Optional
+
+import numpy as np
+
+from cache import content_hash
+from ingest import FFMPEG_BINARY, AudioPayload, IngestStats
+from vad import SILENCE_TRIM, compact_silence
+
+logger = logging.getLogger(__name__)
+
+# Upstream encoding configuration
+UPSTREAM_AUDIO_FORMAT = os.getenv("UPSTREAM_AUDIO_FORMAT", "flac").lower()
+UPSTREAM_SAMPLE_RATE = int(os.getenv("UPSTREAM_SAMPLE_RATE", "16000"))
+UPSTREAM_OPUS_BITRATE = os.getenv("UPSTREAM_OPUS_BITRATE", "24k")
+
+AUDIO_FORMATS = {
+    "wav": {
+        "extension": "wav",
+        "content_type": "audio/wav",
+        "ffmpeg": None
+    },
+    "flac": {
+        "extension": "flac",
+        "content_type": "audio/flac",
+        "ffmpeg": ["-c:a", "flac", "-compression_level", "5", "-f", "flac"]
+    },
+    "opus": {
+        "extension": "ogg",
+        "content_type": "audio/ogg",
+        "ffmpeg": ["-c:a", "libopus", "-b:a", UPSTREAM_OPUS_BITRATE, "-application", "voip", "-f", "ogg"]
+    }
+}
+
+
+class EncodingError(Exception):
+    pass
+
+
+def pcm_samples(audio: AudioPayload) -> np.ndarray:
+    """
+    View the PCM of a WAV payload as an int16 array without copying.
+    Multi-channel audio is returned interleaved.
+    """
+    if not audio.is_pcm:
+        raise EncodingError(f"{audio.filename} is already encoded, PCM is not available")
+    return np.frombuffer(audio.buffer.getbuffer(), dtype="<i2", offset=audio.data_offset)
+
+
+def preload_resampler():
+    """Import scipy's resampler, e.g. in a background thread once the server is up."""
+    importlib.import_module("scipy.signal")
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resample int16 PCM with a polyphase anti-aliasing filter.
+    Audio is only ever downsampled, lower rates are passed through unchanged.
+    """
+    if from_rate <= to_rate:
+        return samples
+    # scipy takes about a second to import, so it is not imported with this module (see preload_resampler)
+    from scipy import signal
+
+    divisor = gcd(from_rate, to_rate)
+    resampled = signal.resample_poly(samples.astype(np.float32), to_rate // divisor, from_rate // divisor)
+    return np.clip(np.round(resampled), -32768, 32767).astype("<i2")
+
+
+def wav_buffer(samples: np.ndarray, sample_rate: int) -> io.BytesIO:
+    """Wrap mono int16 PCM in a WAV header."""
+    pcm_bytes = samples.nbytes
+    buffer = io.BytesIO()
+    buffer.write(struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + pcm_bytes, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", pcm_bytes
+    ))
+    buffer.write(memoryview(np.ascontiguousarray(samples)).cast("B"))
+    buffer.seek(0)
+    return buffer
+
+
+async def encode_pcm(samples: np.ndarray, sample_rate: int, audio_format: str) -> io.BytesIO:
+    """Encode mono int16 PCM to a compact container by piping it through ffmpeg."""
+    spec = AUDIO_FORMATS[audio_format]
+    if spec["ffmpeg"] is None:
+        return wav_buffer(samples, sample_rate)
+
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        "-map_metadata", "-1", *spec["ffmpeg"], "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate(memoryview(np.ascontiguousarray(samples)).cast("B"))
+    if proc.returncode != 0:
+        raise EncodingError(stderr.decode(errors="replace").strip() or f"ffmpeg failed to encode {audio_format}")
+    return io.BytesIO(stdout)
+
+
+async def encode_samples(
+    samples: np.ndarray,
+    sample_rate: int,
+    name: str,
+    audio_format: Optional[str] = None,
+    stats: Optional[IngestStats] = None
+) -> AudioPayload:
+    """
+    Encode mono int16 PCM in the configured upstream format.
+    Falls back to WAV if the encoder is unavailable (e.g. no libopus).
+    """
+    audio_format = (audio_format or UPSTREAM_AUDIO_FORMAT).lower()
+    if audio_format not in AUDIO_FORMATS:
+        logger.warning(f"Unknown upstream audio format '{audio_format}', using wav")
+        audio_format = "wav"
+    stats = stats or IngestStats()
+
+    # Hash of the normalized PCM identifies the recording regardless of its container
+    samples = np.ascontiguousarray(samples)
+    digest = content_hash(samples)
+
+    started = time.perf_counter()
+    try:
+        buffer = await encode_pcm(samples, sample_rate, audio_format)
+    except EncodingError as e:
+        logger.warning(f"Encoding to {audio_format} failed, falling back to wav: {str(e)}")
+        audio_format = "wav"
+        buffer = wav_buffer(samples, sample_rate)
+    stats.record("encode", started)
+    stats.output_bytes = buffer.getbuffer().nbytes
+
+    spec = AUDIO_FORMATS[audio_format]
+    return AudioPayload(
+        filename=f"{name}.{spec['extension']}",
+        buffer=buffer,
+        content_type=spec["content_type"],
+        sample_rate=sample_rate,
+        channels=1,
+        duration_seconds=samples.size / sample_rate,
+        data_offset=44 if audio_format == "wav" else None,
+        content_hash=digest,
+        stats=stats
+    )
+
+
+async def encode_for_upstream(
+    audio: AudioPayload,
+    audio_format: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    trim_silence: Optional[bool] = None
+) -> AudioPayload:
+    """
+    Downmix and resample decoded audio, optionally compact silences,
+    then encode it for Whisper.
+    """
+    sample_rate = sample_rate or UPSTREAM_SAMPLE_RATE
+    if trim_silence is None:
+        trim_silence = SILENCE_TRIM
+
+    started = time.perf_counter()
+    samples = pcm_samples(audio)
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels).mean(axis=1).astype("<i2")
+    samples = await asyncio.to_thread(resample, samples, audio.sample_rate, sample_rate)
+    target_rate = min(audio.sample_rate, sample_rate)
+    audio.stats.record("resample", started)
+
+    if trim_silence:
+        started = time.perf_counter()
+        before = samples.size
+        samples = await asyncio.to_thread(compact_silence, samples, target_rate)
+        audio.stats.removed_seconds = (before - samples.size) / target_rate
+        audio.stats.record("trim_silence", started)
+        logger.info(f"Silence compaction removed {audio.stats.removed_seconds:.1f}s "
+                    f"({audio.stats.speedup:.2f}x less audio to transcribe)")
+
+    encoded = await encode_samples(
+        samples, target_rate, os.path.splitext(audio.filename)[0], audio_format, audio.stats
+    )
+    logger.info(f"Encoded upstream payload as {encoded.filename} at {target_rate} Hz: "
+                f"{audio.size} -> {encoded.size} bytes")
+    return encoded
@@ -0,0 +1,605 @@
+import asyncio
+import io
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from cache import content_hash
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+MAX_DURATION_SECONDS = 300
+# Probed durations may be slightly off (e.g. encoder padding), so only clearly overlong files are rejected up front
+PROBE_TOLERANCE = 1.05
+
+
+class IngestError(Exception):
+    """Base class for errors raised while ingesting an upload."""
+
+
+class UploadTooLarge(IngestError):
+    pass
+
+
+class AudioTooLong(IngestError):
+    pass
+
+
+class AudioDecodeError(IngestError):
+    pass
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process and its finished children, in KB."""
+    if resource is None:
+        return None
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+
+
+@dataclass
+class IngestStats:
+    """Wall time and peak RSS recorded at the end of each ingest stage."""
+    stages: Dict[str, dict] = field(default_factory=dict)
+    input_bytes: int = 0
+    output_bytes: int = 0
+    original_seconds: float = 0.0
+    removed_seconds: float = 0.0
+
+    def record(self, stage: str, started: float):
+        self.stages[stage] = {
+            "seconds": round(time.perf_counter() - started, 4),
+            "peak_rss_kb": peak_rss_kb()
+        }
+
+    @property
+    def speedup(self) -> float:
+        """Ratio of original to transcribed audio length after silence removal."""
+        remaining = self.original_seconds - self.removed_seconds
+        return self.original_seconds / remaining if remaining > 0 else 1.0
+
+    def silence_report(self) -> dict:
+        return {
+            "original_seconds": round(self.original_seconds, 3),
+            "removed_seconds": round(self.removed_seconds, 3),
+            "speedup": round(self.speedup, 3)
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "silence": self.silence_report(),
+            "stages": self.stages
+        }
+
+
+@dataclass
+class AudioPayload:
+    """Decoded audio held in memory, ready to be sent upstream."""
+    filename: str
+    buffer: io.BytesIO
+    content_type: str
+    sample_rate: int
+    channels: int
+    duration_seconds: float
+    data_offset: Optional[int] = 44
+    content_hash: Optional[str] = None
+    stats: IngestStats = field(default_factory=IngestStats)
+
+    def as_file(self) -> Tuple[str, BinaryIO, str]:
+        """Rewind the buffer and return it in the form the OpenAI SDK expects."""
+        self.buffer.seek(0)
+        return (self.filename, self.buffer, self.content_type)
+
+    @property
+    def is_pcm(self) -> bool:
+        """Whether the buffer holds 16-bit PCM WAV that can be analysed in place."""
+        return self.data_offset is not None
+
+    @property
+    def size(self) -> int:
+        return self.buffer.getbuffer().nbytes
+
+
+def finalize_wav(buffer: io.BytesIO) -> Tuple[int, int, int, int]:
+    """
+    Patch the RIFF and data chunk sizes of a WAV written to a pipe.
+    ffmpeg cannot seek back on a pipe, so the sizes are left as placeholders.
+    The header is fixed in place through a memoryview, without copying the PCM.
+    Returns (sample_rate, channels, data_offset, pcm_bytes).
+    """
+    view = buffer.getbuffer()
+    try:
+        total = view.nbytes
+        if total < 12 or bytes(view[0:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+            raise AudioDecodeError("Decoder did not produce a WAV stream")
+
+        struct.pack_into("<I", view, 4, total - 8)
+        sample_rate = channels = None
+        offset = 12
+        while offset + 8 <= total:
+            chunk_id = bytes(view[offset:offset + 4])
+            chunk_size = struct.unpack_from("<I", view, offset + 4)[0]
+            if chunk_id == b"fmt ":
+                channels, sample_rate = struct.unpack_from("<HI", view, offset + 10)
+            elif chunk_id == b"data":
+                pcm_bytes = total - offset - 8
+                struct.pack_into("<I", view, offset + 4, pcm_bytes)
+                if sample_rate is None:
+                    raise AudioDecodeError("WAV stream has no format chunk")
+                return sample_rate, channels, offset + 8, pcm_bytes
+            offset += 8 + chunk_size + (chunk_size & 1)
+        raise AudioDecodeError("WAV stream has no data chunk")
+    finally:
+        view.release()
+
+
+def _wav_duration(header: bytes, total_size: Optional[int]) -> Optional[float]:
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", header, offset + 4)[0]
+        if chunk_id == b"fmt " and offset + 20 <= len(header):
+            byte_rate = struct.unpack_from("<I", header, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed WAVs leave the size as a placeholder; the upload size is the next best thing
+            if chunk_size in (0, 0xFFFFFFFF) and total_size:
+                chunk_size = total_size - offset - 8
+            return chunk_size / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _flac_duration(header: bytes) -> Optional[float]:
+    # STREAMINFO is always the first metadata block: 20 bits rate, 3 channels, 5 depth, 36 samples
+    if len(header) < 26:
+        return None
+    packed = int.from_bytes(header[18:26], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(header: bytes) -> Optional[float]:
+    """
+    Duration from the Xing/Info frame count. Without that header the first
+    frame's bitrate says nothing reliable about a VBR file, so None is returned
+    and the duration is bounded while decoding.
+    """
+    offset = 0
+    if header[:3] == b"ID3" and len(header) >= 10:
+        # ID3v2 tag size is a 28-bit syncsafe integer
+        offset = 10 + ((header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9])
+    if offset + 4 > len(header) or header[offset] != 0xFF or header[offset + 1] & 0xE0 != 0xE0:
+        return None
+
+    version_bits = (header[offset + 1] >> 3) & 0x3
+    layer_bits = (header[offset + 1] >> 1) & 0x3
+    bitrate_index = header[offset + 2] >> 4
+    rate_index = (header[offset + 2] >> 2) & 0x3
+    if layer_bits != 1 or version_bits == 1 or rate_index == 3 or bitrate_index in (0, 15):
+        return None  # Only Layer III with a valid, non-free bitrate
+    mpeg1 = version_bits == 3
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    samples_per_frame = 1152 if mpeg1 else 576
+
+    # A Xing/Info (VBR) header after the side information gives the exact frame count
+    mono = (header[offset + 3] >> 6) == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if header[xing:xing + 4] in (b"Xing", b"Info") and len(header) >= xing + 12:
+        if struct.unpack_from(">I", header, xing + 4)[0] & 0x1:
+            frames = struct.unpack_from(">I", header, xing + 8)[0]
+            return frames * samples_per_frame / sample_rate
+    return None
+
+
+def _mp4_duration(header: bytes) -> Optional[float]:
+    """Duration from the movie header, when the moov box comes before the media data."""
+    def boxes(start: int, end: int):
+        while start + 8 <= end:
+            size, kind = struct.unpack_from(">I4s", header, start)
+            if size == 1 and start + 16 <= end:
+                size = struct.unpack_from(">Q", header, start + 8)[0]
+            if size < 8:
+                return
+            yield kind, start + 8, start + size
+            start += size
+
+    for kind, body, end in boxes(0, len(header)):
+        if kind != b"moov":
+            continue
+        for inner, inner_body, inner_end in boxes(body, min(end, len(header))):
+            if inner != b"mvhd" or inner_body + 32 > len(header):
+                continue
+            if header[inner_body] == 1:
+                timescale, duration = struct.unpack_from(">IQ", header, inner_body + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", header, inner_body + 12)
+            return duration / timescale if timescale else None
+    return None
+
+
+def probe_duration(header: bytes, total_size: Optional[int] = None) -> Optional[float]:
+    """
+    Estimate the duration of an upload from the first bytes of its container
+    (WAV, FLAC, MP3 and MP4/M4A with the index up front), without decoding.
+    Returns None when the format does not record it there (e.g. WebM or Ogg
+    from browser recorders); those are bounded while decoding instead.
+    """
+    try:
+        if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+            return _wav_duration(header, total_size)
+        if header[:4] == b"fLaC":
+            return _flac_duration(header)
+        if header[4:8] in (b"ftyp", b"moov"):
+            return _mp4_duration(header)
+        return _mp3_duration(header)
+    except (struct.error, IndexError, ZeroDivisionError):
+        return None
+
+
+def opus_header(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    (channels, pre_skip, input_sample_rate) from the OpusHead packet that
+    opens an Ogg Opus stream, or None when the upload is not Ogg Opus.
+    """
+    try:
+        if header[:4] != b"OggS" or not header[5] & 0x02:
+            return None
+        body = 27 + header[26]
+        if header[body:body + 8] != b"OpusHead":
+            return None
+        channels, pre_skip, input_sample_rate = struct.unpack_from("<BHI", header, body + 9)
+        return channels, pre_skip, input_sample_rate
+    except (struct.error, IndexError):
+        return None
+
+
+def ogg_end_granule(data) -> Optional[int]:
+    """Granule position of the last Ogg page that has one (for Opus, 48 kHz samples from the start)."""
+    end = len(data)
+    while True:
+        position = data.rfind(b"OggS", 0, end)
+        if position < 0 or position + 14 > len(data):
+            return None
+        granule = struct.unpack_from("<q", data, position + 6)[0]
+        if data[position + 4] == 0 and granule >= 0:
+            return granule
+        end = position
+
+
+def check_upload_size(file, max_bytes: int):
+    """Reject an upload whose size is already known (e.g. from a spooled multipart part) before reading it."""
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(f"Upload is {size} bytes, limit is {max_bytes}")
+
+
+async def ingest_upload(
+    file,
+    process_id: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_duration: float = MAX_DURATION_SECONDS,
+    sample_rate: Optional[int] = None
+) -> AudioPayload:
+    """
+    Stream an upload through ffmpeg and return mono 16-bit WAV in memory.
+    The upload is fed to the decoder chunk by chunk while the decoded output
+    is collected, so nothing touches the disk and the PCM is held only once.
+    When sample_rate is given ffmpeg also resamples, which keeps long
+    recordings from being buffered at their native rate.
+    Oversized uploads are rejected before decoding when their size is known
+    and otherwise as soon as they cross max_bytes. Overlong audio is rejected
+    from its container header when the duration is recorded there, and
+    otherwise as soon as the decoded output passes max_duration.
+    """
+    check_upload_size(file, max_bytes)
+    stats = IngestStats()
+    started = time.perf_counter()
+    read_seconds = 0.0
+
+    resample_args = ["-ar", str(sample_rate)] if sample_rate else []
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+        "-i", "cache:pipe:0",
+        "-vn", "-ac", "1", *resample_args, "-acodec", "pcm_s16le",
+        "-map_metadata", "-1", "-fflags", "+bitexact", "-flags:a", "+bitexact",
+        "-f", "wav", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    output = io.BytesIO()
+
+    async def feed():
+        nonlocal read_seconds
+        try:
+            while True:
+                read_started = time.perf_counter()
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                read_seconds += time.perf_counter() - read_started
+                if not chunk:
+                    break
+                if stats.input_bytes == 0:
+                    probed = probe_duration(chunk, getattr(file, "size", None))
+                    if probed is not None and probed > max_duration * PROBE_TOLERANCE:
+                        raise AudioTooLong(f"Audio is about {probed:.1f}s, limit is {max_duration}s")
+                stats.input_bytes += len(chunk)
+                if stats.input_bytes > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # Decoder exited early; its exit status is checked below
+            pass
+        finally:
+            proc.stdin.close()
+
+    async def collect():
+        max_output = None
+        while True:
+            chunk = await proc.stdout.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            output.write(chunk)
+            if max_output is None and output.tell() >= 32:
+                # The fmt chunk comes first in ffmpeg's output; its byte rate bounds the output size
+                with output.getbuffer() as view:
+                    byte_rate = struct.unpack_from("<I", view, 28)[0]
+                max_output = 44 + byte_rate * max_duration * PROBE_TOLERANCE if byte_rate else float("inf")
+            if max_output is not None and output.tell() > max_output:
+                raise AudioTooLong(f"Audio is longer than {max_duration}s")
+
+    try:
+        _, _, stderr = await asyncio.gather(feed(), collect(), proc.stderr.read())
+        await proc.wait()
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    stats.stages["read"] = {"seconds": round(read_seconds, 4), "peak_rss_kb": peak_rss_kb()}
+    stats.record("decode", started)
+
+    if proc.returncode != 0:
+        raise AudioDecodeError(stderr.decode(errors="replace").strip() or "ffmpeg failed")
+
+    package_started = time.perf_counter()
+    sample_rate, channels, data_offset, pcm_bytes = finalize_wav(output)
+    output.seek(0)
+    stats.output_bytes = output.getbuffer().nbytes
+    stats.record("package", package_started)
+    stats.original_seconds = pcm_bytes / (sample_rate * channels * 2)
+
+    duration_seconds = stats.original_seconds
+    if duration_seconds > max_duration:
+        raise AudioTooLong(f"Audio is {duration_seconds:.1f}s, limit is {max_duration}s")
+
+    payload = AudioPayload(
+        filename=f"{process_id}.wav",
+        buffer=output,
+        content_type="audio/wav",
+        sample_rate=sample_rate,
+        channels=channels,
+        duration_seconds=duration_seconds,
+        data_offset=data_offset,
+        stats=stats
+    )
+    logger.info(f"Ingested {stats.input_bytes} bytes -> {stats.output_bytes} bytes "
+                f"({duration_seconds:.1f}s audio): {stats.stages}")
+    return payload
+
+
+class StreamDecoder:
+    """
+    One long-lived ffmpeg process that decodes a recording while it arrives,
+    e.g. the chunks of a live session. Every byte is decoded once; the mono
+    16-bit PCM at sample_rate accumulates in pcm. Decoding past max_duration
+    raises AudioTooLong from the next feed() or close().
+    """
+
+    def __init__(self, process_id: str, sample_rate: int, max_duration: float = MAX_DURATION_SECONDS):
+        self.process_id = process_id
+        self.sample_rate = sample_rate
+        self.max_duration = max_duration
+        self.pcm = bytearray()
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stderr = b""
+
+    @property
+    def decoded_samples(self) -> int:
+        return len(self.pcm) // 2
+
+    async def feed(self, chunk: bytes):
+        if self._proc is None:
+            # Small probe so output starts with the first chunk instead of after seconds of audio
+            self._proc = await asyncio.create_subprocess_exec(
+                FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+                "-probesize", "32768", "-i", "pipe:0",
+                "-vn", "-ac", "1", "-ar", str(self.sample_rate), "-f", "s16le", "-flush_packets", "1", "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self._reader = asyncio.create_task(self._collect())
+        self.check()
+        try:
+            self._proc.stdin.write(chunk)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # Decoder exited early; its exit status is checked in close()
+            pass
+
+    async def _collect(self):
+        max_output = int(self.max_duration * self.sample_rate * PROBE_TOLERANCE) * 2
+
+        async def stdout():
+            while True:
+                chunk = await self._proc.stdout.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.pcm.extend(chunk)
+                if len(self.pcm) > max_output:
+                    raise AudioTooLong(f"Audio is longer than {self.max_duration}s")
+
+        try:
+            _, self._stderr = await asyncio.gather(stdout(), self._proc.stderr.read())
+        except BaseException:
+            # Past the limit or abandoned: stop the decoder and reap it
+            if self._proc.returncode is None:
+                self._proc.kill()
+            await self._proc.wait()
+            raise
+
+    def check(self):
+        """Raise the error that stopped the decoder, if any."""
+        if self._reader is not None and self._reader.done():
+            self._reader.result()
+
+    async def close(self):
+        """Finish decoding everything fed so far."""
+        if self._proc is None:
+            return
+        if not self._proc.stdin.is_closing():
+            self._proc.stdin.close()
+        try:
+            await self._reader
+            await self._proc.wait()
+        finally:
+            self.kill()
+        if self._proc.returncode != 0:
+            raise AudioDecodeError(self._stderr.decode(errors="replace").strip() or "ffmpeg failed")
+        duration_seconds = self.decoded_samples / self.sample_rate
+        if duration_seconds > self.max_duration:
+            raise AudioTooLong(f"Audio is {duration_seconds:.1f}s, limit is {self.max_duration}s")
+
+    def kill(self):
+        """Stop the decoder without waiting for its output, e.g. when the client is gone."""
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.kill()
+
+
+class BytesReader:
+    """Async read() over in-memory bytes, so buffered data can go through ingest_upload."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+
+class PrefixedReader:
+    """Async read() that returns bytes already read from an upload before the rest of it."""
+
+    def __init__(self, prefix: bytes, file):
+        self._prefix = prefix
+        self._file = file
+        self.size = getattr(file, "size", None)
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._prefix:
+            chunk, self._prefix = self._prefix, b""
+            if size < 0:
+                return chunk + await self._file.read()
+            return chunk
+        return await self._file.read(size)
+
+
+async def ingest_normalized(
+    file,
+    process_id: str,
+    max_sample_rate: int,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_duration: float = MAX_DURATION_SECONDS
+) -> AudioPayload:
+    """
+    Keep an upload that is already mono Ogg Opus at no more than
+    max_sample_rate (what the web client's compaction produces) as it is:
+    it is as compact as anything it could be re-encoded to, so it is neither
+    decoded nor converted, and its duration is read from the last Ogg page.
+    Any other upload is decoded by ingest_upload. The returned payload is not
+    PCM in the first case and 16-bit WAV in the second.
+    """
+    check_upload_size(file, max_bytes)
+    started = time.perf_counter()
+    first = await file.read(UPLOAD_CHUNK_SIZE)
+    header = opus_header(first)
+    if header is None or header[0] != 1 or not 0 < header[2] <= max_sample_rate:
+        return await ingest_upload(PrefixedReader(first, file), process_id, max_bytes, max_duration)
+
+    channels, pre_skip, input_sample_rate = header
+    data = bytearray(first)
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        data.extend(chunk)
+        if len(data) > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+
+    granule = ogg_end_granule(data)
+    if granule is None:
+        return await decode_bytes(bytes(data), process_id, max_duration=max_duration)
+    duration_seconds = max(0, granule - pre_skip) / 48000
+    if duration_seconds > max_duration:
+        raise AudioTooLong(f"Audio is {duration_seconds:.1f}s, limit is {max_duration}s")
+
+    stats = IngestStats(input_bytes=len(data), output_bytes=len(data), original_seconds=duration_seconds)
+    stats.record("read", started)
+    payload = AudioPayload(
+        filename=f"{process_id}.ogg",
+        buffer=io.BytesIO(data),
+        content_type="audio/ogg",
+        sample_rate=input_sample_rate,
+        channels=channels,
+        duration_seconds=duration_seconds,
+        data_offset=None,
+        content_hash=content_hash(data),
+        stats=stats
+    )
+    logger.info(f"Kept {len(data)} bytes of normalized Ogg Opus ({duration_seconds:.1f}s audio at "
+                f"{input_sample_rate} Hz) without re-encoding")
+    return payload
+
+
+async def decode_bytes(
+    data: bytes,
+    process_id: str,
+    sample_rate: Optional[int] = None,
+    max_duration: float = MAX_DURATION_SECONDS
+) -> AudioPayload:
+    """Decode an in-memory recording to mono 16-bit WAV."""
+    return await ingest_upload(
+        BytesReader(data),
+        process_id,
+        max_bytes=len(data),
+        max_duration=max_duration,
+        sample_rate=sample_rate
+    )
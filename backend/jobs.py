@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from state import STATE_BACKEND, STATE_SQLITE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Job subsystem configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_STORE = (os.getenv("JOB_STORE") or STATE_BACKEND).lower()
+JOB_SQLITE_PATH = os.getenv("JOB_SQLITE_PATH", "")  # defaults to the shared STATE_SQLITE_PATH
+JANITOR_INTERVAL_SECONDS = 60
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED = (COMPLETED, FAILED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _expired(job: dict, now: float) -> bool:
+    return job["expires_at"] is not None and job["expires_at"] < now
+
+
+class MemoryJobStore:
+    """
+    Job state kept in a process-local dict.
+    Only visible to the uvicorn worker that accepted the job.
+    """
+    blocking = False
+
+    def __init__(self, jobs: Optional[Dict[str, dict]] = None):
+        self.jobs = {} if jobs is None else jobs
+
+    def put(self, job: dict):
+        self.jobs[job["id"]] = job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        if job is None or _expired(job, time.time()):
+            return None
+        return job
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items() if _expired(job, now)]
+        for job_id in expired:
+            del self.jobs[job_id]
+        return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+
+class SQLiteJobStore:
+    """
+    Job state in a SQLite database shared by all workers on a host,
+    so any worker can answer status requests for any job.
+    """
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def put(self, job: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, data, expires_at) VALUES (?, ?, ?, ?)",
+                (job["id"], job["status"], json.dumps(job, ensure_ascii=False), job["expires_at"])
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at >= ?)", (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class JobContext:
+    """Handed to a job handler to report progress stage by stage."""
+
+    def __init__(self, manager: "JobManager", job: dict):
+        self._manager = manager
+        self.job = job
+
+    @property
+    def job_id(self) -> str:
+        return self.job["id"]
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Mark a pipeline stage as running for the duration of the block and record its time."""
+        started = time.perf_counter()
+        self.job["stage"] = name
+        self.job["stages"][name] = {"status": RUNNING, "seconds": None}
+        await self._manager.save(self.job)
+        try:
+            yield
+        except Exception:
+            self.job["stages"][name]["status"] = FAILED
+            raise
+        finally:
+            self.job["stages"][name]["seconds"] = round(time.perf_counter() - started, 3)
+        self.job["stages"][name]["status"] = COMPLETED
+        await self._manager.save(self.job)
+
+
+JobHandler = Callable[[JobContext], Awaitable[dict]]
+
+
+class JobManager:
+    """
+    Runs submitted jobs on a bounded pool of worker tasks.
+    Job state lives in a pluggable store; finished jobs expire after JOB_TTL_SECONDS.
+    """
+
+    def __init__(self, store, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE, ttl: float = JOB_TTL_SECONDS):
+        self.store = store
+        self.workers = workers
+        self.ttl = ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_size = queue_size
+        self._tasks: List[asyncio.Task] = []
+
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def save(self, job: dict):
+        job["updated_at"] = time.time()
+        await self._call(self.store.put, job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._call(self.store.get, job_id)
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+        logger.info(f"Job manager started with {self.workers} workers ({type(self.store).__name__})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, handler: JobHandler, params: Optional[dict] = None) -> dict:
+        """Queue a job and return its initial record. Raises QueueFull when saturated."""
+        if self._queue is None:
+            raise RuntimeError("Job manager is not started")
+        now = time.time()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": QUEUED,
+            "stage": None,
+            "stages": {},
+            "params": params or {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            # Unfinished jobs do not expire; the TTL starts when they finish
+            "expires_at": None
+        }
+        if self._queue.full():
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} jobs)")
+        # Stored before it is queued so a worker's update cannot be overwritten
+        await self.save(job)
+        try:
+            self._queue.put_nowait((job, handler))
+        except asyncio.QueueFull:
+            job["status"] = FAILED
+            job["error"] = "Job queue is full"
+            job["expires_at"] = time.time() + self.ttl
+            await self.save(job)
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} jobs)")
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job, handler = await self._queue.get()
+            try:
+                job["status"] = RUNNING
+                job["started_at"] = time.time()
+                await self.save(job)
+                job["result"] = await handler(JobContext(self, job))
+                job["status"] = COMPLETED
+            except asyncio.CancelledError:
+                job["status"] = FAILED
+                job["error"] = "Job interrupted by server shutdown"
+                raise
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({job['kind']}) failed: {str(e)}", exc_info=True)
+                job["status"] = FAILED
+                job["error"] = getattr(e, "detail", None) or str(e)
+            finally:
+                job["finished_at"] = time.time()
+                job["expires_at"] = job["finished_at"] + self.ttl
+                job["stage"] = None
+                try:
+                    await self.save(job)
+                finally:
+                    self._queue.task_done()
+
+    async def _janitor(self):
+        while True:
+            await asyncio.sleep(JANITOR_INTERVAL_SECONDS)
+            try:
+                removed = await self._call(self.store.purge_expired)
+                if removed:
+                    logger.info(f"Removed {removed} expired jobs")
+            except Exception as e:
+                logger.warning(f"Job janitor failed: {str(e)}")
+
+    async def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "store": type(self.store).__name__,
+            "jobs": await self._call(self.store.counts)
+        }
+
+
+def build_job_manager(registry: Optional[Dict[str, dict]] = None) -> JobManager:
+    """Create the job manager with the store selected by JOB_STORE."""
+    if JOB_STORE == "sqlite":
+        store = SQLiteJobStore(JOB_SQLITE_PATH or STATE_SQLITE_PATH)
+    else:
+        store = MemoryJobStore(registry)
+    return JobManager(store)
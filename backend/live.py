@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from encoding import UPSTREAM_SAMPLE_RATE, encode_samples
+from ingest import (
+    MAX_DURATION_SECONDS, MAX_UPLOAD_BYTES, AudioPayload, AudioTooLong, StreamDecoder, UploadTooLarge
+)
+from vad import frame_energy_db, frame_length, runs, silence_mask
+
+logger = logging.getLogger(__name__)
+
+# Live streaming configuration
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "3"))
+LIVE_MIN_SEGMENT_SECONDS = float(os.getenv("LIVE_MIN_SEGMENT_SECONDS", "2"))
+LIVE_MAX_SEGMENT_SECONDS = float(os.getenv("LIVE_MAX_SEGMENT_SECONDS", "15"))
+LIVE_MIN_PAUSE_SECONDS = float(os.getenv("LIVE_MIN_PAUSE_SECONDS", "0.3"))
+PROMPT_CONTEXT_CHARS = 200
+
+
+@dataclass
+class Segment:
+    """A finalized span of the live recording and its transcript."""
+    index: int
+    start: float
+    end: float
+    text: str
+    corrected: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "text": self.text,
+            "corrected": self.corrected
+        }
+
+
+def pick_cut(samples: np.ndarray, sample_rate: int, final: bool = False) -> Optional[int]:
+    """
+    Choose where to close the next segment of not yet transcribed audio.
+    Cuts fall in the middle of the last pause between the minimum and maximum
+    segment length. Without a pause, audio is held back until it reaches the
+    maximum segment length and is then cut at its quietest frame.
+    Returns a sample offset, or None to wait for more audio.
+    """
+    if final:
+        return samples.size or None
+    min_samples = int(LIVE_MIN_SEGMENT_SECONDS * sample_rate)
+    if samples.size < min_samples:
+        return None
+
+    max_samples = int(LIVE_MAX_SEGMENT_SECONDS * sample_rate)
+    frame = frame_length(sample_rate)
+    energy = frame_energy_db(samples, sample_rate)
+    silent = silence_mask(energy)
+    min_pause = max(1, int(LIVE_MIN_PAUSE_SECONDS * sample_rate / frame))
+    pauses = [
+        (start + end) // 2 for start, end in runs(silent)
+        if end - start >= min_pause and min_samples <= (start + end) // 2 * frame <= max_samples
+    ]
+    if pauses:
+        return pauses[-1] * frame
+
+    if samples.size < max_samples:
+        return None
+    first, last = min_samples // frame, max_samples // frame
+    return (first + int(np.argmin(energy[first:last]))) * frame
+
+
+class LiveSession:
+    """
+    Incremental transcription of a recording that arrives in pieces.
+    Audio chunks (e.g. MediaRecorder timeslices) are fed to a decoder as they
+    arrive. A background loop looks at the audio decoded since the last
+    segment every LIVE_WINDOW_SECONDS, closes segments at pauses and
+    transcribes them, pushing partial results through send(). Each segment
+    is corrected as soon as it is transcribed, so the final corrected
+    transcript is ready shortly after the recording stops.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        send: Callable[[dict], Awaitable[None]],
+        transcribe: Callable[[AudioPayload, str], Awaitable[str]],
+        correct: Callable[[str], Awaitable[str]],
+        sample_rate: int = UPSTREAM_SAMPLE_RATE,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        max_duration: float = MAX_DURATION_SECONDS
+    ):
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.segments: List[Segment] = []
+        self.first_text_seconds: Optional[float] = None
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._transcribe = transcribe
+        self._correct = correct
+        self._decoder = StreamDecoder(session_id, sample_rate, max_duration)
+        self._received = 0
+        self._committed = 0
+        self.failure: Optional[Exception] = None
+        self._failed = asyncio.Event()
+        self._corrections: List[asyncio.Task] = []
+        self._started = time.perf_counter()
+        self._process_lock = asyncio.Lock()
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        self._runner = asyncio.create_task(self._run())
+
+    async def append(self, chunk: bytes):
+        if self.failure is not None:
+            raise self.failure
+        if self._received + len(chunk) > self.max_bytes:
+            raise UploadTooLarge(f"Recording exceeds {self.max_bytes} bytes")
+        self._received += len(chunk)
+        await self._decoder.feed(chunk)
+
+    async def guard(self, awaitable: Awaitable):
+        """Await awaitable, or raise the error that ended the session (e.g. AudioTooLong) if that comes first."""
+        waiting = asyncio.ensure_future(awaitable)
+        failed = asyncio.create_task(self._failed.wait())
+        try:
+            await asyncio.wait((waiting, failed), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            failed.cancel()
+        if not waiting.done():
+            waiting.cancel()
+            raise self.failure
+        return waiting.result()
+
+    async def send(self, message: dict):
+        async with self._send_lock:
+            await self._send(message)
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), LIVE_WINDOW_SECONDS)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._process(final=False)
+            except (AudioTooLong, UploadTooLarge) as e:
+                # Past the limits nothing more can be transcribed; end the session
+                self.failure = e
+                self._failed.set()
+                return
+            except Exception as e:
+                # Retried on the next window; persistent failures surface in finish()
+                logger.warning(f"Live session {self.session_id}: window failed: {str(e)}")
+
+    async def _process(self, final: bool):
+        async with self._process_lock:
+            if final:
+                await self._decoder.close()
+            else:
+                self._decoder.check()
+            # Only the audio after the last segment is looked at (and copied, as the decoder keeps appending)
+            decoded = self._decoder.decoded_samples
+            pending = np.frombuffer(self._decoder.pcm[self._committed * 2:decoded * 2], dtype="<i2")
+            while True:
+                cut = pick_cut(pending, self.sample_rate, final)
+                if cut is None:
+                    break
+                await self._transcribe_segment(pending[:cut], self._committed)
+                self._committed += cut
+                pending = pending[cut:]
+
+    async def _transcribe_segment(self, samples: np.ndarray, offset: int):
+        start = offset / self.sample_rate
+        end = (offset + samples.size) / self.sample_rate
+        if silence_mask(frame_energy_db(samples, self.sample_rate)).all():
+            return
+
+        payload = await encode_samples(samples, self.sample_rate, f"{self.session_id}_{len(self.segments):04d}")
+        previous = " ".join(segment.text for segment in self.segments)[-PROMPT_CONTEXT_CHARS:]
+        text = (await self._transcribe(payload, previous)).strip()
+        if not text:
+            return
+
+        segment = Segment(index=len(self.segments), start=start, end=end, text=text)
+        self.segments.append(segment)
+        elapsed = time.perf_counter() - self._started
+        if self.first_text_seconds is None:
+            self.first_text_seconds = elapsed
+        await self.send({"type": "partial", **segment.as_dict(), "elapsed": round(elapsed, 3)})
+        self._corrections.append(asyncio.create_task(self._correct_segment(segment)))
+
+    async def _correct_segment(self, segment: Segment):
+        segment.corrected = await self._correct(segment.text)
+        await self.send({"type": "corrected", "index": segment.index, "text": segment.corrected})
+
+    async def finish(self) -> dict:
+        """Transcribe the remaining audio, wait for corrections and return the result."""
+        # Let a window that is already being transcribed complete rather than redo it
+        self._stopping.set()
+        if self._runner is not None:
+            await self._runner
+        if self.failure is not None:
+            raise self.failure
+        await self._process(final=True)
+        await asyncio.gather(*self._corrections)
+        return {
+            "transcript": " ".join(segment.corrected or segment.text for segment in self.segments),
+            "raw_transcript": " ".join(segment.text for segment in self.segments),
+            "segments": [segment.as_dict() for segment in self.segments],
+            "duration_seconds": round(self._committed / self.sample_rate, 3),
+            "time_to_first_text": round(self.first_text_seconds, 3) if self.first_text_seconds is not None else None,
+            "total_seconds": round(time.perf_counter() - self._started, 3)
+        }
+
+    def cancel(self):
+        """Abandon all background work, e.g. when the client disconnects."""
+        self._stopping.set()
+        self._decoder.kill()
+        if self._runner is not None:
+            self._runner.cancel()
+        for task in self._corrections:
+            task.cancel()
@@ -0,0 +1,215 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+# Logging configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text or json
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "200"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Id of the request (or job) being handled, attached to every log record
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+# Whether transcript payloads are logged for the current request
+_payload_sampled: ContextVar[Optional[bool]] = ContextVar("payload_sampled", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def bind_request_id(value: str):
+    """Use value as the request id of the current task and the tasks it starts."""
+    request_id.set(value)
+    _payload_sampled.set(None)
+
+
+class Payload:
+    """
+    A transcript (or other large text) passed as a logging argument. It is
+    rendered only when the record is formatted - on the logging thread - and
+    cut to LOG_PAYLOAD_CHARS, or reduced to its length when the request was not
+    sampled by LOG_PAYLOAD_SAMPLE_RATE.
+    """
+    __slots__ = ("text", "limit", "sampled")
+
+    def __init__(self, text, limit: int, sampled: bool):
+        self.text = text
+        self.limit = limit
+        self.sampled = sampled
+
+    def __str__(self) -> str:
+        text = str(self.text)
+        if not self.sampled:
+            return f"<{len(text)} chars, not sampled>"
+        if self.limit <= 0 or len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... (+{len(text) - self.limit} chars)"
+
+
+def payload(text, limit: Optional[int] = None) -> Payload:
+    """Wrap a transcript for logging, applying truncation and per-request sampling."""
+    sampled = _payload_sampled.get()
+    if sampled is None:
+        sampled = LOG_PAYLOAD_SAMPLE_RATE >= 1 or random.random() < LOG_PAYLOAD_SAMPLE_RATE
+        _payload_sampled.set(sampled)
+    return Payload(text, LOG_PAYLOAD_CHARS if limit is None else limit, sampled)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (in the thread that logs them)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them. Message
+    arguments are formatted there, so Payload truncation and JSON encoding stay
+    off the event loop. When the queue is full the record is dropped and
+    counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Traceback objects reference live frames; render them while they are valid
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingState:
+    def __init__(self, handler: logging.Handler, listener: Optional[logging.handlers.QueueListener]):
+        self.handler = handler
+        self.listener = listener
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> dict:
+        stats = {"async": self.listener is not None, "format": LOG_FORMAT}
+        if isinstance(self.handler, NonBlockingQueueHandler):
+            stats["queued"] = self.handler.queue.qsize()
+            stats["dropped"] = self.handler.dropped
+        return stats
+
+
+def build_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    return JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    use_queue: bool = LOG_ASYNC,
+    stream=None,
+    queue_size: int = LOG_QUEUE_SIZE
+) -> LoggingState:
+    """
+    Replace the root handlers with a stdout handler. With use_queue the
+    handler runs on a background thread behind a bounded queue, so logging
+    from request handlers never waits for formatting or I/O.
+    """
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(build_formatter(fmt))
+
+    listener = None
+    if use_queue:
+        handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        listener.start()
+    else:
+        handler = output
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    state = LoggingState(handler, listener)
+    # Flush whatever is still queued when the process exits
+    atexit.register(state.stop)
+    return state
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware binding a request id to each request: the client's
+    X-Request-ID if it sent one, otherwise a new id. It is echoed back in the
+    X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        value = incoming[:64] if incoming else new_request_id()
+        token = request_id.set(value)
+        sampled = _payload_sampled.set(None)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(REQUEST_ID_HEADER, value.encode("latin-1"))]
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _payload_sampled.reset(sampled)
+            request_id.reset(token)
@@ -1,28 +1,52 @@
-from fastapi import FastAPI, UploadFile, HTTPException, File, Form
+from fastapi import APIRouter, FastAPI, UploadFile, HTTPException, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from openai import OpenAI
-from pydub import AudioSegment
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 import os
 from dotenv import load_dotenv
 import tempfile
 import uuid
 import logging
 import sys
-from typing import Dict, Optional, List
-import httpx
-import numpy as np
-from scipy import signal
+import time
+import asyncio
+import io
+import json
+import math
+import zipfile
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from enum import Enum
-
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+from upstream import build_http_client, build_client, prewarm, ModelLimiter
+from ingest import (
+    ingest_upload, ingest_normalized, BytesReader, AudioPayload,
+    UploadTooLarge, AudioTooLong, MAX_UPLOAD_BYTES
+)
+from encoding import encode_for_upstream, pcm_samples, preload_resampler, UPSTREAM_SAMPLE_RATE
+from vad import SILENCE_TRIM
+from cache import build_result_cache, cache_key
+from chunking import (
+    LONG_AUDIO_MAX_BYTES, LONG_AUDIO_MAX_SECONDS,
+    plan_chunks, transcribe_chunks, dedupe_overlaps
+)
+from live import LiveSession
+from jobs import build_job_manager, JobContext, QueueFull, FINISHED
+from pipeline import run_summary_pipeline, resolve_mode, FusedOutputError, FusedTooLong
+from correction import correct_segmented, correction_max_tokens, plan_segments, CORRECTION_FALLBACK
+from resilience import (
+    ResilientCaller, CircuitOpen, is_retryable, retry_after_seconds,
+    hedge_transcription, hedge_completion, RETRY_MAX_DELAY
 )
+from metrics import (
+    MetricsMiddleware, span, upstream_call, record_usage, render as render_metrics,
+    AUDIO_SECONDS, PAYLOAD_BYTES, UPLOADS
+)
+from admission import AdmissionMiddleware, BodyLimitMiddleware, build_admission_controller
+from scratch import ScratchSpace, ScratchFile, ScratchFull
+from logsetup import setup_logging, payload, bind_request_id, RequestIdMiddleware
+from batch import read_batch, run_batch, close_items, BatchItem, BatchTooLarge, TooManyFiles, BATCH_MAX_BYTES, BATCH_MAX_FILES
+
+# Configure logging: records are written to stdout from a background thread (see LOG_ASYNC)
+log_state = setup_logging()
 
 # Set specific loggers to higher levels to reduce noise
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -37,41 +61,43 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 logger.info("Environment variables loaded")
 
-app = FastAPI(title="Azerbaijani Speech Recognition & Audio Summarizer API")
+# Endpoints; create_app() mounts them on an application with its middleware
+router = APIRouter()
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
-logger.info("CORS configured")
+# Admission control for uploads and model calls, applied before request bodies are read
+admission = build_admission_controller()
 
-# Configure OpenAI
-try:
-    http_client = httpx.Client(
-        timeout=httpx.Timeout(60.0),
-        follow_redirects=True
-    )
-    
-    client = OpenAI(
-        api_key=os.getenv('OPENAI_API_KEY'),
-        http_client=http_client
-    )
-    logger.info("OpenAI API key configured successfully")
-except Exception as e:
-    logger.error(f"Error configuring OpenAI client: {str(e)}")
-    logger.error(f"Environment: OPENAI_API_KEY={'*' * 5 if os.getenv('OPENAI_API_KEY') else 'Not Set'}")
-    raise Exception(f"OpenAI API key configuration failed: {str(e)}")
+# The OpenAI client and its connection pool are built (and pre-warmed) when the app starts, see lifespan()
+http_client = None
+client = None
+model_limiter = ModelLimiter()
+resilience = ResilientCaller()
+result_cache = build_result_cache()
+
+def configure_upstream():
+    """Create the pooled HTTP client and the OpenAI client on top of it."""
+    try:
+        pool = build_http_client()
+        openai_client = build_client(pool)
+        logger.info("OpenAI API key configured successfully")
+        return pool, openai_client
+    except Exception as e:
+        logger.error(f"Error configuring OpenAI client: {str(e)}")
+        logger.error(f"Environment: OPENAI_API_KEY={'*' * 5 if os.getenv('OPENAI_API_KEY') else 'Not Set'}")
+        raise Exception(f"OpenAI API key configuration failed: {str(e)}")
 
 # Temporary storage
 TEMP_DIR = tempfile.gettempdir()
 processing_files: Dict[str, dict] = {}
 logger.info(f"Using temporary directory: {TEMP_DIR}")
 
+# Scratch files (e.g. uploads waiting for a job worker), deleted when done and swept by a janitor
+scratch = ScratchSpace()
+
+# Background jobs; with the in-process store, processing_files holds their state
+job_manager = build_job_manager(processing_files)
+JOB_EVENTS_POLL_SECONDS = 0.5
+
 class Language(Enum):
     """Supported languages for transcription and summarization."""
     AZERBAIJANI = "az"
@@ -130,7 +156,37 @@ LANGUAGE_CONFIG = {
 
 DEFAULT_LANGUAGE = Language.AZERBAIJANI
 
-@app.get("/")
+def resolve_language(language: str) -> Language:
+    """
+    Validate the requested language code.
+    Falls back to the default language for unknown or invalid values.
+    """
+    try:
+        # Clean the language parameter
+        cleaned_language = language.lower().strip() if language else DEFAULT_LANGUAGE.value
+        logger.debug("Cleaned language parameter: '%s'", cleaned_language)
+        
+        # Validate against available languages
+        available_languages = [lang.value for lang in Language]
+        if cleaned_language not in available_languages:
+            logger.warning(f"Language '{cleaned_language}' not in available languages: {available_languages}")
+            logger.warning(f"Falling back to default: {DEFAULT_LANGUAGE.value}")
+            return DEFAULT_LANGUAGE
+
+        selected_language = Language(cleaned_language)
+        logger.debug("Validated language: '%s'", selected_language.value)
+        return selected_language
+
+    except ValueError as ve:
+        logger.error(f"ValueError in language validation: {str(ve)}")
+        logger.error(f"Input that caused error: '{language}'")
+        return DEFAULT_LANGUAGE
+    except Exception as e:
+        logger.error(f"Unexpected error in language validation: {str(e)}")
+        logger.error(f"Input that caused error: '{language}'")
+        return DEFAULT_LANGUAGE
+
+@router.get("/")
 async def root():
     logger.info("Root endpoint accessed")
     return {
@@ -138,13 +194,24 @@ async def root():
         "endpoints": {
             "/": "This help message",
             "/health": "Health check endpoint",
+            "/metrics": "Prometheus metrics",
             "/transcribe/": "Convert speech to text",
             "/summarize-audio/": "Transcribe and summarize audio content",
-            "/transcribe-live/": "Convert live recorded Azerbaijani speech to text"
+            "/transcribe-live/": "Convert live recorded Azerbaijani speech to text",
+            "/ws/transcribe-live": "Stream live recordings over WebSocket for incremental transcripts",
+            "/transcribe-long/": "Convert long recordings (meetings, lectures) to text",
+            "/transcribe-batch/": "Convert many files or a zip archive to text, streaming NDJSON results",
+            "/transcribe/stream/": "Convert speech to text, streaming the transcript as server-sent events",
+            "/summarize-audio/stream/": "Transcribe and summarize audio, streaming both as server-sent events",
+            "/summarize/stream/": "Summarize text, streaming the summary as server-sent events",
+            "/jobs/transcribe/": "Queue a transcription job and return its id",
+            "/jobs/summarize-audio/": "Queue a transcription and summarization job",
+            "/jobs/{job_id}": "Status, per-stage progress and result of a job",
+            "/jobs/{job_id}/events": "Server-sent progress events for a job"
         }
     }
 
-@app.get("/languages")
+@router.get("/languages")
 async def get_languages():
     """Get list of supported languages."""
     return {
@@ -158,134 +225,126 @@ async def get_languages():
         "default": DEFAULT_LANGUAGE.value
     }
 
-@app.post("/transcribe/")
+@router.post("/transcribe/")
 async def transcribe_audio_endpoint(
     file: UploadFile = File(...),
     language: str = Form(default=DEFAULT_LANGUAGE.value),
-    live_recording: bool = Form(default=False)
+    live_recording: bool = Form(default=False),
+    trim_silence: Optional[bool] = Form(default=None)
 ):
     """
     Endpoint for speech-to-text conversion.
     Supports multiple languages with Azerbaijani as default.
     Now properly handles form data parameters.
+    trim_silence overrides the SILENCE_TRIM setting for this request.
     """
     try:
-        # Log raw request details
-        logger.info("=== Transcription Request Details ===")
-        logger.info(f"Raw language parameter from form: '{language}'")
-        logger.info(f"Parameter type: {type(language)}")
-        logger.info(f"Default language: '{DEFAULT_LANGUAGE.value}'")
-        logger.info(f"Available languages: {[lang.value for lang in Language]}")
-        
+        logger.info("Transcription request: file=%s language=%r", file.filename, language)
+
         # Validate and process language parameter
-        try:
-            # Clean the language parameter
-            cleaned_language = language.lower().strip() if language else DEFAULT_LANGUAGE.value
-            logger.info(f"Cleaned language parameter: '{cleaned_language}'")
-            
-            # Validate against available languages
-            available_languages = [lang.value for lang in Language]
-            if cleaned_language not in available_languages:
-                logger.warning(f"Language '{cleaned_language}' not in available languages: {available_languages}")
-                logger.warning(f"Falling back to default: {DEFAULT_LANGUAGE.value}")
-                selected_language = DEFAULT_LANGUAGE
-            else:
-                selected_language = Language(cleaned_language)
-                logger.info(f"Successfully validated language: '{selected_language.value}'")
-                logger.info(f"Language details: {LANGUAGE_CONFIG[selected_language]}")
-        
-        except ValueError as ve:
-            logger.error(f"ValueError in language validation: {str(ve)}")
-            logger.error(f"Input that caused error: '{language}'")
-            selected_language = DEFAULT_LANGUAGE
-        except Exception as e:
-            logger.error(f"Unexpected error in language validation: {str(e)}")
-            logger.error(f"Input that caused error: '{language}'")
-            selected_language = DEFAULT_LANGUAGE
+        selected_language = resolve_language(language)
 
         # Process audio file
-        temp_path = await save_audio_file(file)
-        
-        # Log Whisper API preparation
-        logger.info("=== Whisper API Call Preparation ===")
-        logger.info(f"Selected language: '{selected_language.value}'")
-        logger.info(f"Whisper language code: '{LANGUAGE_CONFIG[selected_language]['whisper_code']}'")
-        logger.info(f"Using prompt: '{LANGUAGE_CONFIG[selected_language]['prompt']}'")
+        audio = await save_audio_file(file, trim_silence)
         
         # Transcribe with Whisper
         raw_transcript = await transcribe_audio(
-            temp_path, 
+            audio, 
             LANGUAGE_CONFIG[selected_language]["whisper_code"],
             LANGUAGE_CONFIG[selected_language]["prompt"]
         )
         
-        # Log raw transcript
-        logger.info("=== Raw Transcript ===")
-        logger.info(f"Length: {len(raw_transcript)} characters")
-        logger.info(f"First 100 chars: {raw_transcript[:100]}...")
-        
         # Correct the transcript
         corrected_transcript = await correct_transcript(
             raw_transcript, 
             selected_language
         )
         
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        # Log response preparation
-        logger.info("=== Preparing Response ===")
-        logger.info(f"Final language: '{selected_language.value}'")
-        logger.info(f"Transcript length: {len(corrected_transcript)} characters")
-        
-        return JSONResponse({
+        logger.info(
+            "Transcription done: language=%s raw=%d chars corrected=%d chars",
+            selected_language.value, len(raw_transcript), len(corrected_transcript)
+        )
+
+        response = {
             "success": True,
             "transcript": corrected_transcript,
             "language": selected_language.value,
             "requested_language": language  # Include the original requested language
-        })
+        }
+        if "trim_silence" in audio.stats.stages:
+            response["silence"] = audio.stats.silence_report()
+        return JSONResponse(response)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error("=== Transcription Error ===")
-        logger.error(f"Error type: {type(e).__name__}")
-        logger.error(f"Error message: {str(e)}")
-        logger.error("Full traceback:", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Transcription error: {str(e)}")
+        logger.error("Transcription error (%s): %s", type(e).__name__, e, exc_info=True)
+        raise http_error(e, "Transcription error")
 
-@app.post("/summarize-audio/")
-async def summarize_audio(file: UploadFile = File(...)):
+@router.post("/summarize-audio/")
+async def summarize_audio(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value),
+    mode: Optional[str] = Form(default=None)
+):
     """
     Endpoint for audio transcription and summarization.
+    mode chooses how correction and summary are scheduled: sequential,
+    concurrent or fused (defaults to SUMMARY_PIPELINE_MODE).
     """
     logger.info(f"Received summarization request: {file.filename}")
     
     try:
+        selected_language = resolve_language(language)
+        try:
+            pipeline_mode = resolve_mode(mode)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Process audio file
-        temp_path = await save_audio_file(file)
+        started = time.perf_counter()
+        audio = await save_audio_file(file)
+        decoded = time.perf_counter()
         
         # Transcribe
-        raw_transcript = await transcribe_audio(temp_path)
-        
-        # Correct the transcript
-        corrected_transcript = await correct_transcript(raw_transcript)
-        
-        # Generate summary
-        summary = await generate_summary(corrected_transcript)
+        raw_transcript = await transcribe_audio(
+            audio,
+            LANGUAGE_CONFIG[selected_language]["whisper_code"],
+            LANGUAGE_CONFIG[selected_language]["prompt"]
+        )
+        transcribed = time.perf_counter()
         
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        # Correct the transcript and generate the summary
+        result = await run_summary_pipeline(
+            raw_transcript,
+            correct=lambda text: correct_transcript(text, selected_language),
+            summarize=lambda text: generate_summary(text, selected_language.value),
+            fused=lambda text: correct_and_summarize(text, selected_language),
+            mode=pipeline_mode
+        )
+        finished = time.perf_counter()
+        logger.info(f"Summary pipeline ({result.mode}) timings: {result.timings}")
         
         return JSONResponse({
             "success": True,
-            "transcript": corrected_transcript,
-            "summary": summary
+            "transcript": result.transcript,
+            "summary": result.summary,
+            "language": selected_language.value,
+            "requested_language": language,
+            "pipeline": result.report(),
+            "timings": {
+                "decode_seconds": round(decoded - started, 3),
+                "transcribe_seconds": round(transcribed - decoded, 3),
+                "pipeline_seconds": round(finished - transcribed, 3),
+                "total_seconds": round(finished - started, 3)
+            }
         })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in summarization: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
+        raise http_error(e, "Summarization error")
 
-@app.post("/summarize/")
+@router.post("/summarize/")
 async def summarize_text(request: dict):
     """
     Endpoint for summarizing text directly.
@@ -303,72 +362,460 @@ async def summarize_text(request: dict):
         })
     except Exception as e:
         logger.error(f"Error in text summarization: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
+        raise http_error(e, "Summarization error")
 
-@app.post("/transcribe-live/")
+@router.post("/transcribe-live/")
 async def transcribe_live(
     file: UploadFile = File(...),
-    language: str = Form(default=DEFAULT_LANGUAGE.value)
+    language: str = Form(default=DEFAULT_LANGUAGE.value),
+    trim_silence: Optional[bool] = Form(default=None)
 ):
     """
     Endpoint specifically for live recorded speech.
     Now supports multiple languages and properly handles form data.
     """
-    return await transcribe_audio_endpoint(file, language, live_recording=True)
+    return await transcribe_audio_endpoint(file, language, live_recording=True, trim_silence=trim_silence)
 
-async def save_audio_file(file: UploadFile) -> str:
+@router.websocket("/ws/transcribe-live")
+async def transcribe_live_stream(websocket: WebSocket, language: str = DEFAULT_LANGUAGE.value):
     """
-    Save uploaded file and convert to WAV if necessary.
-    No enhancement, just basic format conversion if needed.
+    Streaming variant of /transcribe-live/.
+    The client sends audio chunks as binary messages while recording and a
+    {"type": "stop"} text message when done. Partial and corrected segments are
+    pushed back as they become available, followed by a "final" message.
     """
-    process_id = str(uuid.uuid4())
-    temp_path = os.path.join(TEMP_DIR, f"{process_id}_{file.filename}")
-    
+    await websocket.accept()
+    selected_language = resolve_language(language)
+    config = LANGUAGE_CONFIG[selected_language]
+    session = LiveSession(
+        session_id=str(uuid.uuid4()),
+        send=websocket.send_json,
+        transcribe=lambda payload, previous: transcribe_audio(
+            payload,
+            config["whisper_code"],
+            f"{config['prompt']} {previous}".strip()
+        ),
+        correct=lambda text: correct_transcript(text, selected_language)
+    )
+    session.start()
+    await session.send({"type": "ready", "language": selected_language.value})
+
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Check file size (25MB limit)
-        file_size_mb = len(content) / (1024 * 1024)  # Convert to MB
-        if file_size_mb > 25:
-            raise HTTPException(
-                status_code=413,
-                detail="Audio faylın həcmi 25MB-dan çox ola bilməz"
-            )
-            
-        with open(temp_path, "wb") as buffer:
-            buffer.write(content)
-        
-        # Load audio and check duration
-        audio = AudioSegment.from_file(temp_path)
-        duration_seconds = len(audio) / 1000  # Convert milliseconds to seconds
-        
-        if duration_seconds > 300:  # 5 minutes
-            os.remove(temp_path)
-            raise HTTPException(
-                status_code=400,
-                detail="Audio faylın uzunluğu 5 dəqiqədən çox ola bilməz"
+        while True:
+            # A recording that crosses the limits ends the session even while the client keeps sending
+            message = await session.guard(websocket.receive())
+            if message["type"] == "websocket.disconnect":
+                session.cancel()
+                return
+            if message.get("bytes"):
+                await session.append(message["bytes"])
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                break
+
+        result = await session.finish()
+        logger.info(f"Live session {session.session_id} finished: "
+                    f"{len(result['segments'])} segments, first text after {result['time_to_first_text']}s")
+        await session.send({"type": "final", "language": selected_language.value, **result})
+        await websocket.close()
+    except WebSocketDisconnect:
+        session.cancel()
+    except UploadTooLarge:
+        session.cancel()
+        await session.send({"type": "error", "detail": "Audio faylın həcmi 25MB-dan çox ola bilməz"})
+        await websocket.close(code=1009)
+    except AudioTooLong:
+        session.cancel()
+        await session.send({"type": "error", "detail": "Audio faylın uzunluğu 5 dəqiqədən çox ola bilməz"})
+        await websocket.close(code=1009)
+    except Exception as e:
+        session.cancel()
+        logger.error(f"Error in live transcription stream: {str(e)}", exc_info=True)
+        await session.send({"type": "error", "detail": f"Transcription error: {str(e)}"})
+        await websocket.close(code=1011)
+
+@router.post("/transcribe-long/")
+async def transcribe_long_endpoint(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value)
+):
+    """
+    Endpoint for long recordings such as meetings and lectures.
+    The audio is cut at silences and the chunks are transcribed and corrected
+    concurrently, then stitched back together in order.
+    """
+    try:
+        selected_language = resolve_language(language)
+        started = time.perf_counter()
+        audio = await save_long_audio_file(file)
+        decoded = time.perf_counter()
+
+        samples = pcm_samples(audio)
+        chunks = await asyncio.to_thread(plan_chunks, samples, audio.sample_rate)
+        logger.info(f"Long audio: {audio.duration_seconds:.1f}s split into {len(chunks)} chunks")
+
+        await transcribe_chunks(
+            samples,
+            chunks,
+            os.path.splitext(audio.filename)[0],
+            lambda payload: transcribe_audio(
+                payload,
+                LANGUAGE_CONFIG[selected_language]["whisper_code"],
+                LANGUAGE_CONFIG[selected_language]["prompt"]
             )
-        
-        # Convert to mono for consistent processing
-        audio = audio.set_channels(1)
-        
-        # Save as WAV without enhancement
-        wav_path = os.path.join(TEMP_DIR, f"{process_id}.wav")
-        audio.export(wav_path, format="wav")
-        
-        # Cleanup original file if it's different from the WAV path
-        if temp_path != wav_path:
-            os.remove(temp_path)
-            
-        return wav_path
+        )
+        transcribed = time.perf_counter()
+
+        texts = [text for text in dedupe_overlaps(chunks) if text]
+        corrected = await asyncio.gather(*(correct_transcript(text, selected_language) for text in texts))
+        finished = time.perf_counter()
+
+        return JSONResponse({
+            "success": True,
+            "transcript": "\n\n".join(corrected),
+            "language": selected_language.value,
+            "requested_language": language,
+            "duration_seconds": round(audio.duration_seconds, 3),
+            "chunks": [chunk.as_dict() for chunk in chunks],
+            "timings": {
+                "decode_seconds": round(decoded - started, 3),
+                "transcribe_seconds": round(transcribed - decoded, 3),
+                "correct_seconds": round(finished - transcribed, 3),
+                "total_seconds": round(finished - started, 3)
+            }
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in long audio transcription: {str(e)}", exc_info=True)
+        raise http_error(e, "Transcription error")
+
+@router.post("/transcribe-batch/")
+async def transcribe_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value),
+    trim_silence: Optional[bool] = Form(default=None)
+):
+    """
+    Transcribe many recordings in one request: several files and/or zip archives.
+    Files are decoded and transcribed concurrently, and one NDJSON line is
+    streamed back per file as soon as it is done (in completion order, with
+    its index in the batch), followed by a summary line.
+    """
+    selected_language = resolve_language(language)
+    try:
+        items = await read_batch(files, scratch)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail="Audio faylın həcmi 25MB-dan çox ola bilməz"
+        )
+    except BatchTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Faylların ümumi həcmi {BATCH_MAX_BYTES // (1024 * 1024)}MB-dan çox ola bilməz"
+        )
+    except TooManyFiles:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bir sorğuda {BATCH_MAX_FILES} fayldan çox göndərmək olmaz"
+        )
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    except ScratchFull as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "30"}
+        )
+    logger.info(f"Batch transcription of {len(items)} files")
+
+    async def decode(item: BatchItem) -> AudioPayload:
+        # Only the files being decoded are read back into memory
+        data = await asyncio.to_thread(item.file.read_bytes)
+        return await decode_buffered_audio(data, f"batch_{uuid.uuid4()}_{item.index}", trim_silence)
+
+    async def transcribe(item: BatchItem, audio: AudioPayload) -> dict:
+        raw_transcript = await transcribe_audio(
+            audio,
+            LANGUAGE_CONFIG[selected_language]["whisper_code"],
+            LANGUAGE_CONFIG[selected_language]["prompt"]
+        )
+        return {"transcript": await correct_transcript(raw_transcript, selected_language)}
+
+    async def lines():
+        started = time.perf_counter()
+        succeeded = 0
+        async for result in run_batch(items, decode, transcribe):
+            succeeded += result["success"]
+            yield json.dumps({"type": "result", **result}, ensure_ascii=False) + "\n"
+        elapsed = time.perf_counter() - started
+        summary = {
+            "type": "summary",
+            "files": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "language": selected_language.value,
+            "total_seconds": round(elapsed, 3),
+            "files_per_minute": round(len(items) / elapsed * 60, 1) if elapsed else None
+        }
+        logger.info(f"Batch finished: {summary}")
+        yield json.dumps(summary, ensure_ascii=False) + "\n"
+
+    # The response owns the spooled files from here on, whether or not its body is ever sent
+    return ClosingStreamingResponse(lines(), lambda: close_items(items), media_type="application/x-ndjson")
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that runs close() when it is done, however it ends:
+    unlike a background task this also happens when the client disconnects
+    before or while the body is sent.
+    """
+
+    def __init__(self, content, close, **kwargs):
+        super().__init__(content, **kwargs)
+        self._close = close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._close()
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events: AsyncIterator[str], error_prefix: str = "Error") -> StreamingResponse:
+    """
+    Stream server-sent events. Once the response has started, failures can no
+    longer change the status code, so they are reported as an error event.
+    """
+    async def guarded():
+        try:
+            async for event in events:
+                yield event
+        except Exception as e:
+            logger.error(f"{error_prefix}: {str(e)}", exc_info=True)
+            yield sse_event("error", {"detail": f"{error_prefix}: {getattr(e, 'detail', None) or str(e)}"})
+
+    return StreamingResponse(
+        guarded(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class StreamTimings:
+    """Stage durations, time to first text and total latency of a streamed response."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.mark = started
+        self.values: Dict[str, float] = {}
+
+    def stage(self, name: str):
+        now = time.perf_counter()
+        self.values[f"{name}_seconds"] = round(now - self.mark, 3)
+        self.mark = now
+
+    def first_text(self):
+        self.values.setdefault("time_to_first_text", round(time.perf_counter() - self.started, 3))
+
+    def first_token(self):
+        self.first_text()
+        self.values.setdefault("time_to_first_token", round(time.perf_counter() - self.started, 3))
+
+    def finish(self) -> Dict[str, float]:
+        self.values["total_seconds"] = round(time.perf_counter() - self.started, 3)
+        return self.values
+
+async def stream_tokens(field: str, stage: str, request: dict, parts: List[str], timings: StreamTimings) -> AsyncIterator[str]:
+    """Forward a streamed completion as token events, collecting the text into parts."""
+    with span(stage):
+        async for delta in stream_chat_completion(stage, **request):
+            timings.first_token()
+            parts.append(delta)
+            yield sse_event("token", {"field": field, "text": delta})
+    timings.stage(stage)
+
+@router.post("/transcribe/stream/")
+async def transcribe_stream_endpoint(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value),
+    trim_silence: Optional[bool] = Form(default=None)
+):
+    """
+    Like /transcribe/, but the result is sent as server-sent events: the raw
+    Whisper transcript first, then the correction token by token as GPT-4o
+    writes it, and finally a "done" event with the full response and timings.
+    """
+    timings = StreamTimings(time.perf_counter())
+    selected_language = resolve_language(language)
+    # Decoding errors are still returned as regular HTTP errors, like those of /transcribe/
+    try:
+        audio = await save_audio_file(file, trim_silence)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Transcription error (%s): %s", type(e).__name__, e, exc_info=True)
+        raise http_error(e, "Transcription error")
+    timings.stage("decode")
+
+    async def events():
+        raw_transcript = await transcribe_audio(
+            audio,
+            LANGUAGE_CONFIG[selected_language]["whisper_code"],
+            LANGUAGE_CONFIG[selected_language]["prompt"]
+        )
+        timings.stage("transcribe")
+        timings.first_text()
+        yield sse_event("raw_transcript", {"text": raw_transcript})
+
+        parts: List[str] = []
+        async for event in stream_tokens(
+            "transcript", "correction", correction_request(raw_transcript, selected_language), parts, timings
+        ):
+            yield event
+
+        response = {
+            "success": True,
+            "transcript": "".join(parts).strip(),
+            "language": selected_language.value,
+            "requested_language": language
+        }
+        if "trim_silence" in audio.stats.stages:
+            response["silence"] = audio.stats.silence_report()
+        response["timings"] = timings.finish()
+        logger.info(f"Streamed transcription timings: {response['timings']}")
+        yield sse_event("done", response)
+
+    return sse_response(events(), "Transcription error")
+
+@router.post("/summarize-audio/stream/")
+async def summarize_audio_stream(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value)
+):
+    """
+    Like /summarize-audio/, but the corrected transcript and then the summary
+    are streamed token by token as server-sent events.
+    """
+    timings = StreamTimings(time.perf_counter())
+    selected_language = resolve_language(language)
+    try:
+        audio = await save_audio_file(file)
     except HTTPException:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         raise
     except Exception as e:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        logger.error(f"Error in summarization: {str(e)}", exc_info=True)
+        raise http_error(e, "Summarization error")
+    timings.stage("decode")
+
+    async def events():
+        raw_transcript = await transcribe_audio(
+            audio,
+            LANGUAGE_CONFIG[selected_language]["whisper_code"],
+            LANGUAGE_CONFIG[selected_language]["prompt"]
+        )
+        timings.stage("transcribe")
+        timings.first_text()
+        yield sse_event("raw_transcript", {"text": raw_transcript})
+
+        transcript_parts: List[str] = []
+        async for event in stream_tokens(
+            "transcript", "correction", correction_request(raw_transcript, selected_language), transcript_parts, timings
+        ):
+            yield event
+        corrected_transcript = "".join(transcript_parts).strip()
+
+        summary_parts: List[str] = []
+        async for event in stream_tokens(
+            "summary", "summary", summary_request(corrected_transcript, selected_language.value), summary_parts, timings
+        ):
+            yield event
+
+        response = {
+            "success": True,
+            "transcript": corrected_transcript,
+            "summary": "".join(summary_parts).strip(),
+            "language": selected_language.value,
+            "timings": timings.finish()
+        }
+        logger.info(f"Streamed summarization timings: {response['timings']}")
+        yield sse_event("done", response)
+
+    return sse_response(events(), "Summarization error")
+
+@router.post("/summarize/stream/")
+async def summarize_text_stream(request: dict):
+    """
+    Like /summarize/, but the summary is streamed token by token as server-sent events.
+    Expects a JSON payload with a 'text' field and an optional 'language'.
+    """
+    if not request.get('text'):
+        raise HTTPException(status_code=400, detail="Text field is required")
+    timings = StreamTimings(time.perf_counter())
+    language = request.get('language', DEFAULT_LANGUAGE.value)
+
+    async def events():
+        parts: List[str] = []
+        async for event in stream_tokens("summary", "summary", summary_request(request['text'], language), parts, timings):
+            yield event
+        response = {
+            "success": True,
+            "summary": "".join(parts).strip(),
+            "timings": timings.finish()
+        }
+        logger.info(f"Streamed summary timings: {response['timings']}")
+        yield sse_event("done", response)
+
+    return sse_response(events(), "Summarization error")
+
+async def prepare_upload(file, process_id: str, trim_silence: Optional[bool] = None,
+                         max_bytes: int = MAX_UPLOAD_BYTES) -> AudioPayload:
+    """
+    Decode an upload and encode it compactly for Whisper. Uploads that are
+    already mono Ogg Opus at the upstream sample rate (e.g. compacted by the
+    web client) are sent as they are, unless silence has to be trimmed, which
+    needs the decoded PCM.
+    """
+    if trim_silence is None:
+        trim_silence = SILENCE_TRIM
+    with span("decode"):
+        if trim_silence:
+            audio = await ingest_upload(file, process_id, max_bytes)
+        else:
+            audio = await ingest_normalized(file, process_id, UPSTREAM_SAMPLE_RATE, max_bytes)
+    PAYLOAD_BYTES.observe(audio.stats.input_bytes, kind="upload")
+    if not audio.is_pcm:
+        UPLOADS.inc(path="kept")
+        return audio
+    UPLOADS.inc(path="encoded")
+    with span("encode"):
+        return await encode_for_upstream(audio, trim_silence=trim_silence)
+
+async def save_audio_file(file: UploadFile, trim_silence: Optional[bool] = None) -> AudioPayload:
+    """
+    Decode the uploaded file in memory and encode it compactly for Whisper.
+    The upload is streamed straight into ffmpeg, no temp files are written.
+    Silence is trimmed when enabled by trim_silence or the SILENCE_TRIM setting.
+    Already normalized uploads skip the conversion, see prepare_upload().
+    """
+    process_id = str(uuid.uuid4())
+    
+    try:
+        return await prepare_upload(file, process_id, trim_silence)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail="Audio faylın həcmi 25MB-dan çox ola bilməz"
+        )
+    except AudioTooLong:
+        raise HTTPException(
+            status_code=400,
+            detail="Audio faylın uzunluğu 5 dəqiqədən çox ola bilməz"
+        )
+    except Exception as e:
         if "Maximum content size limit" in str(e):
             raise HTTPException(
                 status_code=413,
@@ -376,57 +823,246 @@ async def save_audio_file(file: UploadFile) -> str:
             )
         raise e
 
-async def transcribe_audio(file_path: str, language_code: str, prompt: str) -> str:
+async def read_job_upload(file: UploadFile) -> ScratchFile:
+    """
+    Spool an upload for a background job to scratch space, so queued jobs do
+    not hold their audio in memory. Oversized files are rejected before the
+    job is queued; the caller owns the returned file and must close it.
+    """
+    try:
+        return await scratch.write_upload(file, MAX_UPLOAD_BYTES, suffix=os.path.splitext(file.filename or "")[1])
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail="Audio faylın həcmi 25MB-dan çox ola bilməz"
+        )
+    except ScratchFull as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "30"}
+        )
+
+async def decode_buffered_audio(data: bytes, process_id: str, trim_silence: Optional[bool] = None) -> AudioPayload:
+    """Decode an upload buffered for a job or batch and encode it for Whisper, like save_audio_file."""
+    try:
+        return await prepare_upload(BytesReader(data), process_id, trim_silence, max_bytes=len(data))
+    except AudioTooLong:
+        raise HTTPException(
+            status_code=400,
+            detail="Audio faylın uzunluğu 5 dəqiqədən çox ola bilməz"
+        )
+
+async def save_long_audio_file(file: UploadFile) -> AudioPayload:
+    """
+    Decode a long recording to 16 kHz mono PCM held in memory.
+    Limits are the long-audio ones; the audio is encoded later, chunk by chunk.
+    """
+    process_id = str(uuid.uuid4())
+    max_mb = LONG_AUDIO_MAX_BYTES // (1024 * 1024)
+    max_minutes = int(LONG_AUDIO_MAX_SECONDS // 60)
+    
+    try:
+        return await ingest_upload(
+            file,
+            process_id,
+            max_bytes=LONG_AUDIO_MAX_BYTES,
+            max_duration=LONG_AUDIO_MAX_SECONDS,
+            sample_rate=UPSTREAM_SAMPLE_RATE
+        )
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio faylın həcmi {max_mb}MB-dan çox ola bilməz"
+        )
+    except AudioTooLong:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Audio faylın uzunluğu {max_minutes} dəqiqədən çox ola bilməz"
+        )
+
+def http_error(e: Exception, prefix: str) -> HTTPException:
+    """
+    The HTTP error for a failed request: 503 with Retry-After while the
+    upstream is unavailable (open circuit, or still failing after retries),
+    500 for anything else.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, CircuitOpen) or is_retryable(e):
+        retry_after = e.retry_after if isinstance(e, CircuitOpen) else retry_after_seconds(e) or RETRY_MAX_DELAY
+        return HTTPException(
+            status_code=503,
+            detail="Upstream service is temporarily unavailable, please retry later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    return HTTPException(status_code=500, detail=f"{prefix}: {str(e)}")
+
+async def create_transcription(hedge: bool = False, **kwargs):
+    """
+    Call the Whisper API without blocking the event loop.
+    Concurrency is bounded per model by the shared limiter; transient
+    failures are retried (and short calls optionally hedged) by resilience.
+    """
+    model = kwargs["model"]
+    filename, buffer, content_type = kwargs.pop("file")
+
+    async def attempt():
+        # Hedged attempts run concurrently, so each needs its own read position
+        upload = io.BytesIO(buffer.getbuffer()) if hedge else buffer
+        upload.seek(0)
+        async with model_limiter.limit(model):
+            with upstream_call(model):
+                return await client.audio.transcriptions.create(file=(filename, upload, content_type), **kwargs)
+
+    return await resilience.call(model, attempt, hedge=hedge)
+
+async def create_chat_completion(**kwargs):
+    """
+    Call the chat completion API without blocking the event loop.
+    Concurrency is bounded per model by the shared limiter; transient
+    failures are retried (and short calls optionally hedged) by resilience.
+    """
+    model = kwargs["model"]
+
+    async def attempt():
+        async with model_limiter.limit(model):
+            with upstream_call(model):
+                return await client.chat.completions.create(**kwargs)
+
+    response = await resilience.call(model, attempt, hedge=hedge_completion(kwargs))
+    record_usage(model, getattr(response, "usage", None))
+    return response
+
+async def cached_chat_completion(stage: str, **kwargs) -> str:
+    """
+    Run a chat completion through the result cache.
+    The key covers the model, prompt, input text and sampling parameters.
+    """
+    async def complete():
+        response = await create_chat_completion(**kwargs)
+        return response.choices[0].message.content.strip()
+
+    return await result_cache.get_or_compute(cache_key(stage, kwargs), complete)
+
+async def stream_chat_completion(stage: str, **kwargs) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as it is generated, yielding text deltas.
+    Shares cache entries with cached_chat_completion: a cached result is
+    replayed as a single delta and a finished stream is stored for reuse.
+    """
+    key = cache_key(stage, kwargs)
+    cached = await result_cache.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+
+    model = kwargs["model"]
+
+    async def attempt():
+        # Like create_chat_completion, each attempt holds its own slot: none is held during backoff
+        call = AsyncExitStack()
+        await call.enter_async_context(model_limiter.limit(model))
+        call.enter_context(upstream_call(model))
+        try:
+            stream = await client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+        except BaseException:
+            await call.__aexit__(*sys.exc_info())
+            raise
+        call.push_async_callback(stream.response.aclose)
+        return stream, call
+
+    # Only opening the stream is retried; a stream failing midway has already yielded text
+    stream, call = await resilience.call(model, attempt)
+    deltas: asyncio.Queue = asyncio.Queue()
+
+    async def drain():
+        # The upstream is read at its own pace, so a slow client does not keep the slot
+        try:
+            async with call:
+                async for chunk in stream:
+                    # The final chunk carries token usage and no choices
+                    record_usage(model, getattr(chunk, "usage", None))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        deltas.put_nowait(chunk.choices[0].delta.content)
+            deltas.put_nowait(None)
+        except Exception as e:
+            deltas.put_nowait(e)
+
+    reader = asyncio.create_task(drain())
+    parts = []
+    try:
+        while True:
+            delta = await deltas.get()
+            if delta is None:
+                break
+            if isinstance(delta, Exception):
+                raise delta
+            parts.append(delta)
+            yield delta
+    finally:
+        reader.cancel()
+    await result_cache.store(key, "".join(parts).strip())
+
+async def transcribe_audio(audio: AudioPayload, language_code: str, prompt: str) -> str:
     """
     Transcribe audio using Whisper API.
     Optimized for specified language with custom prompt.
     """
     try:
-        with open(file_path, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
+        async def whisper():
+            return await create_transcription(
+                hedge=hedge_transcription(audio.duration_seconds),
                 model="whisper-1",
-                file=audio_file,
+                file=audio.as_file(),
                 response_format="text",
                 language=language_code,
                 prompt=prompt
             )
+
+        AUDIO_SECONDS.observe(audio.duration_seconds, language=language_code)
+        PAYLOAD_BYTES.observe(audio.size, kind="upstream")
+        with span("transcribe", language_code):
+            if audio.content_hash:
+                key = cache_key("transcript", audio.content_hash, audio.sample_rate, language_code, prompt, "whisper-1")
+                response = await result_cache.get_or_compute(key, whisper)
+            else:
+                response = await whisper()
         
-        logger.info(f"=== Raw Whisper Transcript (Language: {language_code}) ===")
-        logger.info(response)
+        logger.info("Raw Whisper transcript (%s): %s", language_code, payload(response))
         return response
 
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         raise e
 
-async def generate_summary(transcript: str, language: str = DEFAULT_LANGUAGE.value) -> str:
-    """
-    Generate a summary of the transcribed text using GPT-4o.
-    Now supports multiple languages.
-    """
+def summary_request(transcript: str, language: str = DEFAULT_LANGUAGE.value) -> dict:
+    """Chat completion arguments for summarizing a transcript in the given language."""
+    # Get language enum
     try:
-        # Get language enum
-        try:
-            selected_language = Language(language)
-        except ValueError:
-            selected_language = DEFAULT_LANGUAGE
-
-        # Language-specific instructions
-        language_instructions = {
-            Language.AZERBAIJANI: "Generate a concise and accurate summary in Azerbaijani.",
-            Language.ENGLISH: "Generate a concise and accurate summary in English.",
-            Language.TURKISH: "Generate a concise and accurate summary in Turkish.",
-            Language.FRENCH: "Generate a concise and accurate summary in French.",
-            Language.ARABIC: "Generate a concise and accurate summary in Arabic.",
-            Language.CHINESE: "Generate a concise and accurate summary in Chinese."
-        }
+        selected_language = Language(language)
+    except ValueError:
+        selected_language = DEFAULT_LANGUAGE
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""You are an expert in {LANGUAGE_CONFIG[selected_language]['name']} and summarization.
+    # Language-specific instructions
+    language_instructions = {
+        Language.AZERBAIJANI: "Generate a concise and accurate summary in Azerbaijani.",
+        Language.ENGLISH: "Generate a concise and accurate summary in English.",
+        Language.TURKISH: "Generate a concise and accurate summary in Turkish.",
+        Language.FRENCH: "Generate a concise and accurate summary in French.",
+        Language.ARABIC: "Generate a concise and accurate summary in Arabic.",
+        Language.CHINESE: "Generate a concise and accurate summary in Chinese."
+    }
+
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system", 
+                "content": f"""You are an expert in {LANGUAGE_CONFIG[selected_language]['name']} and summarization.
                                 Your task is to:
                                 - {language_instructions.get(selected_language, language_instructions[DEFAULT_LANGUAGE])}
                                 - Maintain key terminology and cultural context.
@@ -438,42 +1074,55 @@ async def generate_summary(transcript: str, language: str = DEFAULT_LANGUAGE.val
                                 - Avoid unnecessary repetition.
                                 
                                 Return ONLY the summary in the target language, without additional explanations."""
-                },
-                {
-                    "role": "user", 
-                    "content": f"Provide a concise summary of this text:\n\n{transcript}"
-                }
-            ],
-            temperature=0.5,
-            max_tokens=300
-        )
-        return response.choices[0].message.content.strip()
+            },
+            {
+                "role": "user", 
+                "content": f"Provide a concise summary of this text:\n\n{transcript}"
+            }
+        ],
+        temperature=0.5,
+        max_tokens=300
+    )
+
+async def generate_summary(transcript: str, language: str = DEFAULT_LANGUAGE.value) -> str:
+    """
+    Generate a summary of the transcribed text using GPT-4o.
+    Now supports multiple languages.
+    """
+    try:
+        with span("summary", language):
+            return await cached_chat_completion("summary", **summary_request(transcript, language))
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}", exc_info=True)
         raise e
 
-async def correct_transcript(transcript: str, language: Language) -> str:
+def correction_request(
+    transcript: str,
+    language: Language,
+    context: str = "",
+    max_tokens: Optional[int] = None
+) -> dict:
     """
-    Correct the transcribed text using GPT-4o to fix any voice-to-text errors and improve formatting.
-    Now supports multiple languages.
+    Chat completion arguments for correcting a raw Whisper transcript.
+    context is preceding text shown for continuity when correcting a segment.
+    max_tokens defaults to a budget sized from the transcript length.
     """
-    try:
-        # Language-specific system prompts
-        language_prompts = {
-            Language.AZERBAIJANI: "You are an expert in Azerbaijani language, phonetics, and natural speech processing.",
-            Language.ENGLISH: "You are an expert in English language, phonetics, and natural speech processing.",
-            Language.TURKISH: "You are an expert in Turkish language, phonetics, and natural speech processing.",
-            Language.FRENCH: "You are an expert in French language, phonetics, and natural speech processing.",
-            Language.ARABIC: "You are an expert in Arabic language, phonetics, and natural speech processing.",
-            Language.CHINESE: "You are an expert in Chinese language, phonetics, and natural speech processing."
-        }
+    # Language-specific system prompts
+    language_prompts = {
+        Language.AZERBAIJANI: "You are an expert in Azerbaijani language, phonetics, and natural speech processing.",
+        Language.ENGLISH: "You are an expert in English language, phonetics, and natural speech processing.",
+        Language.TURKISH: "You are an expert in Turkish language, phonetics, and natural speech processing.",
+        Language.FRENCH: "You are an expert in French language, phonetics, and natural speech processing.",
+        Language.ARABIC: "You are an expert in Arabic language, phonetics, and natural speech processing.",
+        Language.CHINESE: "You are an expert in Chinese language, phonetics, and natural speech processing."
+    }
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""{language_prompts.get(language, language_prompts[DEFAULT_LANGUAGE])}
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": f"""{language_prompts.get(language, language_prompts[DEFAULT_LANGUAGE])}
                     Your task is to correct errors in a voice-to-text transcript while keeping the spoken structure intact.
 
                     **Key Instructions:**
@@ -492,37 +1141,259 @@ async def correct_transcript(transcript: str, language: Language) -> str:
                     - When in doubt, prioritize grammatical accuracy while preserving the original wording.
 
                     Return only the corrected transcript with proper formatting. No explanations."""
-                },
-                {
-                    "role": "user", 
-                    "content": f"Correct and format this voice-to-text transcription:\n\n{transcript}"
-                }
-            ],
-            temperature=0.3,
-            max_tokens=2000
-        )
-        
-        corrected_text = response.choices[0].message.content.strip()
+            },
+            {
+                "role": "user", 
+                "content": (
+                    f"Preceding text, for context only. Do not correct or repeat it:\n\n{context}\n\n" if context else ""
+                ) + f"Correct and format this voice-to-text transcription:\n\n{transcript}"
+            }
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens or correction_max_tokens(transcript)
+    )
+
+async def correct_transcript(transcript: str, language: Language) -> str:
+    """
+    Correct the transcribed text using GPT-4o to fix any voice-to-text errors and improve formatting.
+    Now supports multiple languages.
+    Long transcripts are corrected in concurrent segments (see CORRECTION_MODE).
+    """
+    try:
+        with span("correction", language.value):
+            corrected_text = await correct_segmented(
+                transcript,
+                lambda text, context, max_tokens: cached_chat_completion(
+                    "correction", **correction_request(text, language, context, max_tokens)
+                )
+            )
         
-        # Always log raw and corrected versions
-        logger.info("Raw transcript: " + transcript)
-        logger.info("Corrected transcript: " + corrected_text)
+        # Cut to LOG_PAYLOAD_CHARS and sampled by LOG_PAYLOAD_SAMPLE_RATE
+        logger.info("Raw transcript: %s", payload(transcript))
+        logger.info("Corrected transcript: %s", payload(corrected_text))
         
         return corrected_text
         
     except Exception as e:
-        logger.error(f"Correction error: {str(e)}")
-        raise e
+        if not CORRECTION_FALLBACK:
+            logger.error(f"Correction error: {str(e)}")
+            raise e
+        # The transcription already succeeded; keep it rather than failing the request
+        logger.warning(f"Correction failed, returning the raw transcript: {str(e)}")
+        return transcript
+
+def fused_request(transcript: str, language: Language) -> dict:
+    """
+    Chat completion arguments for correcting a transcript and summarizing it in
+    a single call. The correction and summary instructions are reused verbatim.
+    """
+    correction = correction_request(transcript, language)
+    summary = summary_request(transcript, language.value)
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": "You will receive a voice-to-text transcript and must do two things.\n\n"
+                           "1. Correct the transcript following these instructions:\n"
+                           f"{correction['messages'][0]['content']}\n\n"
+                           "2. Summarize the corrected transcript following these instructions:\n"
+                           f"{summary['messages'][0]['content']}\n\n"
+                           "Respond with a JSON object with exactly two string fields: "
+                           "\"transcript\" (the corrected transcript) and \"summary\". "
+                           "The instructions about what to return apply to the values of these fields."
+            },
+            {
+                "role": "user",
+                "content": f"Correct, format and summarize this voice-to-text transcription:\n\n{transcript}"
+            }
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+        max_tokens=correction["max_tokens"] + summary["max_tokens"]
+    )
+
+def parse_fused_output(content: str) -> Tuple[str, str]:
+    try:
+        data = json.loads(content)
+        return data["transcript"].strip(), data["summary"].strip()
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise FusedOutputError(f"Unexpected fused output: {str(e)}")
+
+async def correct_and_summarize(transcript: str, language: Language) -> Tuple[str, str]:
+    """
+    Corrected transcript and summary from one GPT-4o call. Transcripts the
+    correction planner would split raise FusedTooLong: one call could not
+    return their correction without truncating it.
+    """
+    segments = plan_segments(transcript)
+    if len(segments) > 1:
+        raise FusedTooLong(f"Transcript needs {len(segments)} correction segments")
+    request = fused_request(transcript, language)
+
+    async def complete():
+        response = await create_chat_completion(**request)
+        content = response.choices[0].message.content.strip()
+        # Unusable output is rejected before it can be cached
+        parse_fused_output(content)
+        return content
 
-@app.get("/health")
+    with span("fused", language.value):
+        content = await result_cache.get_or_compute(cache_key("fused", request), complete)
+    return parse_fused_output(content)
+
+@router.post("/jobs/transcribe/", status_code=202)
+async def submit_transcription_job(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value),
+    trim_silence: Optional[bool] = Form(default=None)
+):
+    """
+    Queue a transcription and return immediately with a job id.
+    Poll /jobs/{job_id} or follow /jobs/{job_id}/events for progress and the result.
+    """
+    selected_language = resolve_language(language)
+    upload = await read_job_upload(file)
+    return await submit_job(
+        "transcribe",
+        lambda ctx: run_transcription_job(ctx, upload, selected_language, trim_silence, summarize=False),
+        {"filename": file.filename, "language": selected_language.value, "trim_silence": trim_silence},
+        upload
+    )
+
+@router.post("/jobs/summarize-audio/", status_code=202)
+async def submit_summarization_job(
+    file: UploadFile = File(...),
+    language: str = Form(default=DEFAULT_LANGUAGE.value)
+):
+    """Queue a transcription followed by a summary and return immediately with a job id."""
+    selected_language = resolve_language(language)
+    upload = await read_job_upload(file)
+    return await submit_job(
+        "summarize-audio",
+        lambda ctx: run_transcription_job(ctx, upload, selected_language, None, summarize=True),
+        {"filename": file.filename, "language": selected_language.value},
+        upload
+    )
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Current status, per-stage progress and, once finished, the result of a job."""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return JSONResponse(job)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events with the job record each time it changes.
+    The stream ends once the job has completed or failed.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        # The store is polled so any worker can serve the stream when it is shared
+        last_update = None
+        while True:
+            current = await job_manager.get(job_id)
+            if current is None:
+                yield sse_event("expired", {})
+                return
+            if current["updated_at"] != last_update:
+                last_update = current["updated_at"]
+                yield sse_event(current["status"], current)
+            if current["status"] in FINISHED:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return sse_response(events(), "Job events error")
+
+async def submit_job(kind: str, handler, params: dict, upload: ScratchFile) -> JSONResponse:
+    """Queue a job; its spooled upload is deleted here if the job cannot be queued, else by the job."""
+    try:
+        job = await job_manager.submit(kind, handler, params)
+    except BaseException as e:
+        upload.close()
+        if not isinstance(e, QueueFull):
+            raise
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "10"}
+        )
+    status_url = f"/jobs/{job['id']}"
+    return JSONResponse(
+        {
+            "success": True,
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": status_url,
+            "events_url": f"{status_url}/events"
+        },
+        status_code=202,
+        headers={"Location": status_url}
+    )
+
+async def run_transcription_job(
+    ctx: JobContext,
+    upload: ScratchFile,
+    language: Language,
+    trim_silence: Optional[bool],
+    summarize: bool
+) -> dict:
+    """The /transcribe/ (and optionally summary) pipeline, run by a job worker stage by stage."""
+    bind_request_id(ctx.job_id)
+    async with ctx.stage("decode"):
+        # The spooled upload is deleted as soon as it has been read, whatever happens next
+        with upload:
+            data = await asyncio.to_thread(upload.read_bytes)
+        audio = await decode_buffered_audio(data, ctx.job_id, trim_silence)
+    async with ctx.stage("transcribe"):
+        raw_transcript = await transcribe_audio(
+            audio,
+            LANGUAGE_CONFIG[language]["whisper_code"],
+            LANGUAGE_CONFIG[language]["prompt"]
+        )
+    async with ctx.stage("correct"):
+        corrected_transcript = await correct_transcript(raw_transcript, language)
+
+    result = {
+        "success": True,
+        "transcript": corrected_transcript,
+        "language": language.value
+    }
+    if "trim_silence" in audio.stats.stages:
+        result["silence"] = audio.stats.silence_report()
+    if summarize:
+        async with ctx.stage("summarize"):
+            result["summary"] = await generate_summary(corrected_transcript, language.value)
+    return result
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this worker process."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/health")
 async def health_check():
     """
     Enhanced health check endpoint.
     """
-    logger.info("Health check endpoint accessed")
+    logger.debug("Health check endpoint accessed")
     return {
         "status": "healthy",
-        "openai_api": "configured" if client.api_key else "missing",
+        "openai_api": "configured" if client is not None and client.api_key else "missing",
+        "upstream": model_limiter.stats(),
+        "cache": result_cache.stats(),
+        "jobs": await job_manager.stats(),
+        "admission": admission.stats(),
+        "resilience": resilience.stats(),
+        "scratch": scratch.stats(),
+        "logging": log_state.stats(),
         "features": {
             "azerbaijani_transcription": True,
             "audio_summarization": True,
@@ -535,7 +1406,7 @@ async def health_check():
     }
 
 # Add a redirect for backward compatibility
-@app.post("/transcribe-azerbaijani/")
+@router.post("/transcribe-azerbaijani/")
 async def transcribe_azerbaijani_legacy(
     file: UploadFile = File(...),
     language: str = DEFAULT_LANGUAGE.value,
@@ -543,4 +1414,69 @@ async def transcribe_azerbaijani_legacy(
 ):
     """Legacy endpoint that redirects to the new transcribe endpoint."""
     logger.warning("Legacy endpoint /transcribe-azerbaijani/ was called. Please update to use /transcribe/")
-    return await transcribe_audio_endpoint(file, language, live_recording) 
\ No newline at end of file
+    return await transcribe_audio_endpoint(file, language, live_recording, trim_silence=None) 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-process startup: build the upstream connection pool and pre-warm it in
+    the background, start the job workers and the scratch janitor; undo all of
+    it on shutdown. Heavy imports that only some requests need are loaded in a
+    thread before the worker accepts traffic: this delays readiness by about a
+    second, but an import running next to the first request would hold the GIL
+    and slow that request down by more.
+    """
+    global http_client, client
+    warmup = None
+    if client is None:
+        http_client, client = configure_upstream()
+        warmup = asyncio.create_task(prewarm(http_client, str(client.base_url)))
+    job_manager.start()
+    scratch.start()
+    await asyncio.to_thread(preload_resampler)
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+        await job_manager.stop()
+        await scratch.stop()
+        if http_client is not None:
+            await http_client.aclose()
+            http_client = client = None
+
+def create_app() -> FastAPI:
+    """
+    Application factory, e.g. `uvicorn main:create_app --factory --workers 4`.
+    Connection pools and workers are only created by lifespan(), in each
+    server process, so the app can be built before the processes are forked.
+    """
+    application = FastAPI(title="Azerbaijani Speech Recognition & Audio Summarizer API", lifespan=lifespan)
+
+    application.add_middleware(AdmissionMiddleware, controller=admission)
+    # Reject oversized bodies from Content-Length (or while streaming) before they are read or admitted
+    application.add_middleware(
+        BodyLimitMiddleware,
+        default=MAX_UPLOAD_BYTES,
+        limits={"/transcribe-long/": LONG_AUDIO_MAX_BYTES, "/transcribe-batch/": BATCH_MAX_BYTES}
+    )
+    # Request metrics and the optional Server-Timing header
+    application.add_middleware(MetricsMiddleware)
+    # Request ids for log records, seen by every layer below
+    application.add_middleware(RequestIdMiddleware)
+    # CORS goes outermost: responses produced by the inner layers (429/503 from admission control,
+    # 413 from the body limit) must carry CORS headers, or browsers hide their status from the client
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["*"]
+    )
+
+    application.include_router(router)
+    return application
+
+# The default application, for `uvicorn main:app`
+app = create_app()
@@ -0,0 +1,262 @@
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Instrumentation configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BYTES_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(8))  # 16 KiB .. 256 MiB
+AUDIO_BUCKETS = (5, 15, 30, 60, 120, 300, 900, 1800, 3600, 14400)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Base for metrics rendered in the Prometheus text exposition format."""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Metric):
+    """A value read when metrics are rendered."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.read())}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+
+def register(metric: Metric) -> Metric:
+    REGISTRY.append(metric)
+    return metric
+
+
+REQUESTS = register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("route", "method", "status")))
+REQUEST_SECONDS = register(Histogram(
+    "http_request_duration_seconds", "Time until the response was complete.", ("route", "method")))
+STAGE_SECONDS = register(Histogram(
+    "pipeline_stage_duration_seconds", "Duration of each pipeline stage.", ("stage", "language")))
+STAGE_ERRORS = register(Counter(
+    "pipeline_stage_errors_total", "Pipeline stages that raised an error.", ("stage", "language")))
+AUDIO_SECONDS = register(Histogram(
+    "audio_duration_seconds", "Length of audio sent for transcription.", ("language",), AUDIO_BUCKETS))
+PAYLOAD_BYTES = register(Histogram(
+    "audio_payload_bytes", "Size of uploaded audio and of the audio sent upstream.", ("kind",), BYTES_BUCKETS))
+UPLOADS = register(Counter(
+    "audio_uploads_total", "Uploads by preparation: re-encoded, or kept as uploaded because already normalized.",
+    ("path",)))
+UPSTREAM_SECONDS = register(Histogram(
+    "upstream_request_duration_seconds", "Latency of OpenAI API calls.", ("model",)))
+UPSTREAM_REQUESTS = register(Counter(
+    "upstream_requests_total", "OpenAI API calls by outcome.", ("model", "outcome")))
+UPSTREAM_TOKENS = register(Counter(
+    "upstream_tokens_total", "Tokens reported by the OpenAI API.", ("model", "kind")))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Stage durations of the current request, for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(stage: str, language: str = ""):
+    """
+    Time a pipeline stage: recorded in the stage histogram, counted as an error
+    if it raises, and added to the current request's Server-Timing entries.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, language=language)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage, language=language)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def upstream_call(model: str):
+    """Time one OpenAI API call and count its outcome."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_REQUESTS.inc(model=model, outcome=type(e).__name__)
+        raise
+    else:
+        UPSTREAM_REQUESTS.inc(model=model, outcome="ok")
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, model=model)
+
+
+def record_usage(model: str, usage):
+    """Count the prompt and completion tokens of a chat completion."""
+    if usage is None or not METRICS_ENABLED:
+        return
+    UPSTREAM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    UPSTREAM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+def route_label(scope: dict) -> str:
+    """The route template (e.g. /jobs/{job_id}), so metrics do not grow with every path."""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", "unmatched")
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts and latency, and optionally
+    adding a Server-Timing header with the stages run before the response
+    started (for streamed responses, only the stages before the first byte).
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message = {
+                        **message,
+                        "headers": list(message.get("headers", [])) + [
+                            (b"server-timing", header.encode()),
+                            (b"timing-allow-origin", b"*")
+                        ]
+                    }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = route_label(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=scope["method"])
+            REQUESTS.inc(route=route, method=scope["method"], status=str(status))
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Summary pipeline configuration
+SEQUENTIAL = "sequential"
+CONCURRENT = "concurrent"
+FUSED = "fused"
+PIPELINE_MODES = (SEQUENTIAL, CONCURRENT, FUSED)
+SUMMARY_PIPELINE_MODE = os.getenv("SUMMARY_PIPELINE_MODE", SEQUENTIAL).lower()
+
+
+class FusedOutputError(ValueError):
+    """The fused call did not return both a transcript and a summary."""
+
+
+class FusedTooLong(ValueError):
+    """The transcript needs a segmented correction, which a single fused call cannot give it."""
+
+
+@dataclass
+class PipelineResult:
+    transcript: str
+    summary: str
+    mode: str
+    timings: Dict[str, float] = field(default_factory=dict)
+    fallback: Optional[str] = None
+
+    def report(self) -> dict:
+        report = {"mode": self.mode, "timings": self.timings}
+        if self.fallback:
+            report["fallback"] = self.fallback
+        return report
+
+
+async def timed(timings: Dict[str, float], name: str, stage: Awaitable):
+    started = time.perf_counter()
+    try:
+        return await stage
+    finally:
+        timings[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+
+
+def resolve_mode(mode: Optional[str]) -> str:
+    """Validate a requested mode, defaulting to SUMMARY_PIPELINE_MODE."""
+    mode = (mode or SUMMARY_PIPELINE_MODE).lower()
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode '{mode}', expected one of {', '.join(PIPELINE_MODES)}")
+    return mode
+
+
+async def run_summary_pipeline(
+    raw_transcript: str,
+    correct: Callable[[str], Awaitable[str]],
+    summarize: Callable[[str], Awaitable[str]],
+    fused: Callable[[str], Awaitable[Tuple[str, str]]],
+    mode: str = SEQUENTIAL
+) -> PipelineResult:
+    """
+    Turn a raw transcript into a corrected transcript and a summary.
+    - sequential: correct, then summarize the corrected text (two calls, slowest)
+    - concurrent: correct and summarize the raw text at the same time (two calls)
+    - fused: one call returning both (fewest tokens; falls back to sequential
+      when the output cannot be parsed or the transcript is too long for one call)
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    fallback = None
+
+    if mode == FUSED:
+        try:
+            transcript, summary = await timed(timings, "fused", fused(raw_transcript))
+        except FusedOutputError as e:
+            logger.warning(f"Fused correction and summary failed, running sequentially: {str(e)}")
+            fallback = SEQUENTIAL
+            mode = SEQUENTIAL
+        except FusedTooLong as e:
+            logger.info(f"{str(e)}, running sequentially")
+            fallback = SEQUENTIAL
+            mode = SEQUENTIAL
+
+    if mode == CONCURRENT:
+        transcript, summary = await asyncio.gather(
+            timed(timings, "correct", correct(raw_transcript)),
+            timed(timings, "summarize", summarize(raw_transcript))
+        )
+    elif mode == SEQUENTIAL:
+        transcript = await timed(timings, "correct", correct(raw_transcript))
+        summary = await timed(timings, "summarize", summarize(transcript))
+
+    timings["total_seconds"] = round(time.perf_counter() - started, 3)
+    return PipelineResult(transcript, summary, FUSED if fallback else mode, timings, fallback)
@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from metrics import Counter, register
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Retry configuration
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+# Retries (and hedges) may add at most this share of extra calls, beyond a small reserve
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_RESERVE = float(os.getenv("RETRY_BUDGET_RESERVE", "10"))
+
+# Hedged requests for short calls
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "0"))  # 0: adaptive
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MAX_AUDIO_SECONDS = float(os.getenv("HEDGE_MAX_AUDIO_SECONDS", "30"))
+HEDGE_MAX_TOKENS = int(os.getenv("HEDGE_MAX_TOKENS", "1200"))
+
+# Circuit breaker configuration
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+_LATENCY_WINDOW = 200
+_MIN_LATENCY_SAMPLES = 20
+
+RETRIES = register(Counter(
+    "upstream_retries_total", "OpenAI API calls retried.", ("model",)))
+RETRIES_DENIED = register(Counter(
+    "upstream_retries_denied_total", "Retries skipped because the retry budget was spent.", ("model",)))
+HEDGES = register(Counter(
+    "upstream_hedges_total", "Hedged OpenAI API calls, by which attempt finished first.", ("model", "winner")))
+BREAKER_REJECTIONS = register(Counter(
+    "upstream_breaker_rejections_total", "Calls failed fast by an open circuit breaker.", ("model",)))
+
+
+class CircuitOpen(Exception):
+    """The upstream for a model is failing; calls are rejected until the breaker resets."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Upstream for {model} is unavailable, retry in {retry_after:.0f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Connection problems, timeouts, rate limits and server errors."""
+    # Imported here so that importing this module does not load the SDK
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def is_upstream_rejection(error: BaseException) -> bool:
+    """A 4xx answer other than the retryable ones: the upstream is healthy, the request was refused."""
+    import openai
+
+    return isinstance(error, openai.APIStatusError) and not is_retryable(error) and error.status_code < 500
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Token bucket bounding retries to a share of the traffic: every call
+    deposits `ratio` tokens, every retry or hedge spends one. The bucket starts
+    full and holds at most `reserve` tokens, so an idle server can still retry
+    a few isolated failures while a failing upstream is not hit with N times
+    the load.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, reserve: float = RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+    def deposit(self):
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive retryable failures and rejects calls
+    for `reset_seconds`. It then lets a single trial call through (half-open):
+    success closes it, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def check(self, model: str):
+        """Raise CircuitOpen unless a call may go ahead."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return
+        BREAKER_REJECTIONS.inc(model=model)
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        raise CircuitOpen(model, max(1.0, remaining))
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit breaker closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def abandon(self):
+        self._trial = False
+
+    def failure(self, model: str):
+        self.failures += 1
+        if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+            logger.warning(f"Circuit breaker for {model} opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+
+class ResilientCaller:
+    """
+    Runs upstream calls with jittered exponential retries under a shared
+    retry budget, an optional hedged duplicate for short calls and a circuit
+    breaker per model. `attempt` must start a fresh call every time it is
+    invoked (hedged attempts run concurrently).
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        hedging: bool = HEDGE_ENABLED,
+        hedge_delay: float = HEDGE_DELAY_SECONDS,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedging = hedging
+        self.hedge_delay = hedge_delay
+        self.budget = budget or RetryBudget()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker()
+        return self._breakers[model]
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, at least what the server asked for."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def hedge_after(self, model: str) -> Optional[float]:
+        """
+        Seconds to wait for the first attempt before sending a duplicate: a
+        high quantile of recent latencies, or None until enough are known.
+        """
+        if self.hedge_delay > 0:
+            return self.hedge_delay
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return max(HEDGE_MIN_DELAY, ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_QUANTILE))])
+
+    async def _timed(self, model: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await attempt()
+        self._latencies.setdefault(model, deque(maxlen=_LATENCY_WINDOW)).append(time.perf_counter() - started)
+        return result
+
+    async def _hedged(self, model: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_after(model)
+        if delay is None:
+            return await self._timed(model, attempt)
+        first = asyncio.ensure_future(self._timed(model, attempt))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.budget.withdraw():
+                return await first
+
+            second = asyncio.ensure_future(self._timed(model, attempt))
+            tasks.add(second)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGES.inc(model=model, winner="hedge" if task is second else "first")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, model: str, attempt: Callable[[], Awaitable[T]], hedge: bool = False) -> T:
+        """Run attempt() until it succeeds, the error is not retryable, or attempts or budget run out."""
+        breaker = self.breaker(model)
+        self.budget.deposit()
+        for number in range(1, self.max_attempts + 1):
+            breaker.check(model)
+            try:
+                if hedge and self.hedging:
+                    result = await self._hedged(model, attempt)
+                else:
+                    result = await self._timed(model, attempt)
+            except asyncio.CancelledError:
+                # Abandoned by the caller; a half-open trial slot must not stay taken
+                breaker.abandon()
+                raise
+            except Exception as e:
+                if is_upstream_rejection(e):
+                    # The upstream answered; the request itself was rejected
+                    breaker.success()
+                    raise
+                if not is_retryable(e):
+                    # A local error (e.g. parsing the response) says nothing about the upstream
+                    breaker.abandon()
+                    raise
+                breaker.failure(model)
+                if number == self.max_attempts:
+                    raise
+                if not self.budget.withdraw():
+                    RETRIES_DENIED.inc(model=model)
+                    raise
+                delay = self.backoff(number, retry_after_seconds(e))
+                logger.warning(f"{model} call failed ({type(e).__name__}), retry {number} in {delay:.2f}s")
+                RETRIES.inc(model=model)
+                await asyncio.sleep(delay)
+            else:
+                breaker.success()
+                return result
+
+    def stats(self) -> dict:
+        return {
+            "retry_budget": round(self.budget.tokens, 2),
+            "hedging": self.hedging,
+            "breakers": {
+                model: {"state": breaker.state, "failures": breaker.failures}
+                for model, breaker in self._breakers.items()
+            }
+        }
+
+
+def hedge_transcription(duration_seconds: float) -> bool:
+    return duration_seconds <= HEDGE_MAX_AUDIO_SECONDS
+
+
+def hedge_completion(kwargs: dict) -> bool:
+    max_tokens = kwargs.get("max_tokens")
+    return max_tokens is not None and max_tokens <= HEDGE_MAX_TOKENS
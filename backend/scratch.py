@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, Optional
+
+from ingest import UPLOAD_CHUNK_SIZE, UploadTooLarge, check_upload_size
+
+logger = logging.getLogger(__name__)
+
+# Scratch space configuration; point SCRATCH_DIR at a tmpfs such as /dev/shm for speed
+SCRATCH_DIR = os.getenv("SCRATCH_DIR") or os.path.join(tempfile.gettempdir(), "speech-scratch")
+SCRATCH_QUOTA_BYTES = int(os.getenv("SCRATCH_QUOTA_BYTES", str(1024 * 1024 * 1024)))
+SCRATCH_MAX_AGE_SECONDS = float(os.getenv("SCRATCH_MAX_AGE_SECONDS", "21600"))
+SCRATCH_JANITOR_SECONDS = float(os.getenv("SCRATCH_JANITOR_SECONDS", "300"))
+
+
+class ScratchFull(Exception):
+    """Writing the file would exceed the scratch quota."""
+
+
+def filesystem_type(path: str) -> Optional[str]:
+    """Type of the filesystem holding path (e.g. tmpfs), from /proc/mounts where available."""
+    try:
+        with open("/proc/mounts") as mounts:
+            entries = [line.split()[1:3] for line in mounts]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    for mount_point, kind in entries:
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype
+
+
+def _owner_alive(name: str) -> bool:
+    """Whether the process that created a scratch file (its name starts with the pid) still runs."""
+    pid = name.split("-", 1)[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ScratchFile:
+    """A file in the scratch space, deleted and released from the quota on close()."""
+
+    def __init__(self, space: "ScratchSpace", path: str, reserved: int):
+        self._space = space
+        self.path = path
+        self.reserved = reserved
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        self._space._remove(self)
+
+    def __enter__(self) -> "ScratchFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ScratchSpace:
+    """
+    Temporary files with bounded total size. Every file is tracked from
+    creation until close(), which always deletes it; files left behind by a
+    crashed process are removed by a background janitor once their owner is
+    gone or they are older than max_age.
+    """
+
+    def __init__(self, root: str = SCRATCH_DIR, quota: int = SCRATCH_QUOTA_BYTES,
+                 max_age: float = SCRATCH_MAX_AGE_SECONDS):
+        self.root = root
+        self.quota = quota
+        self.max_age = max_age
+        self.used_bytes = 0
+        self.orphans_removed = 0
+        self._files: Dict[str, ScratchFile] = {}
+        self._janitor: Optional[asyncio.Task] = None
+        os.makedirs(root, exist_ok=True)
+
+    def create(self, size: int, suffix: str = "") -> ScratchFile:
+        """Reserve size bytes of the quota and return a new, still empty, file."""
+        if self.used_bytes + size > self.quota:
+            raise ScratchFull(f"Scratch quota of {self.quota} bytes exhausted")
+        path = os.path.join(self.root, f"{os.getpid()}-{uuid.uuid4().hex}{suffix}")
+        open(path, "wb").close()
+        scratch = ScratchFile(self, path, size)
+        self._files[path] = scratch
+        self.used_bytes += size
+        return scratch
+
+    async def write_upload(self, upload, max_bytes: int, suffix: str = "") -> ScratchFile:
+        """
+        Stream an upload into a new scratch file, rejecting it with
+        UploadTooLarge past max_bytes. The quota is reserved up front (the
+        upload's size when known, max_bytes otherwise) and trimmed afterwards.
+        """
+        check_upload_size(upload, max_bytes)
+        size = getattr(upload, "size", None)
+        scratch = self.create(size if size is not None else max_bytes, suffix)
+        try:
+            written = 0
+            with open(scratch.path, "wb") as f:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    await asyncio.to_thread(f.write, chunk)
+            self.used_bytes -= scratch.reserved - written
+            scratch.reserved = written
+            return scratch
+        except BaseException:
+            scratch.close()
+            raise
+
+    def _remove(self, scratch: ScratchFile):
+        if self._files.pop(scratch.path, None) is None:
+            return
+        self.used_bytes -= scratch.reserved
+        try:
+            os.remove(scratch.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove scratch file {scratch.path}: {str(e)}")
+
+    def sweep(self) -> int:
+        """Remove untracked files whose owner has exited or that are older than max_age."""
+        removed = 0
+        cutoff = time.time() - self.max_age
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.path in self._files or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    if _owner_alive(entry.name) and entry.stat().st_mtime > cutoff:
+                        continue
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    logger.warning(f"Could not remove orphaned scratch file {entry.path}: {str(e)}")
+        self.orphans_removed += removed
+        return removed
+
+    async def _run_janitor(self, interval: float):
+        while True:
+            try:
+                removed = await asyncio.to_thread(self.sweep)
+                if removed:
+                    logger.info(f"Removed {removed} orphaned scratch files")
+            except Exception as e:
+                logger.warning(f"Scratch janitor failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = SCRATCH_JANITOR_SECONDS):
+        """Start the janitor; its first sweep clears what a previous run left behind."""
+        if self._janitor is None:
+            self._janitor = asyncio.create_task(self._run_janitor(interval))
+            logger.info(f"Scratch space at {self.root} ({filesystem_type(self.root) or 'unknown'} filesystem)")
+
+    async def stop(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+            try:
+                await self._janitor
+            except asyncio.CancelledError:
+                pass
+            self._janitor = None
+        for scratch in list(self._files.values()):
+            scratch.close()
+
+    def stats(self) -> dict:
+        stats = {
+            "path": self.root,
+            "filesystem": filesystem_type(self.root),
+            "files": len(self._files),
+            "used_bytes": self.used_bytes,
+            "quota_bytes": self.quota,
+            "orphans_removed": self.orphans_removed,
+            "writable": os.access(self.root, os.W_OK)
+        }
+        try:
+            usage = shutil.disk_usage(self.root)
+            stats["disk"] = {"total_bytes": usage.total, "free_bytes": usage.free}
+        except OSError:
+            pass
+        return stats
@@ -0,0 +1,18 @@
+import os
+from typing import Optional
+
+# Where state that outlives a request is kept: "memory" holds result caches and
+# job status in each server process, "sqlite" shares them between all worker
+# processes on a host through one database file
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "state.sqlite3")
+
+
+def shared_sqlite_path(path: str = "") -> Optional[str]:
+    """
+    The SQLite database a component should use: its own path when one is
+    configured, otherwise the shared database when STATE_BACKEND=sqlite.
+    """
+    if path:
+        return path
+    return STATE_SQLITE_PATH if STATE_BACKEND == "sqlite" else None
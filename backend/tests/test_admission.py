@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from admission import AdmissionController, Rejected
+
+ORIGIN = "https://frontend.example"
+
+
+def test_rejected_request_carries_cors_headers(monkeypatch):
+    # No client may have a request in flight, so every POST is rejected with 429
+    monkeypatch.setattr(main, "admission", AdmissionController(max_per_client=0))
+    client = TestClient(main.create_app())
+
+    response = client.post("/summarize/", data={"text": "salam"}, headers={"Origin": ORIGIN})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"]
+    assert response.headers["access-control-allow-origin"] in ("*", ORIGIN)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_queued_request_is_admitted_when_a_slot_frees():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=5)
+        await controller.acquire("a", 10)
+        waiting = asyncio.create_task(controller.acquire("b", 20))
+        await asyncio.sleep(0)
+        queued = controller.stats()
+
+        controller.release("a", 10, seconds=1.0)
+        await waiting
+        return queued, controller.stats()
+
+    queued, admitted = run(scenario())
+    assert (queued["in_flight"], queued["waiting"], queued["clients"], queued["reserved_bytes"]) == (1, 1, 2, 10)
+    assert (admitted["in_flight"], admitted["waiting"], admitted["clients"], admitted["reserved_bytes"]) == (1, 0, 1, 20)
+
+
+def test_waiting_requests_count_against_the_client_limit():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_per_client=2, queue_timeout=5)
+        await controller.acquire("a", 0)
+        waiting = asyncio.create_task(controller.acquire("a", 0))
+        await asyncio.sleep(0)
+        try:
+            await controller.acquire("a", 0)
+        finally:
+            waiting.cancel()
+
+    with pytest.raises(Rejected) as rejected:
+        run(scenario())
+    assert rejected.value.status == 429
+
+
+def test_memory_budget_admits_in_arrival_order():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=10, memory_budget=100, queue_timeout=5)
+        await controller.acquire("a", 60)
+        large = asyncio.create_task(controller.acquire("b", 80))
+        await asyncio.sleep(0)
+        # Would fit the budget, but must not overtake the request waiting at the head of the queue
+        small = asyncio.create_task(controller.acquire("c", 10))
+        await asyncio.sleep(0)
+        blocked = (large.done(), small.done())
+
+        controller.release("a", 60, seconds=1.0)
+        await asyncio.gather(large, small)
+        return blocked, controller.stats()
+
+    blocked, stats = run(scenario())
+    assert blocked == (False, False)
+    assert (stats["in_flight"], stats["reserved_bytes"]) == (2, 90)
+
+
+def test_timed_out_and_cancelled_waiters_give_back_their_place():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=0.01)
+        await controller.acquire("a", 0)
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire("b", 0)
+
+        controller.queue_timeout = 5
+        cancelled = asyncio.create_task(controller.acquire("c", 0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return rejected.value.status, controller.stats()
+
+    status, stats = run(scenario())
+    assert status == 503
+    assert (stats["in_flight"], stats["waiting"], stats["clients"]) == (1, 0, 1)
+
+
+def test_reservation_is_capped_at_the_budget():
+    controller = AdmissionController(memory_budget=1000)
+    assert controller.reservation(10) == 10
+    assert controller.reservation(5000) == 1000
+    assert controller.reservation(None) == 1000
+
+
+def test_live_sessions_hold_a_slot_and_excess_sessions_are_closed_with_1013(monkeypatch):
+    monkeypatch.setattr(main, "admission", AdmissionController(max_per_client=1))
+    client = TestClient(main.create_app())
+
+    with client.websocket_connect("/ws/transcribe-live") as first:
+        assert first.receive_json()["type"] == "ready"
+        with client.websocket_connect("/ws/transcribe-live") as second:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                second.receive_json()
+        assert closed.value.code == 1013
+        assert main.admission.stats()["in_flight"] == 1
+
+    # The slot is given back when the session ends
+    with client.websocket_connect("/ws/transcribe-live") as third:
+        assert third.receive_json()["type"] == "ready"
@@ -0,0 +1,106 @@
+import asyncio
+import io
+import zipfile
+
+import httpx
+import pytest
+
+import main
+from batch import BatchTooLarge, TooManyFiles, read_batch, run_batch
+from ingest import BytesReader
+from scratch import ScratchSpace
+
+
+class Upload(BytesReader):
+    """Like an UploadFile: the multipart parser knows each file's size."""
+
+    def __init__(self, filename: str, data: bytes):
+        super().__init__(data)
+        self.filename = filename
+        self.size = len(data)
+
+
+def archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipped:
+        for name, data in members.items():
+            zipped.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_batch_is_spooled_to_scratch_and_released(tmp_path):
+    space = ScratchSpace(root=str(tmp_path), quota=1024 * 1024)
+    files = [
+        Upload("a.wav", b"a" * 100),
+        Upload("notes.zip", archive({"b.wav": b"b" * 200, "__MACOSX/._b.wav": b"x", "dir/c.ogg": b"c" * 300}))
+    ]
+
+    async def scenario():
+        items = await read_batch(files, space)
+        spooled = [(item.filename, item.file.read_bytes()) for item in items]
+        used = space.used_bytes
+
+        async def decode(item):
+            return item.file.read_bytes()
+
+        async def transcribe(item, audio):
+            return {"bytes": len(audio)}
+
+        results = [result async for result in run_batch(items, decode, transcribe)]
+        return spooled, used, results
+
+    spooled, used, results = asyncio.run(scenario())
+    assert spooled == [("a.wav", b"a" * 100), ("b.wav", b"b" * 200), ("dir/c.ogg", b"c" * 300)]
+    assert used == 600
+    assert sorted(result["bytes"] for result in results) == [100, 200, 300]
+    assert space.used_bytes == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("files, error", [
+    ([Upload("a.wav", b"a" * 600), Upload("b.wav", b"b" * 600)], BatchTooLarge),
+    ([Upload("a.zip", archive({"b.wav": b"b" * 600, "c.wav": b"c" * 600}))], BatchTooLarge),
+    ([Upload(f"{index}.wav", b"a") for index in range(3)], TooManyFiles),
+])
+def test_rejected_batch_leaves_no_scratch_files(tmp_path, files, error):
+    space = ScratchSpace(root=str(tmp_path), quota=1024 * 1024)
+    with pytest.raises(error):
+        asyncio.run(read_batch(files, space, max_files=2, max_total_bytes=1000))
+    assert space.used_bytes == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_spooled_files_are_released_when_the_body_is_never_sent(tmp_path, monkeypatch, spec_version):
+    space = ScratchSpace(root=str(tmp_path), quota=1024 * 1024)
+    monkeypatch.setattr(main, "scratch", space)
+    request = httpx.Request("POST", "http://testserver/transcribe-batch/",
+                            files=[("files", ("a.wav", b"a" * 100)), ("files", ("b.wav", b"b" * 100))])
+    body = request.read()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/transcribe-batch/", "raw_path": b"/transcribe-batch/",
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in request.headers.items()]
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # The client is gone before the response starts
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset")
+
+    async def scenario():
+        try:
+            await main.create_app()(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(scenario())
+    assert space.used_bytes == 0
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+import main
+from ingest import MAX_UPLOAD_BYTES
+
+ORIGIN = "https://frontend.example"
+
+
+def test_oversized_upload_is_rejected_with_cors_headers():
+    client = TestClient(main.create_app())
+    body = b"0" * (MAX_UPLOAD_BYTES + 128 * 1024)
+
+    response = client.post(
+        "/transcribe/",
+        files={"file": ("big.wav", body, "audio/wav")},
+        headers={"Origin": ORIGIN}
+    )
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Audio faylın həcmi 25MB-dan çox ola bilməz"
+    assert response.headers["access-control-allow-origin"] in ("*", ORIGIN)
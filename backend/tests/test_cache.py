@@ -0,0 +1,47 @@
+import asyncio
+
+from cache import ResultCache
+
+
+def test_followers_share_the_leaders_result():
+    async def scenario():
+        cache = ResultCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "text"
+
+        results = await asyncio.gather(*(cache.get_or_compute("transcript:a", compute) for _ in range(3)))
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["text"] * 3
+    assert calls == 1
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        cache = ResultCache()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return "leader"
+
+        async def fast():
+            return "follower"
+
+        leader = asyncio.create_task(cache.get_or_compute("transcript:a", slow))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_compute("transcript:a", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    result, leader_cancelled = asyncio.run(scenario())
+    assert result == "follower"
+    assert leader_cancelled
@@ -0,0 +1,42 @@
+import numpy as np
+
+from chunking import Chunk, dedupe_overlaps, plan_chunks
+
+
+def chunk(index: int, text: str, overlap: bool = False) -> Chunk:
+    return Chunk(index=index, start=0, end=0, sample_rate=16000, overlap=overlap, text=text)
+
+
+def test_words_repeated_across_an_overlapping_cut_are_dropped():
+    chunks = [
+        chunk(0, "Bu gün hava çox gözəl idi"),
+        chunk(1, "Gözəl idi, biz parka getdik.", overlap=True),
+    ]
+    assert dedupe_overlaps(chunks) == ["Bu gün hava çox gözəl idi", "biz parka getdik."]
+
+
+def test_cuts_at_silence_are_never_deduplicated():
+    chunks = [chunk(0, "salam dünya"), chunk(1, "dünya salam")]
+    assert dedupe_overlaps(chunks) == ["salam dünya", "dünya salam"]
+
+
+def test_overlap_is_compared_with_the_last_chunk_that_had_text():
+    chunks = [chunk(0, "bir iki üç"), chunk(1, ""), chunk(2, "üç dörd", overlap=True)]
+    assert dedupe_overlaps(chunks) == ["bir iki üç", "", "dörd"]
+
+
+def test_chunks_are_cut_in_pauses_and_cover_the_recording():
+    rate = 16000
+    rng = np.random.default_rng(0)
+    # 25 s of noise with a one-second pause starting at 9 s
+    samples = rng.normal(0, 4000, 25 * rate).astype("<i2")
+    samples[9 * rate:10 * rate] = 0
+
+    chunks = plan_chunks(samples, rate, target_seconds=10, max_seconds=12, overlap_seconds=1)
+
+    assert chunks[0].start == 0 and chunks[-1].end == samples.size
+    assert not chunks[1].overlap
+    assert 9 <= chunks[0].end_seconds <= 10
+    # Without a pause in reach the next cut overlaps
+    assert chunks[2].overlap and chunks[2].start < chunks[1].end
+    assert all(c.end - c.start <= 12 * rate for c in chunks)
@@ -0,0 +1,35 @@
+from correction import count_tokens, plan_segments, split_units
+
+TEXT = (
+    "Birinci cümlə budur. İkinci cümlə isə bir az daha uzundur! Üçüncü?\n\n"
+    "Yeni abzas burada başlayır. " + " ".join(["söz"] * 120)
+)
+
+
+def reassemble(pairs) -> str:
+    return "".join(separator + text for separator, text in pairs)
+
+
+def test_units_split_at_sentences_and_paragraphs_and_keep_the_text():
+    units = split_units(TEXT, max_tokens=1000)
+    assert [text for _, text in units][:4] == [
+        "Birinci cümlə budur.", "İkinci cümlə isə bir az daha uzundur!", "Üçüncü?", "Yeni abzas burada başlayır."
+    ]
+    assert units[3][0] == "\n\n"
+    assert reassemble(units) == TEXT
+
+
+def test_unpunctuated_text_is_split_between_words():
+    units = split_units(" ".join(["söz"] * 120), max_tokens=20)
+    assert len(units) > 1
+    assert all(count_tokens(text) <= 20 for _, text in units)
+    assert reassemble(units).split() == ["söz"] * 120
+
+
+def test_segments_respect_the_budget_and_carry_context():
+    segments = plan_segments(TEXT, segment_tokens=30, context_chars=40)
+    assert len(segments) > 1
+    assert all(segment.tokens <= 30 for segment in segments)
+    assert segments[0].context == ""
+    assert segments[1].context and segments[1].context in reassemble((s.separator, s.text) for s in segments[:1])
+    assert reassemble((s.separator, s.text) for s in segments) == TEXT
@@ -0,0 +1,86 @@
+import asyncio
+import io
+import shutil
+import struct
+import subprocess
+import wave
+
+import pytest
+
+from ingest import FFMPEG_BINARY, BytesReader, ingest_normalized, ogg_end_granule, opus_header, probe_duration
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason="ffmpeg is not available")
+
+
+def wav(seconds: float, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(b"\0\0" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def test_wav_duration_is_read_from_the_header():
+    data = wav(3)
+    assert probe_duration(data[:4096], len(data)) == pytest.approx(3, abs=0.01)
+
+
+@pytest.mark.parametrize("header", [b"OggS" + b"\0" * 60, b"\x1aE\xdf\xa3" + b"\0" * 60, b"", b"RIFF"])
+def test_unknown_or_truncated_headers_have_no_duration(header):
+    assert probe_duration(header) is None
+
+
+def opus(seconds: float, channels: int = 1, rate: int = 16000) -> bytes:
+    """Ogg Opus like the web client's compaction produces, with the given layout."""
+    return subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-ac", str(channels), "-ar", str(rate), "-c:a", "libopus", "-b:a", "24k", "-f", "ogg", "pipe:1"],
+        input=wav(seconds), capture_output=True, check=True
+    ).stdout
+
+
+@needs_ffmpeg
+def test_ogg_end_granule_gives_the_opus_duration():
+    data = opus(3)
+    channels, pre_skip, input_sample_rate = opus_header(data[:4096])
+    assert (channels, input_sample_rate) == (1, 16000)
+    assert (ogg_end_granule(data) - pre_skip) / 48000 == pytest.approx(3, abs=0.03)
+
+
+@needs_ffmpeg
+def test_mono_16khz_opus_is_kept_as_uploaded():
+    data = opus(3)
+    audio = asyncio.run(ingest_normalized(BytesReader(data), "test", 16000))
+    assert not audio.is_pcm
+    assert audio.buffer.getvalue() == data
+    assert (audio.content_type, audio.channels, audio.sample_rate) == ("audio/ogg", 1, 16000)
+    assert audio.duration_seconds == pytest.approx(3, abs=0.03)
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("channels, rate", [(2, 16000), (1, 48000)])
+def test_stereo_or_high_rate_opus_is_decoded(channels, rate):
+    data = opus(3, channels, rate)
+    audio = asyncio.run(ingest_normalized(BytesReader(data), "test", 16000))
+    assert audio.is_pcm
+    assert audio.channels == 1
+    assert audio.duration_seconds == pytest.approx(3, abs=0.05)
+
+
+def mp3_frame(tag: bytes = b"") -> bytes:
+    """An MPEG-1 Layer III frame header (128 kbit/s, 44.1 kHz, joint stereo), then an optional Xing/Info tag."""
+    side_info = b"\0" * 32
+    return (b"\xff\xfb\x90\x64" + side_info + tag).ljust(417, b"\0")
+
+
+def test_mp3_duration_is_read_from_the_xing_frame_count():
+    frames = 1000
+    header = mp3_frame(b"Xing" + struct.pack(">II", 0x1, frames))
+    assert probe_duration(header * 2, 10_000_000) == pytest.approx(frames * 1152 / 44100)
+
+
+def test_mp3_without_a_xing_header_has_no_duration():
+    # The first frame's bitrate would put this at over ten minutes, which a VBR file need not be
+    assert probe_duration(mp3_frame() * 2, 10_000_000) is None
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from jobs import COMPLETED, FAILED, QUEUED, RUNNING, JobManager, MemoryJobStore, QueueFull, SQLiteJobStore
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def finished(manager: JobManager, job_id: str) -> dict:
+    while True:
+        job = await manager.get(job_id)
+        if job["status"] in (COMPLETED, FAILED):
+            return job
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+
+
+def test_job_runs_through_its_stages(store):
+    manager = JobManager(store, workers=2, ttl=60)
+
+    async def handler(ctx):
+        async with ctx.stage("decode"):
+            pass
+        async with ctx.stage("transcribe"):
+            # Progress is visible to status requests while the stage runs
+            seen = (await manager.get(ctx.job_id))["stage"]
+        return {"transcript": "salam", "stage_seen": seen}
+
+    async def scenario():
+        manager.start()
+        try:
+            submitted = await manager.submit("transcribe", handler, {"language": "az"})
+            status = submitted["status"]
+            return status, await finished(manager, submitted["id"]), await manager.stats()
+        finally:
+            await manager.stop()
+
+    status, job, stats = run(scenario())
+    assert status == QUEUED
+    assert job["status"] == COMPLETED
+    assert job["result"] == {"transcript": "salam", "stage_seen": "transcribe"}
+    assert job["params"] == {"language": "az"}
+    assert [job["stages"][name]["status"] for name in ("decode", "transcribe")] == [COMPLETED, COMPLETED]
+    assert job["stage"] is None
+    assert job["expires_at"] == pytest.approx(job["finished_at"] + 60)
+    assert stats["jobs"] == {COMPLETED: 1}
+
+
+def test_failed_job_records_the_error_and_the_failed_stage(store):
+    async def handler(ctx):
+        async with ctx.stage("transcribe"):
+            raise ValueError("upstream refused")
+
+    async def scenario():
+        manager = JobManager(store, workers=1)
+        manager.start()
+        try:
+            return await finished(manager, (await manager.submit("transcribe", handler))["id"])
+        finally:
+            await manager.stop()
+
+    job = run(scenario())
+    assert job["status"] == FAILED
+    assert job["error"] == "upstream refused"
+    assert job["stages"]["transcribe"]["status"] == FAILED
+
+
+def test_full_queue_rejects_submissions():
+    async def scenario():
+        manager = JobManager(MemoryJobStore(), workers=0, queue_size=1)
+        manager.start()
+        try:
+            await manager.submit("transcribe", None)
+            await manager.submit("transcribe", None)
+        finally:
+            await manager.stop()
+
+    with pytest.raises(QueueFull):
+        run(scenario())
+
+
+def test_finished_jobs_expire_after_the_ttl(store):
+    now = time.time()
+    store.put({"id": "old", "status": COMPLETED, "expires_at": now - 1})
+    store.put({"id": "recent", "status": COMPLETED, "expires_at": now + 60})
+    store.put({"id": "running", "status": RUNNING, "expires_at": None})
+
+    assert store.get("old") is None
+    assert store.get("recent")["status"] == COMPLETED
+    assert store.purge_expired() == 1
+    assert store.counts() == {COMPLETED: 1, RUNNING: 1}
+
+
+def test_sqlite_store_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    SQLiteJobStore(path).put({"id": "a", "status": RUNNING, "stages": {"decode": {"status": COMPLETED}},
+                              "expires_at": None})
+    assert SQLiteJobStore(path).get("a")["stages"] == {"decode": {"status": COMPLETED}}
+
+
+def test_events_stream_each_change_until_the_job_finishes(monkeypatch):
+    store = MemoryJobStore()
+    monkeypatch.setattr(main, "job_manager", JobManager(store))
+    monkeypatch.setattr(main, "JOB_EVENTS_POLL_SECONDS", 0.01)
+    job = {"id": "j", "status": RUNNING, "stage": "transcribe", "updated_at": 1.0, "expires_at": None}
+    store.put(job)
+
+    def finish():
+        store.put({**job, "status": COMPLETED, "stage": None, "result": {"transcript": "salam"}, "updated_at": 2.0})
+
+    timer = threading.Timer(0.1, finish)
+    timer.start()
+    try:
+        response = TestClient(main.create_app()).get("/jobs/j/events")
+    finally:
+        timer.cancel()
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events == [RUNNING, COMPLETED]
+
+
+def test_unknown_job_is_not_found():
+    assert TestClient(main.create_app()).get("/jobs/missing/events").status_code == 404
@@ -0,0 +1,79 @@
+import asyncio
+import io
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+import live
+from ingest import FFMPEG_BINARY, AudioTooLong
+from live import LiveSession
+
+pytestmark = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason="ffmpeg is not available")
+
+
+def recording(seconds: float, rate: int = 48000) -> bytes:
+    """A WebM/Opus recording like MediaRecorder's: one-second tone bursts between short pauses."""
+    t = np.arange(int(seconds * rate)) / rate
+    samples = np.where(t % 1.5 < 1.0, 8000 * np.sin(2 * np.pi * 220 * t), 0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-c:a", "libopus", "-f", "webm", "pipe:1"],
+        input=buffer.getvalue(), capture_output=True, check=True
+    ).stdout
+
+
+def session(**kwargs) -> LiveSession:
+    async def send(message):
+        pass
+
+    async def transcribe(payload, previous):
+        return f"segment at {payload.duration_seconds:.1f}s"
+
+    async def correct(text):
+        return text.upper()
+
+    return LiveSession("test", send=send, transcribe=transcribe, correct=correct, **kwargs)
+
+
+def test_chunks_are_decoded_once_and_transcribed_in_segments(monkeypatch):
+    monkeypatch.setattr(live, "LIVE_WINDOW_SECONDS", 0.05)
+    data = recording(9)
+
+    async def scenario():
+        live_session = session()
+        live_session.start()
+        for offset in range(0, len(data), 4096):
+            await live_session.append(data[offset:offset + 4096])
+            await asyncio.sleep(0.01)
+        return await live_session.finish()
+
+    result = asyncio.run(scenario())
+    assert result["duration_seconds"] == pytest.approx(9, abs=0.1)
+    assert len(result["segments"]) > 1
+    assert result["transcript"] == result["raw_transcript"].upper()
+
+
+def test_recording_past_the_duration_limit_ends_the_session(monkeypatch):
+    monkeypatch.setattr(live, "LIVE_WINDOW_SECONDS", 0.05)
+    data = recording(6)
+
+    async def scenario():
+        live_session = session(max_duration=2)
+        live_session.start()
+        await live_session.append(data)
+        try:
+            # The client is still connected and silent; the limit must end the wait anyway
+            await live_session.guard(asyncio.sleep(10))
+        finally:
+            live_session.cancel()
+
+    with pytest.raises(AudioTooLong):
+        asyncio.run(scenario())
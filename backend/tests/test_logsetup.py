@@ -0,0 +1,102 @@
+import contextvars
+import io
+import json
+import logging
+import queue
+
+import pytest
+from fastapi.testclient import TestClient
+
+import logsetup
+from logsetup import NonBlockingQueueHandler, RequestIdMiddleware, bind_request_id, payload, setup_logging
+
+
+@pytest.fixture
+def root_handlers():
+    """Give the root logger back its handlers and level after the test."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def in_context(function):
+    return contextvars.copy_context().run(function)
+
+
+def test_queued_records_are_formatted_on_the_listener_and_flushed_on_stop(root_handlers):
+    stream = io.StringIO()
+    state = setup_logging("INFO", "json", use_queue=True, stream=stream)
+    assert logging.getLogger().handlers == [state.handler]
+
+    def log():
+        bind_request_id("req-1")
+        logging.getLogger("test").info("Transcript: %s", payload("a" * 30, limit=10))
+        try:
+            raise ValueError("bad audio")
+        except ValueError:
+            logging.getLogger("test").error("Failed", exc_info=True)
+
+    in_context(log)
+    state.stop()
+    assert state.stats()["async"] is False
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "Transcript: aaaaaaaaaa... (+20 chars)"
+    assert first["request_id"] == "req-1"
+    assert second["level"] == "ERROR" and "ValueError: bad audio" in second["exception"]
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    logger = logging.getLogger("test.dropped")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("one")
+        logger.warning("two")
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_short_payloads_are_kept_whole():
+    assert str(in_context(lambda: payload("salam", limit=10))) == "salam"
+    assert str(in_context(lambda: payload("salam", limit=0))) == "salam"
+
+
+def test_sampling_is_decided_once_per_request(monkeypatch):
+    monkeypatch.setattr(logsetup, "LOG_PAYLOAD_SAMPLE_RATE", 0.5)
+    draws = iter([0.9, 0.1])
+    monkeypatch.setattr(logsetup.random, "random", lambda: next(draws))
+
+    def request():
+        bind_request_id("req")
+        return [str(payload("salam dünya")) for _ in range(3)]
+
+    # The first request draws 0.9 (not sampled) and keeps that for all its payloads
+    assert in_context(request) == ["<11 chars, not sampled>"] * 3
+    assert in_context(request) == ["salam dünya"] * 3
+
+
+def test_request_id_is_echoed_or_generated_and_reaches_log_records(caplog):
+    async def app(scope, receive, send):
+        logging.getLogger("test.request").info("handling")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    client = TestClient(RequestIdMiddleware(app))
+    caplog.handler.addFilter(logsetup.RequestIdFilter())
+    with caplog.at_level(logging.INFO, logger="test.request"):
+        echoed = client.get("/", headers={"X-Request-ID": "abc123"})
+        generated = client.get("/")
+
+    assert echoed.headers["x-request-id"] == "abc123"
+    assert len(generated.headers["x-request-id"]) == 12
+    ids = [record.request_id for record in caplog.records if record.name == "test.request"]
+    assert ids == ["abc123", generated.headers["x-request-id"]]
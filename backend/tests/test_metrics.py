@@ -0,0 +1,62 @@
+import asyncio
+import math
+
+from fastapi.testclient import TestClient
+
+import main
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, server_timing_header, span
+
+
+def test_histogram_buckets_are_cumulative_and_bounds_inclusive():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(1, 0.5))
+    for value in (0.5, 0.7, 1, 3):
+        histogram.observe(value, route="/a")
+
+    assert histogram.buckets == (0.5, 1, math.inf)
+    assert histogram.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.5"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 5.2',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_and_gauge_exposition():
+    counter = Counter("requests_total", "Requests.", ("path",))
+    counter.inc(path='/say "salam"\n')
+    counter.inc(2, path="/b")
+    gauge = Gauge("queue_depth", "Queued requests.", lambda: 3)
+
+    assert counter.samples() == ['requests_total{path="/b"} 2.0', 'requests_total{path="/say \\"salam\\"\\n"} 1.0']
+    assert gauge.render().splitlines()[1:] == ["# TYPE queue_depth gauge", "queue_depth 3.0"]
+
+
+def test_server_timing_header_lists_stages_and_total():
+    assert server_timing_header({"decode": 0.0123, "transcribe": 1.5}, 2) == \
+        "decode;dur=12.3, transcribe;dur=1500.0, total;dur=2000.0"
+
+
+def test_middleware_adds_server_timing_for_stages_of_the_request():
+    async def app(scope, receive, send):
+        with span("decode"):
+            await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    response = TestClient(MetricsMiddleware(app, server_timing=True)).get("/")
+    entries = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert entries == ["decode", "total"]
+    assert float(response.headers["server-timing"].split("dur=")[1].split(",")[0]) >= 10
+
+
+def test_requests_are_labelled_by_route_template():
+    client = TestClient(main.create_app())
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{route="/jobs/{job_id}",method="GET",status="404"}' in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert text.endswith("\n")
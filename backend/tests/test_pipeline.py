@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from main import Language, parse_fused_output
+from pipeline import (
+    CONCURRENT, FUSED, SEQUENTIAL, FusedOutputError, FusedTooLong, resolve_mode, run_summary_pipeline
+)
+
+
+class Calls:
+    """Scripted correction, summary and fused stages that record what they were given."""
+
+    def __init__(self, fused_error=None):
+        self.log = []
+        self.running = 0
+        self.overlapped = False
+        self.fused_error = fused_error
+
+    async def _stage(self, name, text, result):
+        self.log.append((name, text))
+        self.running += 1
+        self.overlapped |= self.running > 1
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return result
+
+    async def correct(self, text):
+        return await self._stage("correct", text, text.capitalize() + ".")
+
+    async def summarize(self, text):
+        return await self._stage("summarize", text, "Qısa xülasə")
+
+    async def fused(self, text):
+        if self.fused_error:
+            raise self.fused_error
+        return await self._stage("fused", text, ("Birləşik.", "Birləşik xülasə"))
+
+    def run(self, mode):
+        return asyncio.run(run_summary_pipeline("salam dünya", self.correct, self.summarize, self.fused, mode))
+
+
+def test_sequential_summarizes_the_corrected_transcript():
+    calls = Calls()
+    result = calls.run(SEQUENTIAL)
+    assert calls.log == [("correct", "salam dünya"), ("summarize", "Salam dünya.")]
+    assert (result.transcript, result.summary, result.mode) == ("Salam dünya.", "Qısa xülasə", SEQUENTIAL)
+    assert set(result.timings) == {"correct_seconds", "summarize_seconds", "total_seconds"}
+
+
+def test_concurrent_runs_both_stages_on_the_raw_transcript_at_once():
+    calls = Calls()
+    result = calls.run(CONCURRENT)
+    assert sorted(calls.log) == [("correct", "salam dünya"), ("summarize", "salam dünya")]
+    assert calls.overlapped
+    assert (result.transcript, result.summary, result.mode) == ("Salam dünya.", "Qısa xülasə", CONCURRENT)
+
+
+def test_fused_makes_one_call():
+    calls = Calls()
+    result = calls.run(FUSED)
+    assert calls.log == [("fused", "salam dünya")]
+    assert (result.transcript, result.summary) == ("Birləşik.", "Birləşik xülasə")
+    assert result.report() == {"mode": FUSED, "timings": result.timings}
+
+
+@pytest.mark.parametrize("error", [FusedOutputError("not json"), FusedTooLong("needs 3 correction segments")])
+def test_fused_falls_back_to_sequential(error):
+    calls = Calls(fused_error=error)
+    result = calls.run(FUSED)
+    assert [name for name, _ in calls.log] == ["correct", "summarize"]
+    assert result.report()["fallback"] == SEQUENTIAL
+    assert result.mode == FUSED
+
+
+def test_unknown_mode_is_rejected():
+    assert resolve_mode("CONCURRENT") == CONCURRENT
+    with pytest.raises(ValueError):
+        resolve_mode("parallel")
+
+
+def test_fused_output_is_parsed_from_json():
+    content = json.dumps({"transcript": " Salam. ", "summary": " Xülasə "}, ensure_ascii=False)
+    assert parse_fused_output(content) == ("Salam.", "Xülasə")
+
+
+@pytest.mark.parametrize("content", ["not json", '{"transcript": "Salam."}', '{"transcript": 1, "summary": "x"}', "[]"])
+def test_unusable_fused_output_is_rejected(content):
+    with pytest.raises(FusedOutputError):
+        parse_fused_output(content)
+
+
+def test_long_transcripts_are_not_fused(monkeypatch):
+    async def unexpected(**kwargs):
+        raise AssertionError("a long transcript must not be sent as one fused call")
+
+    monkeypatch.setattr(main, "create_chat_completion", unexpected)
+    transcript = " ".join(["Bu cümlə uzun bir qeydin bir hissəsidir."] * 400)
+    with pytest.raises(FusedTooLong):
+        asyncio.run(main.correct_and_summarize(transcript, Language.AZERBAIJANI))
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpen, ResilientCaller, RetryBudget
+
+
+def status_error(status: int) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return openai.APIStatusError("upstream error", response=response, body=None)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def failing(error):
+    async def attempt():
+        raise error
+    return attempt
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=0)
+    breaker.failure("m")
+    breaker.check("m")
+    breaker.failure("m")
+    assert breaker.state == "half_open"
+
+    breaker.check("m")  # the trial call
+    with pytest.raises(CircuitOpen):
+        breaker.check("m")
+    breaker.success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    breaker.failure("m")
+    breaker.opened_at -= 60
+    breaker.check("m")
+    breaker.failure("m")
+    assert breaker.state == "open"
+
+
+def test_retry_budget_is_bounded_by_reserve_and_ratio():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_retryable_errors_are_retried_and_trip_the_breaker():
+    caller = ResilientCaller(max_attempts=3, base_delay=0, max_delay=0)
+    with pytest.raises(openai.APIStatusError):
+        run(caller.call("m", failing(status_error(500))))
+    assert caller.breaker("m").failures == 3
+
+
+def test_upstream_rejection_counts_as_healthy_call():
+    caller = ResilientCaller(max_attempts=3, base_delay=0, max_delay=0)
+    caller.breaker("m").failures = 2
+    with pytest.raises(openai.APIStatusError):
+        run(caller.call("m", failing(status_error(400))))
+    assert caller.breaker("m").failures == 0
+
+
+def test_local_errors_do_not_touch_the_breaker():
+    caller = ResilientCaller(max_attempts=3, base_delay=0, max_delay=0)
+    breaker = caller.breaker("m")
+    breaker.failures = 2
+    with pytest.raises(KeyError):
+        run(caller.call("m", failing(KeyError("choices"))))
+    assert breaker.failures == 2
+
+    # A half-open trial that hits a local error frees the trial slot without closing the breaker
+    breaker.threshold, breaker.reset_seconds = 1, 0
+    breaker.failure("m")
+    with pytest.raises(TypeError):
+        run(caller.call("m", failing(TypeError("bad"))))
+    assert breaker.state == "half_open"
+    breaker.check("m")
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from ingest import BytesReader, UploadTooLarge
+from scratch import ScratchFull, ScratchSpace
+
+
+class Upload(BytesReader):
+    def __init__(self, data: bytes, size=None):
+        super().__init__(data)
+        self.size = size
+
+
+@pytest.fixture
+def space(tmp_path):
+    return ScratchSpace(root=str(tmp_path), quota=1000, max_age=60)
+
+
+def test_write_upload_reserves_the_known_size(space):
+    scratch = asyncio.run(space.write_upload(Upload(b"a" * 300, size=300), max_bytes=500))
+    assert (scratch.reserved, space.used_bytes) == (300, 300)
+    assert scratch.read_bytes() == b"a" * 300
+    scratch.close()
+    scratch.close()
+    assert space.used_bytes == 0
+    assert not os.path.exists(scratch.path)
+
+
+def test_unknown_size_reserves_the_limit_until_written(space):
+    async def scenario():
+        upload = Upload(b"a" * 300)
+        writing = asyncio.create_task(space.write_upload(upload, max_bytes=800))
+        await asyncio.sleep(0)
+        # While streaming, another upload of the limit's size does not fit
+        with pytest.raises(ScratchFull):
+            space.create(300)
+        return await writing
+
+    scratch = asyncio.run(scenario())
+    assert (scratch.reserved, space.used_bytes) == (300, 300)
+
+
+def test_rejected_uploads_release_their_reservation(space, tmp_path):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(space.write_upload(Upload(b"a" * 600), max_bytes=500))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(space.write_upload(Upload(b"a" * 600, size=600), max_bytes=500))
+    with pytest.raises(ScratchFull):
+        asyncio.run(space.write_upload(Upload(b"a" * 100, size=1100), max_bytes=2000))
+    assert space.used_bytes == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sweep_removes_orphans_of_exited_processes_and_old_files(space, tmp_path):
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                            capture_output=True, text=True, check=True).stdout.strip()
+    orphan = tmp_path / f"{exited}-orphan.wav"
+    stale = tmp_path / f"{os.getpid()}-stale.wav"
+    foreign = tmp_path / "upload.wav"
+    live = tmp_path / f"{os.getpid()}-live.wav"
+    for path in (orphan, stale, foreign, live):
+        path.write_bytes(b"x")
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+    tracked = space.create(10)
+    os.utime(tracked.path, (old, old))
+
+    assert space.sweep() == 3
+    assert sorted(os.listdir(tmp_path)) == sorted([live.name, os.path.basename(tracked.path)])
+    assert space.orphans_removed == 3
+
+
+def test_health_reports_the_scratch_space(space, monkeypatch):
+    monkeypatch.setattr(main, "scratch", space)
+    report = TestClient(main.create_app()).get("/health").json()["scratch"]
+    assert report["path"] == space.root
+    assert report["writable"] is True
+    assert report["quota_bytes"] == 1000
+    assert report["disk"]["total_bytes"] >= report["disk"]["free_bytes"] > 0
+    assert "filesystem" in report
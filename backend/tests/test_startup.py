@@ -0,0 +1,25 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_prewarm_does_not_block_startup(monkeypatch):
+    events = []
+
+    async def unreachable(http_client, base_url):
+        events.append("started")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    monkeypatch.setattr(main, "prewarm", unreachable)
+    monkeypatch.setattr(main, "client", None)
+    with TestClient(main.create_app()) as client:
+        assert client.get("/health").status_code == 200
+        assert events == ["started"]
+    assert events == ["started", "cancelled"]
+    assert main.client is None
@@ -0,0 +1,41 @@
+import io
+import shutil
+import wave
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from ingest import FFMPEG_BINARY
+
+pytestmark = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason="ffmpeg is not available")
+
+ENDPOINTS = ["/transcribe/", "/transcribe/stream/", "/summarize-audio/stream/"]
+
+
+def long_wav(seconds: float, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x80" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_overlong_audio_is_rejected_before_streaming(endpoint):
+    client = TestClient(main.create_app())
+    response = client.post(endpoint, files={"file": ("long.wav", long_wav(330), "audio/wav")})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Audio faylın uzunluğu 5 dəqiqədən çox ola bilməz"
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_undecodable_upload_is_an_http_error_with_detail(endpoint):
+    client = TestClient(main.create_app(), raise_server_exceptions=False)
+    response = client.post(endpoint, files={"file": ("note.wav", b"not audio at all" * 64, "audio/wav")})
+
+    assert response.status_code == 500
+    assert response.json()["detail"].split(":")[0] in ("Transcription error", "Summarization error")
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+import main
+from cache import ResultCache
+from resilience import ResilientCaller
+from upstream import ModelLimiter
+
+MODEL = "gpt-4o"
+
+
+class Response:
+    async def aclose(self):
+        pass
+
+
+class Stream:
+    """The parts of openai.AsyncStream that stream_chat_completion uses."""
+
+    def __init__(self, deltas):
+        self.response = Response()
+        self._deltas = deltas
+
+    async def __aiter__(self):
+        for delta in self._deltas:
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+def server_error() -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    return openai.APIStatusError("upstream error", response=httpx.Response(500, request=request), body=None)
+
+
+def in_flight() -> int:
+    return main.model_limiter.stats()[MODEL]["in_flight"]
+
+
+class RecordingCaller(ResilientCaller):
+    """Records how many slots are held whenever it backs off."""
+
+    def __init__(self):
+        super().__init__(max_attempts=3)
+        self.held_during_backoff = []
+
+    def backoff(self, attempt, retry_after=None):
+        self.held_during_backoff.append(in_flight())
+        return 0
+
+
+def use_client(monkeypatch, create):
+    monkeypatch.setattr(main, "client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(main, "model_limiter", ModelLimiter())
+    monkeypatch.setattr(main, "result_cache", ResultCache(enabled=False))
+
+
+def test_no_slot_is_held_during_retry_backoff(monkeypatch):
+    calls = 0
+
+    async def create(**kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise server_error()
+        return Stream(["Salam", " dünya"])
+
+    use_client(monkeypatch, create)
+    caller = RecordingCaller()
+    monkeypatch.setattr(main, "resilience", caller)
+
+    async def scenario():
+        return [delta async for delta in main.stream_chat_completion("summary", model=MODEL, messages=[])]
+
+    assert asyncio.run(scenario()) == ["Salam", " dünya"]
+    assert caller.held_during_backoff == [0]
+    assert in_flight() == 0
+
+
+def test_slow_reader_does_not_hold_the_slot(monkeypatch):
+    async def create(**kwargs):
+        return Stream(["bir", " iki", " üç"])
+
+    use_client(monkeypatch, create)
+    monkeypatch.setattr(main, "resilience", ResilientCaller())
+
+    async def scenario():
+        deltas = main.stream_chat_completion("summary", model=MODEL, messages=[])
+        first = await deltas.__anext__()
+        # The client has not read further, but the upstream stream is done
+        await asyncio.sleep(0.01)
+        held = in_flight()
+        rest = [delta async for delta in deltas]
+        return first, held, rest
+
+    first, held, rest = asyncio.run(scenario())
+    assert (first, held, rest) == ("bir", 0, [" iki", " üç"])
@@ -0,0 +1,155 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration (shared by every upstream call in a worker)
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "60"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() in ("1", "true", "yes")
+# Connections opened to the API at startup, so the first requests skip the TCP/TLS handshake
+UPSTREAM_PREWARM_CONNECTIONS = int(os.getenv("UPSTREAM_PREWARM_CONNECTIONS", "2"))
+UPSTREAM_PREWARM_TIMEOUT = float(os.getenv("UPSTREAM_PREWARM_TIMEOUT", "5"))
+
+# Alternative API endpoint, e.g. the local mock server in benchmarks/mock_openai.py
+UPSTREAM_BASE_URL = os.getenv("UPSTREAM_BASE_URL")
+MOCK_UPSTREAM = os.getenv("MOCK_UPSTREAM", "false").lower() in ("1", "true", "yes")
+MOCK_UPSTREAM_URL = os.getenv("MOCK_UPSTREAM_URL", "http://127.0.0.1:8001/v1")
+
+# Per-model in-flight limits
+DEFAULT_MODEL_CONCURRENCY = int(os.getenv("DEFAULT_MODEL_CONCURRENCY", "16"))
+MODEL_CONCURRENCY = {
+    "whisper-1": int(os.getenv("WHISPER_CONCURRENCY", "16")),
+    "gpt-4o": int(os.getenv("GPT_CONCURRENCY", "32")),
+}
+
+
+def http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Create the pooled async HTTP client used for all OpenAI requests.
+    HTTP/2 is enabled only when requested and the h2 package is present.
+    """
+    use_http2 = UPSTREAM_HTTP2 and http2_available()
+    if UPSTREAM_HTTP2 and not use_http2:
+        logger.info("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY
+        ),
+        http2=use_http2,
+        follow_redirects=True
+    )
+
+
+def upstream_base_url() -> Optional[str]:
+    """The API base URL to use instead of OpenAI's, if any."""
+    if MOCK_UPSTREAM:
+        return MOCK_UPSTREAM_URL
+    return UPSTREAM_BASE_URL
+
+
+def build_client(http_client: httpx.AsyncClient) -> "AsyncOpenAI":
+    """
+    Create the async OpenAI client on top of the shared connection pool.
+    MOCK_UPSTREAM or UPSTREAM_BASE_URL point it at another server; without
+    either, the SDK default (or OPENAI_BASE_URL) is used. The SDK's own
+    retries are disabled: resilience.ResilientCaller retries under a budget.
+    """
+    # The SDK is imported when the app starts rather than when this module is imported
+    from openai import AsyncOpenAI
+
+    base_url = upstream_base_url()
+    if base_url:
+        logger.info(f"Using upstream API at {base_url}")
+    return AsyncOpenAI(
+        api_key=os.getenv('OPENAI_API_KEY') or ("mock" if MOCK_UPSTREAM else None),
+        base_url=base_url,
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+async def prewarm(
+    http_client: httpx.AsyncClient,
+    base_url: str,
+    connections: int = UPSTREAM_PREWARM_CONNECTIONS,
+    timeout: float = UPSTREAM_PREWARM_TIMEOUT
+) -> int:
+    """
+    Open up to `connections` pooled connections to the API by sending
+    concurrent HEAD requests; any response leaves a warm keep-alive connection
+    behind. Failures are logged and otherwise ignored. The app runs it as a
+    background task, so an unreachable upstream never blocks startup.
+    Returns the number of connections opened.
+    """
+    if connections <= 0:
+        return 0
+
+    async def touch() -> bool:
+        try:
+            await http_client.head(base_url, timeout=timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not pre-warm upstream connection to {base_url}: {type(e).__name__}")
+            return False
+
+    opened = sum(await asyncio.gather(*(touch() for _ in range(connections))))
+    logger.info(f"Pre-warmed {opened} upstream connections")
+    return opened
+
+
+class ModelLimiter:
+    """
+    Bounds the number of concurrent upstream calls per model.
+    Semaphores are created lazily so they bind to the running event loop.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default: int = DEFAULT_MODEL_CONCURRENCY):
+        self.limits = dict(MODEL_CONCURRENCY if limits is None else limits)
+        self.default = default
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._semaphores:
+            self._semaphores[model] = asyncio.Semaphore(self.limits.get(model, self.default))
+            self._in_flight[model] = 0
+        return self._semaphores[model]
+
+    @asynccontextmanager
+    async def limit(self, model: str):
+        """Hold one of the model's concurrency slots for the duration of the block."""
+        async with self._semaphore(model):
+            self._in_flight[model] += 1
+            try:
+                yield
+            finally:
+                self._in_flight[model] -= 1
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            model: {
+                "limit": self.limits.get(model, self.default),
+                "in_flight": self._in_flight.get(model, 0)
+            } for model in set(self.limits) | set(self._semaphores)
+        }
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+# Voice activity detection configuration
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_DYNAMIC_RANGE_DB = float(os.getenv("VAD_DYNAMIC_RANGE_DB", "35"))
+VAD_FLOOR_DB = float(os.getenv("VAD_FLOOR_DB", "-60"))
+
+# Silence compaction configuration
+SILENCE_TRIM = os.getenv("SILENCE_TRIM", "false").lower() in ("1", "true", "yes")
+SILENCE_MAX_PAUSE_SECONDS = float(os.getenv("SILENCE_MAX_PAUSE_SECONDS", "0.6"))
+SILENCE_EDGE_PADDING_SECONDS = float(os.getenv("SILENCE_EDGE_PADDING_SECONDS", "0.15"))
+
+# Frames are analysed in blocks to bound the float32 working set on long audio
+_BLOCK_FRAMES = 20000
+
+
+def frame_length(sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> int:
+    return max(1, int(sample_rate * frame_ms / 1000))
+
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """
+    RMS level of each non-overlapping frame in dBFS.
+    A trailing partial frame is ignored.
+    """
+    frame = frame_length(sample_rate, frame_ms)
+    n_frames = samples.size // frame
+    energy = np.empty(n_frames, dtype=np.float32)
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    for start in range(0, n_frames, _BLOCK_FRAMES):
+        block = frames[start:start + _BLOCK_FRAMES].astype(np.float32)
+        energy[start:start + _BLOCK_FRAMES] = np.einsum("ij,ij->i", block, block) / frame
+    return 10 * np.log10(energy / (32768.0 ** 2) + 1e-12)
+
+
+def silence_threshold_db(energy_db: np.ndarray) -> float:
+    """
+    Adaptive silence threshold: a fixed range below the loud parts of the
+    recording, but never below the absolute floor.
+    """
+    if energy_db.size == 0:
+        return VAD_FLOOR_DB
+    return max(float(np.percentile(energy_db, 95)) - VAD_DYNAMIC_RANGE_DB, VAD_FLOOR_DB)
+
+
+def silence_mask(energy_db: np.ndarray, threshold_db: float = None) -> np.ndarray:
+    """Boolean mask of frames quieter than the threshold."""
+    if threshold_db is None:
+        threshold_db = silence_threshold_db(energy_db)
+    return energy_db < threshold_db
+
+
+def runs(mask: np.ndarray) -> np.ndarray:
+    """
+    Start and end (exclusive) frame indices of each run of True values.
+    Returns an array of shape (n_runs, 2).
+    """
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return edges.reshape(-1, 2)
+
+
+def compact_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    max_pause_seconds: float = None,
+    edge_padding_seconds: float = None
+) -> np.ndarray:
+    """
+    Trim leading/trailing silence and shorten internal pauses.
+    Edges keep edge_padding_seconds of silence next to the speech; internal
+    pauses longer than max_pause_seconds are cut down to that length, keeping
+    half of it on each side. Returns the compacted samples (a new array when
+    anything was removed, otherwise the input unchanged).
+    """
+    if max_pause_seconds is None:
+        max_pause_seconds = SILENCE_MAX_PAUSE_SECONDS
+    if edge_padding_seconds is None:
+        edge_padding_seconds = SILENCE_EDGE_PADDING_SECONDS
+
+    frame = frame_length(sample_rate)
+    energy = frame_energy_db(samples, sample_rate)
+    silent = silence_mask(energy)
+    if not silent.any():
+        return samples
+    if silent.all():
+        # Nothing but silence: keep a short stretch rather than sending empty audio
+        return samples[:int(edge_padding_seconds * 2 * sample_rate)]
+
+    frame_ms = 1000 * frame / sample_rate
+    max_pause = max(1, int(max_pause_seconds * 1000 / frame_ms))
+    padding = int(edge_padding_seconds * 1000 / frame_ms)
+
+    keep = np.ones(energy.size, dtype=bool)
+    for start, end in runs(silent):
+        if start == 0:
+            keep[start:max(start, end - padding)] = False
+        elif end == energy.size:
+            keep[min(end, start + padding):end] = False
+        elif end - start > max_pause:
+            half = max_pause // 2
+            keep[start + half:end - (max_pause - half)] = False
+
+    if keep.all():
+        return samples
+    sample_keep = np.repeat(keep, frame)
+    # The trailing partial frame follows the decision for the last full frame
+    tail = samples.size - sample_keep.size
+    if tail:
+        sample_keep = np.concatenate((sample_keep, np.full(tail, keep[-1])))
+    return samples[sample_keep]